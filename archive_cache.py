@@ -0,0 +1,227 @@
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+from metrics import METRICS
+
+# On-disk cache for hyperliquid-archive GETs.
+#
+# Blobs are stored once per ETag under objects/, exactly as S3 sent them
+# (still lz4 compressed). index.json maps bucket/key -> etag, size and last
+# access time; when the blobs exceed max_bytes the least recently used ones
+# are evicted. Archive files do not change once published, so by default a
+# cached key is served without asking S3; revalidate=True does a HEAD first
+# and refetches if the ETag moved. The index is written every FLUSH_EVERY
+# stores and on flush()/exit, not after each object; a crash in between only
+# loses index entries, and those keys are downloaded again.
+#
+# Only whole-object GETs are cached: Range, conditional and versioned
+# requests go straight to S3.
+#
+# Opt in with cached_client(client), or for every script at once by setting
+# HL_ARCHIVE_CACHE=1 (or to a directory); archive_client.get_client applies it.
+
+DEFAULT_CACHE_DIR = '.cache/archive'
+DEFAULT_MAX_BYTES = int(os.environ.get('HL_ARCHIVE_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+CHUNK_SIZE = 1024 * 1024
+FLUSH_EVERY = 100
+
+# get_object arguments that ask for something other than the current whole
+# object under the key
+UNCACHED_ARGS = ('Range', 'PartNumber', 'VersionId', 'IfMatch', 'IfNoneMatch',
+                 'IfModifiedSince', 'IfUnmodifiedSince')
+
+class ArchiveCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.unflushed = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.bytes_downloaded = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+            except ValueError:
+                print(f"Ignoring corrupt cache index {self.index_path}")
+        atexit.register(self.flush)
+
+    def _blob_path(self, etag):
+        return os.path.join(self.cache_dir, 'objects', etag[:2], etag)
+
+    def _entry(self, bucket, key):
+        return f"{bucket}/{key}"
+
+    def lookup(self, bucket, key, etag=None):
+        # Open file for the cached blob, or None. Pass etag to reject stale
+        # copies. The blob is opened under the lock, so another thread's
+        # eviction can't remove it in between; one deleted behind our back
+        # (another process sharing the directory) is just a miss.
+        with self.lock:
+            name = self._entry(bucket, key)
+            entry = self.index.get(name)
+            if entry is None or (etag is not None and entry['etag'] != etag):
+                return None
+            try:
+                f = open(self._blob_path(entry['etag']), 'rb')
+            except FileNotFoundError:
+                del self.index[name]
+                self.dirty = True
+                return None
+            entry['atime'] = time.time()
+            self.dirty = True
+            self.hits += 1
+            self.bytes_from_cache += entry['size']
+            return f
+
+    def store(self, bucket, key, etag, body):
+        # Copy body into the cache chunk by chunk and return the blob, open
+        path = self._blob_path(etag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = 0
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in iter(lambda: body.read(CHUNK_SIZE), b''):
+                        f.write(chunk)
+                        size += len(chunk)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        else:
+            # Same content under another key: nothing to download twice
+            size = os.path.getsize(path)
+        body.close()
+
+        with self.lock:
+            self.misses += 1
+            self.bytes_downloaded += size
+            self.index[self._entry(bucket, key)] = {'etag': etag, 'size': size, 'atime': time.time()}
+            self.dirty = True
+            self._evict(keep=etag)
+            f = open(path, 'rb')
+            self.unflushed += 1
+            due = self.unflushed >= FLUSH_EVERY
+        if due:
+            self.flush()
+        return f
+
+    def _evict(self, keep=None):
+        # Caller holds the lock. Sizes are counted per blob, not per key;
+        # `keep` is the blob just stored, which store() opens before unlocking.
+        blobs = {}
+        for name, entry in self.index.items():
+            blob = blobs.setdefault(entry['etag'], {'size': entry['size'], 'atime': 0, 'names': []})
+            blob['atime'] = max(blob['atime'], entry['atime'])
+            blob['names'].append(name)
+
+        total = sum(b['size'] for b in blobs.values())
+        for etag, blob in sorted(blobs.items(), key=lambda kv: kv[1]['atime']):
+            if total <= self.max_bytes:
+                break
+            if etag == keep:
+                continue
+            for name in blob['names']:
+                del self.index[name]
+            try:
+                os.remove(self._blob_path(etag))
+            except FileNotFoundError:
+                pass
+            total -= blob['size']
+            self.evictions += 1
+
+    def flush(self):
+        # Serialize, write and rename under the lock: two threads flushing at
+        # once can't leave an older index on disk than the newest snapshot
+        with self.lock:
+            if not self.dirty:
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.index, f)
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.dirty = False
+            self.unflushed = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'bytes_from_cache': self.bytes_from_cache,
+            'bytes_downloaded': self.bytes_downloaded,
+            'evictions': self.evictions,
+        }
+
+    def stats_line(self):
+        s = self.stats()
+        return (f"Cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%}), "
+                f"{s['bytes_from_cache'] / 1e6:.1f} MB local, {s['bytes_downloaded'] / 1e6:.1f} MB downloaded")
+
+class CachedClient:
+    # Drop-in for a boto3 S3 client: whole-object get_object calls go through
+    # the cache, everything else (head_object, paginators, ranged GETs...) is
+    # passed through. close() writes the index.
+    def __init__(self, client, cache, revalidate=False):
+        self.client = client
+        self.cache = cache
+        self.revalidate = revalidate
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def close(self):
+        self.cache.flush()
+
+    def get_object(self, Bucket, Key, **kwargs):
+        if any(arg in kwargs for arg in UNCACHED_ARGS):
+            # A partial or conditional answer must never be stored as the object
+            METRICS.count('cache_bypassed')
+            return self.client.get_object(Bucket=Bucket, Key=Key, **kwargs)
+        etag = None
+        if self.revalidate:
+            head_kwargs = {'RequestPayer': kwargs['RequestPayer']} if 'RequestPayer' in kwargs else {}
+            etag = self.client.head_object(Bucket=Bucket, Key=Key, **head_kwargs)['ETag'].strip('"')
+
+        body = self.cache.lookup(Bucket, Key, etag)
+        if body is None:
+            METRICS.count('cache_misses')
+            resp = self.client.get_object(Bucket=Bucket, Key=Key, **kwargs)
+            body = self.cache.store(Bucket, Key, resp['ETag'].strip('"'), resp['Body'])
+            size = os.fstat(body.fileno()).st_size
+        else:
+            size = os.fstat(body.fileno()).st_size
+            METRICS.count('cache_hits')
+            METRICS.count('cache_bytes', size)
+        return {'Body': body, 'ContentLength': size}
+
+def cached_client(client, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, revalidate=False):
+    return CachedClient(client, ArchiveCache(cache_dir, max_bytes), revalidate=revalidate)
+
+def maybe_cached(client):
+    # Wrap the client only when HL_ARCHIVE_CACHE is set in the environment
+    setting = os.environ.get('HL_ARCHIVE_CACHE', '').strip()
+    if not setting or setting == '0':
+        return client
+    cache_dir = DEFAULT_CACHE_DIR if setting == '1' else setting
+    return cached_client(client, cache_dir=cache_dir)
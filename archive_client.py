@@ -0,0 +1,212 @@
+
+import os
+import re
+import time
+import threading
+from datetime import date, datetime
+
+from metrics import METRICS, MeteredBody
+
+# Shared access to the hyperliquid-archive bucket.
+#
+# Every script goes through here so connection pooling, retries and the key
+# layout live in one place. boto3 is only imported when the first client is
+# built, so importing this module is cheap (pipeline workers, --help, ...).
+# Clients from get_client are metered (see metrics.py): every request S3
+# bills us for is counted and timed below the cache, so cache hits are free.
+
+AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
+BUCKET = "hyperliquid-archive"
+REQUEST_PAYER = 'requester'
+
+DEFAULT_WORKERS = 16
+MAX_ATTEMPTS = 10
+
+_clients = {}
+_clients_lock = threading.Lock()
+_listings = {}
+
+def get_client(workers=DEFAULT_WORKERS, unsigned=False, cache=True):
+    # One client per (pool size, signing) pair, built on first use and shared
+    # across threads. The pool gets one connection per worker thread; adaptive
+    # retries back off client-side when S3 starts throttling (503 SlowDown).
+    # cache=True honours HL_ARCHIVE_CACHE (see archive_cache.py).
+    config_key = (workers, unsigned, cache)
+    with _clients_lock:
+        if config_key not in _clients:
+            import boto3
+            from botocore import UNSIGNED
+            from botocore.config import Config
+            from archive_cache import maybe_cached
+
+            config = Config(
+                max_pool_connections=workers,
+                retries={'mode': 'adaptive', 'max_attempts': MAX_ATTEMPTS},
+                **({'signature_version': UNSIGNED} if unsigned else {})
+            )
+            session = boto3.Session(
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+            )
+            client = MeteredClient(session.client('s3', config=config))
+            _clients[config_key] = maybe_cached(client) if cache else client
+        return _clients[config_key]
+
+class _MeteredPaginator:
+    def __init__(self, paginator):
+        self.paginator = paginator
+
+    def paginate(self, **kwargs):
+        pages = iter(self.paginator.paginate(**kwargs))
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return
+            METRICS.observe('list', time.perf_counter() - start)
+            METRICS.count('list_requests')
+            METRICS.count('objects_listed', len(page.get('Contents', [])))
+            yield page
+
+class MeteredClient:
+    # Wraps the boto3 client: LIST/GET/HEAD counts and times go to METRICS,
+    # GET bodies are MeteredBody so downloaded bytes are the bytes read
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def get_object(self, **kwargs):
+        start = time.perf_counter()
+        METRICS.count('get_requests')
+        try:
+            resp = self.client.get_object(**kwargs)
+        except Exception:
+            # The failed item itself is reported by whoever asked for it
+            METRICS.observe('get', time.perf_counter() - start, error=True)
+            raise
+        # One 'get' span per request, recorded when the body is closed:
+        # time to first byte plus the time spent reading
+        resp['Body'] = MeteredBody(resp['Body'], METRICS, 'get', waited_s=time.perf_counter() - start)
+        return resp
+
+    def head_object(self, **kwargs):
+        # A 404 here is an answer (see exists()), not an error
+        start = time.perf_counter()
+        METRICS.count('head_requests')
+        try:
+            return self.client.head_object(**kwargs)
+        finally:
+            METRICS.observe('head', time.perf_counter() - start)
+
+    def list_objects_v2(self, **kwargs):
+        with METRICS.span('list', item=kwargs.get('Prefix')):
+            resp = self.client.list_objects_v2(**kwargs)
+        METRICS.count('list_requests')
+        METRICS.count('objects_listed', len(resp.get('Contents', [])))
+        return resp
+
+    def get_paginator(self, name):
+        paginator = self.client.get_paginator(name)
+        return _MeteredPaginator(paginator) if name == 'list_objects_v2' else paginator
+
+# --- Key layout ---
+
+def _day(value):
+    # Accepts a date/datetime or a YYYYMMDD / YYYY-MM-DD string
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y%m%d")
+    if isinstance(value, str):
+        digits = value.replace("-", "")
+        if re.fullmatch(r"\d{8}", digits):
+            return digits
+    raise ValueError(f"Expected a date or YYYYMMDD string, got {value!r}")
+
+def _hour(value):
+    hour = int(value)
+    if not 0 <= hour <= 23:
+        raise ValueError(f"Hour out of range: {value!r}")
+    return hour
+
+def asset_ctxs_key(day):
+    # Daily CSV of every asset context update: asset_ctxs/20240101.csv.lz4
+    return f"asset_ctxs/{_day(day)}.csv.lz4"
+
+def asset_ctxs_date(key):
+    # Inverse of asset_ctxs_key, as YYYY-MM-DD; None for anything else
+    m = re.fullmatch(r"asset_ctxs/(\d{4})(\d{2})(\d{2})\.csv\.lz4", key)
+    return f"{m.group(1)}-{m.group(2)}-{m.group(3)}" if m else None
+
+def market_data_prefix(day, hour=None):
+    # market_data/20240101/ or market_data/20240101/0/
+    if hour is None:
+        return f"market_data/{_day(day)}/"
+    return f"market_data/{_day(day)}/{_hour(hour)}/"
+
+def market_data_key(day, hour, name):
+    # Hourly objects, e.g. market_data/20250101/0/assetCtxs.lz4
+    return f"{market_data_prefix(day, hour)}{name}.lz4"
+
+# --- Requests ---
+
+def _client(client):
+    return client if client is not None else get_client()
+
+def get_object(key, client=None):
+    return _client(client).get_object(Bucket=BUCKET, Key=key, RequestPayer=REQUEST_PAYER)
+
+def open_object(key, client=None):
+    # Unread botocore StreamingBody, for consumers that parse as bytes arrive
+    return get_object(key, client)['Body']
+
+def fetch_object(key, client=None):
+    body = open_object(key, client)
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+def exists(key, client=None):
+    # HEAD the key; only a real 404 means "missing", other errors propagate
+    from botocore.exceptions import ClientError
+    try:
+        _client(client).head_object(Bucket=BUCKET, Key=key, RequestPayer=REQUEST_PAYER)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+def list_page(prefix="", delimiter=None, max_keys=None, client=None):
+    # Single list_objects_v2 call, for quick looks at the bucket layout
+    kwargs = {'Bucket': BUCKET, 'Prefix': prefix, 'RequestPayer': REQUEST_PAYER}
+    if delimiter:
+        kwargs['Delimiter'] = delimiter
+    if max_keys:
+        kwargs['MaxKeys'] = max_keys
+    return _client(client).list_objects_v2(**kwargs)
+
+def iter_objects(prefix, start_after=None, client=None):
+    # Every object under prefix, 1000 keys per request
+    paginator = _client(client).get_paginator('list_objects_v2')
+    kwargs = {'Bucket': BUCKET, 'Prefix': prefix, 'RequestPayer': REQUEST_PAYER}
+    if start_after:
+        kwargs['StartAfter'] = start_after
+    for page in paginator.paginate(**kwargs):
+        yield from page.get('Contents', [])
+
+def list_objects(prefix, refresh=False, client=None):
+    # Full listing of a prefix, remembered for the rest of the process
+    if refresh or prefix not in _listings:
+        _listings[prefix] = list(iter_objects(prefix, client=client))
+    return _listings[prefix]
+
+def list_prefixes(prefix="", client=None):
+    # "Sub-folders" directly under prefix
+    paginator = _client(client).get_paginator('list_objects_v2')
+    prefixes = []
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix, Delimiter="/", RequestPayer=REQUEST_PAYER):
+        prefixes.extend(p['Prefix'] for p in page.get('CommonPrefixes', []))
+    return prefixes
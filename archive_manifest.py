@@ -0,0 +1,102 @@
+
+import os
+import re
+import json
+import argparse
+import tempfile
+from datetime import datetime
+
+import archive_client
+
+# Persisted listing of archive keys (size, ETag, last modified) per prefix.
+#
+# Keys list in lexical order and the daily files are named by date, so new
+# days always sort after the last key we have seen: a refresh is a single
+# list_objects_v2 call with StartAfter=last_key instead of paginating the
+# whole prefix again. Use full=True after the archive re-uploads old days.
+
+MANIFEST_DIR = '.cache/manifests'
+
+def _manifest_path(prefix):
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', prefix.strip('/')) or 'root'
+    return os.path.join(MANIFEST_DIR, f"{name}.json")
+
+def load_manifest(prefix):
+    path = _manifest_path(prefix)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get('prefix') == prefix:
+                return manifest
+        except ValueError:
+            print(f"Ignoring corrupt manifest {path}")
+    return {'prefix': prefix, 'last_key': None, 'updated': None, 'objects': {}}
+
+def save_manifest(manifest):
+    path = _manifest_path(manifest['prefix'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+def refresh_manifest(prefix, full=False, client=None):
+    manifest = load_manifest(prefix)
+    if full:
+        manifest['objects'] = {}
+        manifest['last_key'] = None
+
+    added = 0
+    for obj in archive_client.iter_objects(prefix, start_after=manifest['last_key'], client=client):
+        manifest['objects'][obj['Key']] = {
+            'size': obj['Size'],
+            'etag': obj['ETag'].strip('"'),
+            'last_modified': obj['LastModified'].isoformat(),
+        }
+        if manifest['last_key'] is None or obj['Key'] > manifest['last_key']:
+            manifest['last_key'] = obj['Key']
+        added += 1
+
+    manifest['updated'] = datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+    save_manifest(manifest)
+    return manifest, added
+
+def get_manifest(prefix, refresh=True, full=False, client=None):
+    # refresh=False works offline from whatever is on disk
+    if refresh:
+        manifest, added = refresh_manifest(prefix, full=full, client=client)
+        print(f"Manifest {prefix}: {len(manifest['objects'])} keys ({added} new).")
+        return manifest
+    return load_manifest(prefix)
+
+def asset_ctxs_files(start=None, end=None, refresh=True, client=None):
+    # {YYYY-MM-DD: manifest entry + key} for daily files within [start, end];
+    # start/end take anything archive_client accepts as a day
+    manifest = get_manifest("asset_ctxs/", refresh=refresh, client=client)
+    start = archive_client.asset_ctxs_key(start) if start else None
+    end = archive_client.asset_ctxs_key(end) if end else None
+    files = {}
+    for key, entry in manifest['objects'].items():
+        date = archive_client.asset_ctxs_date(key)
+        if date is None or (start and key < start) or (end and key > end):
+            continue
+        files[date] = dict(entry, key=key)
+    return dict(sorted(files.items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh and query the asset_ctxs/ manifest")
+    parser.add_argument('--start', help="First date, YYYYMMDD")
+    parser.add_argument('--end', help="Last date, YYYYMMDD")
+    parser.add_argument('--full', action='store_true', help="Re-list the whole prefix")
+    parser.add_argument('--offline', action='store_true', help="Do not contact S3")
+    args = parser.parse_args()
+
+    if args.full and not args.offline:
+        refresh_manifest("asset_ctxs/", full=True)
+    files = asset_ctxs_files(args.start, args.end, refresh=not (args.offline or args.full))
+    total = sum(f['size'] for f in files.values())
+    if files:
+        print(f"{len(files)} days, {min(files)} .. {max(files)}, {total / 1e9:.2f} GB compressed")
+    else:
+        print("No files in range.")
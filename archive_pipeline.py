@@ -0,0 +1,111 @@
+
+import os
+import time
+import functools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+from archive_client import DEFAULT_WORKERS
+from metrics import METRICS
+
+# Bounded fetch -> decode pipeline for archive objects.
+#
+# S3 GETs are latency bound, so they run on a thread pool sharing one client
+# (boto3 clients are thread-safe; see archive_client.get_client).
+# Decompressing and parsing is CPU bound, so it runs on a process pool. At most `max_in_flight` items are between
+# "submitted" and "yielded" at any time, which caps how many raw bodies sit
+# in memory, and results come back in the same order the items went in.
+
+DEFAULT_FETCH_WORKERS = DEFAULT_WORKERS
+DEFAULT_DECODE_WORKERS = os.cpu_count() or 1
+
+_DONE = object()
+
+def _timed(decode, raw):
+    # Runs where decode runs (possibly another process, whose METRICS is
+    # not ours): hand the duration back with the result
+    start = time.perf_counter()
+    result = decode(raw)
+    return result, time.perf_counter() - start
+
+def _copy_result(src, dst):
+    try:
+        dst.set_result(src.result())
+    except BaseException as e:
+        dst.set_exception(e)
+
+def _chain(fetch_future, decode_pool, decode):
+    # Future that resolves once the item has been fetched *and* decoded,
+    # without tying up a fetch thread while the decode runs
+    out = Future()
+
+    def on_fetched(f):
+        try:
+            raw = f.result()
+        except BaseException as e:
+            out.set_exception(e)
+            return
+        if decode is None:
+            out.set_result(raw)
+            return
+        try:
+            decode_pool.submit(decode, raw).add_done_callback(lambda d: _copy_result(d, out))
+        except BaseException as e:
+            out.set_exception(e)
+
+    fetch_future.add_done_callback(on_fetched)
+    return out
+
+def run_pipeline(items, fetch, decode=None, fetch_workers=DEFAULT_FETCH_WORKERS,
+                 decode_workers=DEFAULT_DECODE_WORKERS, max_in_flight=None, decode_stage=None):
+    # Yields (item, result, error) in input order; exactly one of result/error is set.
+    # fetch(item) runs in a thread, decode(fetched) in a separate process and
+    # must be a picklable top-level function. decode_workers=0 decodes in-thread.
+    # decode_stage names the METRICS stage decode time is recorded under.
+    if max_in_flight is None:
+        max_in_flight = 2 * fetch_workers
+    timed = decode is not None and decode_stage is not None
+    if timed:
+        decode = functools.partial(_timed, decode)
+
+    decode_pool = None
+    if decode is not None and decode_workers > 0:
+        decode_pool = ProcessPoolExecutor(max_workers=decode_workers)
+    elif decode is not None:
+        fetch = _fetch_then(fetch, decode)
+        decode = None
+
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers)
+    window = deque()
+    items = iter(items)
+    try:
+        while True:
+            # Top up the window, then block on the oldest item
+            while len(window) < max_in_flight:
+                item = next(items, _DONE)
+                if item is _DONE:
+                    break
+                window.append((item, _chain(fetch_pool.submit(fetch, item), decode_pool, decode)))
+            if not window:
+                break
+
+            item, future = window.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                yield item, None, e
+                continue
+            if timed:
+                result, seconds = result
+                METRICS.observe(decode_stage, seconds)
+            yield item, result, None
+    finally:
+        # Consumer may stop early: drop whatever has not started yet
+        fetch_pool.shutdown(cancel_futures=True)
+        if decode_pool is not None:
+            decode_pool.shutdown(cancel_futures=True)
+
+def _fetch_then(fetch, decode):
+    def fetch_and_decode(item):
+        return decode(fetch(item))
+    return fetch_and_decode
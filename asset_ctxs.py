@@ -0,0 +1,64 @@
+
+import lz4.frame
+import csv
+import io
+
+from oi_engine import IntradayBinner, iter_column_chunks, snapshot_total
+
+# Parsing for the daily asset_ctxs/{date}.csv.lz4 archive files.
+# Kept free of boto3 so pipeline worker processes import it cheaply.
+
+def iter_rows(fileobj):
+    # Stream CSV rows straight out of a compressed file object (botocore
+    # StreamingBody, open file, BytesIO...). LZ4FrameFile pulls the source in
+    # small chunks, so only a few blocks of the day are ever held in memory.
+    with lz4.frame.LZ4FrameFile(fileobj, 'rb') as lz:
+        with io.TextIOWrapper(lz, encoding='utf-8', newline='') as text:
+            yield from csv.DictReader(text)
+
+def first_snapshot(rows):
+    # The file dumps every coin at T1, then every coin at T2, ... sorted by
+    # time. Yield the T1 block and stop at the first row with a later
+    # timestamp, so we read exactly one snapshot whatever the asset count.
+    first_time = None
+    for row in rows:
+        if first_time is None:
+            first_time = row['time']
+        elif row['time'] != first_time:
+            return
+        yield row
+
+def sum_first_snapshot(rows):
+    # The first snapshot (00:00:00Z) represents the "start of day" OI
+    block = list(first_snapshot(rows))
+    return snapshot_total(
+        [row['coin'] for row in block],
+        [row['open_interest'] for row in block],
+        [row['mark_px'] for row in block],
+    )
+
+def stream_first_snapshot_oi(body):
+    # Stops reading as soon as the snapshot is summed; closing the body
+    # drops the rest of the download instead of draining it
+    rows = iter_rows(body)
+    try:
+        return sum_first_snapshot(rows)
+    finally:
+        rows.close()
+        body.close()
+
+def first_snapshot_oi(raw):
+    # Same thing for an already downloaded object body
+    return sum_first_snapshot(iter_rows(io.BytesIO(raw)))
+
+def stream_intraday(body, interval_s):
+    # One streaming pass over the whole day, sampled every interval_s seconds:
+    # [(bin start, {'time', 'total', 'coins'}), ...]
+    binner = IntradayBinner(interval_s)
+    try:
+        with lz4.frame.LZ4FrameFile(body, 'rb') as lz:
+            for chunk in iter_column_chunks(lz, ['time', 'coin', 'open_interest', 'mark_px']):
+                binner.add(chunk)
+    finally:
+        body.close()
+    return binner.series()
@@ -0,0 +1,123 @@
+
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import subprocess
+
+from build_dashboard import TIMEFRAMES, annualized_averages
+
+# Annualized revenue moving averages: the old slice + reduce per day and
+# window vs the prefix-sum engines (NumPy in build_dashboard.py, JS in
+# src/rolling.js), on a synthetic multi-year daily fee series. Also checks
+# that all implementations agree.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLLING_JS = os.path.join(BASE_DIR, "src", "rolling.js")
+
+# Reads {values, timeframes, repeat} on stdin, times the old api.js loop and
+# annualizedAverages, prints {old_s, new_s, series}
+NODE_BENCH = """
+import { readFileSync } from 'fs';
+import { pathToFileURL } from 'url';
+const { annualizedAverages } = await import(pathToFileURL(process.argv[1]).href);
+const { values, timeframes, repeat } = JSON.parse(readFileSync(0, 'utf8'));
+const days = values.map(dailyFees => ({ dailyFees }));
+
+const old = () => days.map((day, idx) => {
+  const result = { ...day };
+  timeframes.forEach(tf => {
+    const lo = idx >= tf - 1 ? idx - tf + 1 : 0;
+    const slice = days.slice(lo, idx + 1);
+    result[`annualized${tf}d`] = slice.reduce((acc, curr) => acc + curr.dailyFees, 0) / (idx + 1 - lo) * 365;
+  });
+  return result;
+});
+
+const best = fn => {
+  let best = Infinity;
+  for (let r = 0; r < repeat; r++) {
+    const start = process.hrtime.bigint();
+    fn();
+    best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e9);
+  }
+  return best;
+};
+
+const series = annualizedAverages(values, timeframes);
+const out = { old_s: best(old), new_s: best(() => annualizedAverages(values, timeframes)), series: {} };
+timeframes.forEach(tf => { out.series[tf] = Array.from(series[tf]); });
+console.log(JSON.stringify(out));
+"""
+
+def synthetic_fees(days, seed=1):
+    # Trending, noisy daily fees with occasional spikes
+    rng = random.Random(seed)
+    fees, level = [], 50_000.0
+    for _ in range(days):
+        level = max(1_000.0, level * (1 + rng.gauss(0.002, 0.03)))
+        fees.append(level * (8 if rng.random() < 0.01 else 1) * rng.uniform(0.7, 1.3))
+    return fees
+
+def slice_loop(values, timeframes):
+    # Python port of the original api.js loop, the reference for parity
+    series = {tf: [] for tf in timeframes}
+    for idx in range(len(values)):
+        for tf in timeframes:
+            lo = idx - tf + 1 if idx >= tf - 1 else 0
+            window = values[lo:idx + 1]
+            series[tf].append(sum(window) / len(window) * 365)
+    return series
+
+def max_rel_err(a, b, timeframes):
+    return max(abs(x - y) / max(abs(y), 1) for tf in timeframes for x, y in zip(a[tf], b[tf]))
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_node(values, timeframes, repeat):
+    node = shutil.which("node")
+    if node is None:
+        return None
+    payload = json.dumps({"values": values, "timeframes": timeframes, "repeat": repeat})
+    proc = subprocess.run([node, "--input-type=module", "-e", NODE_BENCH, ROLLING_JS],
+                          input=payload, capture_output=True, text=True, check=True)
+    out = json.loads(proc.stdout)
+    out["series"] = {int(tf): s for tf, s in out["series"].items()}
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Slice/reduce vs prefix-sum moving averages")
+    parser.add_argument('--years', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    values = synthetic_fees(args.years * 365)
+    tfs = TIMEFRAMES
+    print(f"{len(values)} days, timeframes {tfs}")
+
+    loop_s, expected = best_of(lambda: slice_loop(values, tfs), args.repeat)
+    numpy_s, got = best_of(lambda: annualized_averages(values, tfs), args.repeat)
+    got = {tf: s.tolist() for tf, s in got.items()}
+    err = max_rel_err(got, expected, tfs)
+    assert err < 1e-9, f"NumPy differs from the slice loop (rel err {err})"
+
+    print(f"python slice loop: {loop_s * 1e3:8.2f} ms")
+    print(f"numpy prefix sum:  {numpy_s * 1e3:8.2f} ms  ({loop_s / numpy_s:.0f}x, max rel err {err:.1e})")
+
+    node = run_node(values, tfs, args.repeat)
+    if node is None:
+        print("node not found, skipping the JS side")
+    else:
+        js_err = max_rel_err(node["series"], got, tfs)
+        assert js_err < 1e-12, f"src/rolling.js differs from NumPy (rel err {js_err})"
+        print(f"js slice/reduce:   {node['old_s'] * 1e3:8.2f} ms")
+        print(f"js prefix sum:     {node['new_s'] * 1e3:8.2f} ms  ({node['old_s'] / node['new_s']:.0f}x, "
+              f"vs numpy max rel err {js_err:.1e})")
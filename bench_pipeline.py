@@ -0,0 +1,313 @@
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import platform
+import contextlib
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+import lz4.frame
+
+import oi_engine
+import archive_client
+import synthetic_data
+from archive_pipeline import run_pipeline
+from asset_ctxs import stream_first_snapshot_oi
+from build_dashboard import TIMEFRAMES, annualized_averages
+
+# End-to-end benchmark of the data scripts on synthetic inputs
+# (synthetic_data.py), stage by stage:
+#
+#   download        run_pipeline fetching asset_ctxs days from a local
+#                   stand-in for the bucket (--latency adds per-request delay)
+#   decompress      lz4 frame -> CSV bytes
+#   parse           oi_engine.read_columns
+#   aggregate       notional OI per snapshot + first-snapshot total
+#   first_snapshot  build_history's streaming path, straight off the body
+#   moving_average  annualized averages over a multi-year fee series
+#   mints           fetch_all against mock Etherscan/Tronscan/DefiLlama
+#   ledger          mint_ledger upsert + multi-threshold rollup
+#
+# Every stage is timed once as-is (wall time, throughput, per-item p50/p95)
+# and run again under tracemalloc for its peak Python/NumPy allocation.
+# Results are appended to RESULTS_PATH with the git commit, and compared
+# against the last run with the same parameters. The file is per machine
+# and not checked in; numbers from another box don't compare.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(BASE_DIR, "bench_results.jsonl")
+ARCHIVE_ROOT = os.path.join(BASE_DIR, ".cache", "synthetic_archive")
+
+STAGES = ['download', 'decompress', 'parse', 'aggregate', 'first_snapshot',
+          'moving_average', 'mints', 'ledger']
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def per_item(fn, items):
+    # [fn(item)], [seconds per item]
+    results, latencies = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+# --- Stages: each returns (output, {'items', 'bytes', 'rows'}, latencies) ---
+
+def stage_download(ctx):
+    client = ctx['client']
+    latencies = []
+
+    def fetch(key):
+        start = time.perf_counter()
+        raw = archive_client.fetch_object(key, client=client)
+        latencies.append(time.perf_counter() - start)
+        return raw
+
+    raws = [raw for _, raw, error in run_pipeline(ctx['keys'], fetch, fetch_workers=ctx['workers'])
+            if error is None]
+    if len(raws) != len(ctx['keys']):
+        raise RuntimeError(f"{len(ctx['keys']) - len(raws)} downloads failed")
+    return raws, {'items': len(raws), 'bytes': sum(map(len, raws))}, latencies
+
+def stage_decompress(ctx):
+    texts, latencies = per_item(lz4.frame.decompress, ctx['raws'])
+    return texts, {'items': len(texts), 'bytes': sum(map(len, texts))}, latencies
+
+def stage_parse(ctx):
+    names = ['time', 'coin', 'open_interest', 'mark_px']
+    columns, latencies = per_item(lambda text: oi_engine.read_columns(io.BytesIO(text), names), ctx['texts'])
+    rows = sum(len(c['time']) for c in columns)
+    return columns, {'items': len(columns), 'bytes': sum(map(len, ctx['texts'])), 'rows': rows}, latencies
+
+def day_totals(columns):
+    by_time, skipped = oi_engine.aggregate(columns, by='time')
+    n = oi_engine.first_block_len(columns['time'])
+    first = oi_engine.snapshot_total(columns['coin'][:n], columns['open_interest'][:n], columns['mark_px'][:n])
+    return {'snapshots': len(by_time), 'first_snapshot_oi': first, 'skipped': skipped}
+
+def stage_aggregate(ctx):
+    totals, latencies = per_item(day_totals, ctx['columns'])
+    rows = sum(len(c['time']) for c in ctx['columns'])
+    return totals, {'items': len(totals), 'rows': rows}, latencies
+
+def stage_first_snapshot(ctx):
+    client = ctx['client']
+    totals, latencies = per_item(lambda key: stream_first_snapshot_oi(archive_client.open_object(key, client=client)),
+                                 ctx['keys'])
+    return totals, {'items': len(totals)}, latencies
+
+def stage_moving_average(ctx):
+    fees = ctx['fees']
+    averages, latencies = per_item(lambda tfs: annualized_averages(fees, tfs), [TIMEFRAMES])
+    return averages, {'items': len(fees) * len(TIMEFRAMES), 'rows': len(fees)}, latencies
+
+def stage_mints(ctx):
+    fetch_mints = ctx['fetch_mints']
+    # The explorer output is per-page progress; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = asyncio.run(fetch_mints.fetch_all("bench", "bench", {}, backfill=False))
+        elapsed = time.perf_counter() - start
+    (eth, _), (tron, _), (llama, _) = result
+    rows = len(ctx['eth_rows']) + len(ctx['tron_rows']) + len(ctx['llama'])
+    return result, {'items': len(eth) + len(tron) + len(llama), 'rows': rows}, [elapsed]
+
+def stage_ledger(ctx):
+    import mint_ledger
+    (eth, _), (tron, _), (llama, _) = ctx['mints']
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = mint_ledger.connect(os.path.join(tmp, "mints.sqlite"))
+        start = time.perf_counter()
+        mint_ledger.upsert_mints(conn, eth + tron)
+        mint_ledger.upsert_defillama(conn, llama)
+        rollup = mint_ledger.rollup(conn, ctx['fetch_mints'].ROLLUP_THRESHOLDS)
+        elapsed = time.perf_counter() - start
+        conn.close()
+    return rollup, {'items': len(eth) + len(tron) + len(llama)}, [elapsed]
+
+STAGE_FUNCS = {name: globals()[f"stage_{name}"] for name in STAGES}
+# Where each stage's output goes in ctx for the stages after it
+OUTPUTS = {'download': 'raws', 'decompress': 'texts', 'parse': 'columns', 'mints': 'mints'}
+
+def measure(name, ctx, memory=True):
+    fn = STAGE_FUNCS[name]
+    start = time.perf_counter()
+    output, counters, latencies = fn(ctx)
+    wall = time.perf_counter() - start
+
+    result = {'wall_s': round(wall, 4)}
+    for key, value in counters.items():
+        result[key] = value
+        result[f"{key}_per_s"] = round(value / wall, 1) if wall > 0 else None
+    if latencies:
+        result['p50_ms'] = round(percentile(latencies, 0.50) * 1e3, 3)
+        result['p95_ms'] = round(percentile(latencies, 0.95) * 1e3, 3)
+
+    if memory:
+        # Second run for memory only; tracing slows allocation-heavy code down
+        del output
+        tracemalloc.start()
+        output, _, _ = fn(ctx)
+        result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return output, result
+
+def git_version():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=BASE_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return git('rev-parse', '--short', 'HEAD') or None, bool(git('status', '--porcelain', '--', '*.py'))
+    except OSError:
+        return None, None
+
+def load_results(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare(previous, current, threshold):
+    # Prints wall time / peak memory deltas per stage; returns the stages
+    # that got slower (or bigger) by more than threshold (a fraction)
+    regressions = []
+    print(f"\nvs {previous['commit']} ({previous['time']}):")
+    for name, stage in current['stages'].items():
+        before = previous['stages'].get(name)
+        if not before:
+            continue
+        parts = []
+        for key in ('wall_s', 'peak_mb'):
+            if before.get(key) and stage.get(key) is not None:
+                change = stage[key] / before[key] - 1
+                parts.append(f"{key} {change:+7.1%}")
+                if change > threshold:
+                    regressions.append(f"{name}.{key}")
+        print(f"  {name:<15} {'  '.join(parts)}")
+    return regressions
+
+def build_context(args):
+    keys = synthetic_data.write_archive(args.root, args.start, args.days,
+                                        coins=args.coins, snapshots=args.snapshots)
+    ctx = {
+        'keys': keys,
+        'client': synthetic_data.LocalArchiveClient(args.root, latency_s=args.latency),
+        'workers': args.workers,
+        'fees': synthetic_data.fees_series(args.fee_days),
+    }
+
+    # Mock explorers; the fetcher reads its endpoints at import time
+    end_ts = int(time.time())
+    start_ts = end_ts - 3 * 365 * 86400
+    ctx['eth_rows'] = synthetic_data.etherscan_transfers(args.transfers, start_ts, end_ts)
+    ctx['tron_rows'] = synthetic_data.tronscan_transfers(args.transfers, start_ts, end_ts)
+    ctx['llama'] = synthetic_data.defillama_chart(args.fee_days, start_ts=start_ts - start_ts % 86400)
+    server, base = synthetic_data.serve_mock_apis(ctx['eth_rows'], ctx['tron_rows'], ctx['llama'])
+    os.environ["ETHERSCAN_API_URL"] = f"{base}/etherscan"
+    os.environ["TRONSCAN_API_URL"] = f"{base}/tronscan"
+    os.environ["DEFILLAMA_API_URL"] = f"{base}/defillama"
+    os.environ.pop("DEFILLAMA_FIXTURE", None)
+    import fetch_mints_comparison
+    # Local server, no rate limits to respect
+    fetch_mints_comparison.ETHERSCAN_RATE = fetch_mints_comparison.TRONSCAN_RATE = 10_000
+    ctx['fetch_mints'] = fetch_mints_comparison
+    return ctx, server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on synthetic data")
+    parser.add_argument('--root', default=ARCHIVE_ROOT, help="Synthetic archive directory (reused across runs)")
+    parser.add_argument('--start', default="20240101", help="First synthetic day, YYYYMMDD")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--coins', type=int, default=200)
+    parser.add_argument('--snapshots', type=int, default=288, help="Snapshots per day (288 = every 5 min)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every archive request")
+    parser.add_argument('--workers', type=int, default=8, help="Download threads")
+    parser.add_argument('--fee-days', type=int, default=1500, help="Length of the fee / supply series")
+    parser.add_argument('--transfers', type=int, default=2000, help="Explorer transfers per chain")
+    parser.add_argument('--stages', default=",".join(STAGES), help="Comma separated subset of stages")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--no-save', action='store_true', help="Don't append this run to the results file")
+    parser.add_argument('--fail-over', type=float, default=None,
+                        help="Exit 1 if a stage is this fraction slower/bigger than the last comparable run")
+    args = parser.parse_args()
+
+    selected = [s for s in args.stages.split(",") if s]
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    # Later stages consume earlier outputs
+    needed = set(selected)
+    for name, requires in [('aggregate', 'parse'), ('parse', 'decompress'), ('decompress', 'download'),
+                           ('ledger', 'mints')]:
+        if name in needed:
+            needed.add(requires)
+
+    ctx, server = build_context(args)
+    params = {k: getattr(args, k) for k in ('days', 'coins', 'snapshots', 'latency', 'workers',
+                                              'fee_days', 'transfers')}
+    print(f"{args.days} days x {args.coins} coins x {args.snapshots} snapshots, "
+          f"{args.transfers} transfers/chain, {args.fee_days} fee days")
+
+    stages = {}
+    try:
+        for name in STAGES:
+            if name not in needed:
+                continue
+            output, result = measure(name, ctx, memory=not args.no_memory)
+            if name in OUTPUTS:
+                ctx[OUTPUTS[name]] = output
+            if name in selected:
+                stages[name] = result
+    finally:
+        server.shutdown()
+
+    print(f"\n{'stage':<15} {'wall':>9} {'p50':>9} {'p95':>9} {'peak':>9}  throughput")
+    for name, r in stages.items():
+        throughput = []
+        if r.get('bytes_per_s'):
+            throughput.append(f"{r['bytes_per_s'] / 1e6:.1f} MB/s")
+        if r.get('rows_per_s'):
+            throughput.append(f"{r['rows_per_s'] / 1e6:.2f} M rows/s")
+        if r.get('items_per_s') and not throughput:
+            throughput.append(f"{r['items_per_s']:.1f} items/s")
+        peak = f"{r['peak_mb']:.1f}MB" if 'peak_mb' in r else "-"
+        p50 = f"{r['p50_ms']:.1f}ms" if 'p50_ms' in r else "-"
+        p95 = f"{r['p95_ms']:.1f}ms" if 'p95_ms' in r else "-"
+        print(f"{name:<15} {r['wall_s'] * 1e3:7.1f}ms {p50:>9} {p95:>9} {peak:>9}  {', '.join(throughput)}")
+
+    commit, dirty = git_version()
+    run = {
+        'time': datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': params,
+        'stages': stages,
+    }
+
+    regressions = []
+    comparable = [r for r in load_results(args.results) if r.get('params') == params]
+    if comparable:
+        regressions = compare(comparable[-1], run, args.fail_over if args.fail_over is not None else float('inf'))
+
+    if not args.no_save:
+        with open(args.results, "a") as f:
+            f.write(json.dumps(run, separators=(",", ":")) + "\n")
+        print(f"\nAppended to {args.results}")
+
+    if regressions:
+        print(f"Regressed past {args.fail_over:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
@@ -0,0 +1,189 @@
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from datetime import datetime, timedelta, timezone
+
+import oi_engine
+from http_client import HttpClient
+
+# Precomputes what getDashboardData (src/api.js) does in the browser: joins
+# HYPE price, protocol fees and OI on the revenue timeline, fills OI gaps by
+# linear interpolation and adds every annualized{tf}d moving average. The
+# result is one columnar public/dashboard.json the frontend loads instead of
+# hitting four sources and redoing the work on every page view.
+#
+# If CoinGecko or DefiLlama fail, the previous dashboard.json is kept and the
+# script still exits 0, so the daily deploy goes ahead; once the file is
+# older than DASHBOARD_MAX_AGE_S the frontend assembles the data live.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_PATH = os.path.join(BASE_DIR, "public", "dashboard.json")
+OI_HISTORY_PATH = os.path.join(BASE_DIR, "public", "oi_history.json")
+
+# Bump when the layout changes; src/api.js ignores files with another version
+DASHBOARD_VERSION = 1
+TIMEFRAMES = [7, 30, 90, 180, 360]
+
+PRICE_API = "https://api.coingecko.com/api/v3/coins/hyperliquid/market_chart?vs_currency=usd&days=365&interval=daily"
+FEES_API = "https://api.llama.fi/summary/fees/hyperliquid?dataType=dailyFees"
+INFO_API = "https://api.hyperliquid.xyz/info"
+
+COLUMNS = ["timestamp", "date", "dailyFees", "price", "openInterest"]
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+HTTP = HttpClient(max_per_host=2)
+
+def fetch_prices():
+    data = HTTP.get_json(PRICE_API)
+    return [{"timestamp": int(ms // 1000), "price": price} for ms, price in data["prices"]]
+
+def fetch_revenue():
+    data = HTTP.get_json(FEES_API)
+    return [{"timestamp": int(ts), "dailyFees": float(fees)} for ts, fees in data.get("totalDataChart") or []]
+
+def load_oi_history(path=OI_HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [{"date": d["date"], "total_oi": d["total_oi"]} for d in json.load(f)]
+
+def fetch_live_oi():
+    try:
+        snapshot = oi_engine.live_snapshot(HTTP.post_json(INFO_API, {"type": "metaAndAssetCtxs"}))
+    except Exception as e:
+        print(f"Live OI unavailable: {e}")
+        return None
+    return sum(snapshot.values())
+
+def day_of_timestamp(ts):
+    return int(ts) // 86400
+
+def day_of_date(date):
+    # 'YYYY-MM-DD' -> days since epoch
+    return (datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc) - EPOCH).days
+
+def date_of_day(day):
+    return (EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+
+def interpolate_gaps(values, days):
+    # Linear interpolation across interior gaps (None/0/NaN) with days as x,
+    # via one backward and one forward sweep; leading and trailing gaps stay
+    # None. Same arithmetic as interpolateGaps in src/timeline.js
+    vals = np.array([v if v else np.nan for v in values], dtype=np.float64)
+    days = np.asarray(days, dtype=np.int64)
+    n = len(vals)
+    valid = np.isfinite(vals)
+    idx = np.arange(n)
+    prev = np.maximum.accumulate(np.where(valid, idx, -1))
+    nxt = np.minimum.accumulate(np.where(valid, idx, n)[::-1])[::-1]
+    gap = ~valid & (prev >= 0) & (nxt < n)
+    p, q = prev[gap], nxt[gap]
+    step = (vals[q] - vals[p]) / (days[q] - days[p])
+    vals[gap] = vals[p] + step * (days[gap] - days[p])
+    return [v if np.isfinite(v) else None for v in vals.tolist()]
+
+def annualized_averages(values, timeframes):
+    # {tf: array}: mean of the last tf values * 365 from one prefix sum; the
+    # first tf-1 entries average over what is available. Same arithmetic as
+    # annualizedAverages in src/rolling.js
+    values = np.asarray(values, dtype=np.float64)
+    prefix = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(len(values))
+    series = {}
+    for tf in timeframes:
+        lo = np.where(idx >= tf, idx + 1 - tf, 0)
+        series[tf] = (prefix[idx + 1] - prefix[lo]) / (idx + 1 - lo) * 365
+    return series
+
+def add_moving_averages(rows, timeframes):
+    averages = annualized_averages([row["dailyFees"] for row in rows], timeframes)
+    for tf, series in averages.items():
+        for row, value in zip(rows, series.tolist()):
+            row[f"annualized{tf}d"] = value
+
+def merge(prices, revenue, oi_history, live_oi, timeframes, now=None):
+    # Port of getDashboardData: joinTimeline (src/timeline.js) + moving averages
+    if not revenue:
+        raise ValueError("No revenue data found")
+    now = time.time() if now is None else now
+    today = int(now) // 86400
+
+    base = sorted((r for r in revenue if r["dailyFees"] > 0), key=lambda r: r["timestamp"])
+    days = [day_of_timestamp(r["timestamp"]) for r in base]
+    price_by_day = {day_of_timestamp(p["timestamp"]): p["price"] for p in prices}
+    oi_by_day = {day_of_date(d["date"]): d["total_oi"] for d in oi_history}
+    if live_oi and not oi_by_day.get(today):
+        oi_by_day[today] = live_oi
+
+    rows = [{
+        "timestamp": r["timestamp"],
+        "date": date_of_day(day),
+        "dailyFees": r["dailyFees"],
+        "price": price_by_day.get(day) or None,
+        "openInterest": oi_by_day.get(day) or None,
+    } for r, day in zip(base, days)]
+
+    if live_oi and (not days or days[-1] != today):
+        days.append(today)
+        rows.append({
+            "timestamp": int(now),
+            "date": date_of_day(today),
+            "dailyFees": 0,
+            "price": price_by_day.get(today) or None,
+            "openInterest": live_oi,
+        })
+    elif live_oi:
+        rows[-1]["openInterest"] = live_oi
+
+    for row, value in zip(rows, interpolate_gaps([row["openInterest"] for row in rows], days)):
+        row["openInterest"] = value
+    add_moving_averages(rows, timeframes)
+    return rows
+
+def to_columns(rows, timeframes):
+    names = COLUMNS + [f"annualized{tf}d" for tf in timeframes]
+    return {name: [row[name] for row in rows] for name in names}
+
+def build(timeframes=TIMEFRAMES, live=True, output=OUTPUT_PATH):
+    # True when a new file was written
+    try:
+        prices = fetch_prices()
+        revenue = fetch_revenue()
+        oi_history = load_oi_history()
+        live_oi = fetch_live_oi() if live else None
+        print(f"{len(prices)} prices, {len(revenue)} revenue days, {len(oi_history)} OI days, "
+              f"live OI {'n/a' if live_oi is None else f'{live_oi / 1e9:.2f}B'}")
+        rows = merge(prices, revenue, oi_history, live_oi, timeframes)
+    except Exception as e:
+        print(f"Upstream data unavailable ({e}), keeping the previous {output}")
+        print(HTTP.stats_line())
+        return False
+
+    dashboard = {
+        "version": DASHBOARD_VERSION,
+        "generated": int(time.time()),
+        "timeframes": list(timeframes),
+        "rows": len(rows),
+        "columns": to_columns(rows, timeframes),
+    }
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dashboard, f, separators=(",", ":"))
+    os.replace(tmp_path, output)
+    print(f"Saved {len(rows)} rows to {output} ({os.path.getsize(output) / 1e3:.0f} KB)")
+    print(HTTP.stats_line())
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the pre-joined dashboard dataset")
+    parser.add_argument('--timeframes', default=",".join(map(str, TIMEFRAMES)),
+                        help="Comma-separated moving average windows in days")
+    parser.add_argument('--no-live', action='store_true', help="Skip the live OI snapshot")
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    build([int(tf) for tf in args.timeframes.split(",")], live=not args.no_live, output=args.output)
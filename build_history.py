@@ -1,135 +1,324 @@
 
-import boto3
 import os
-import lz4.frame
-import csv
-import io
 import json
+import argparse
+import tempfile
 from datetime import datetime, timedelta
 
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
-
-def build_full_history(start_date="20240101"):
-    print(f"Building full history from {start_date}...")
-    
-    # List all available files in asset_ctxs/ to avoid 404s
-    # Pagination needed if > 1000 files
-    available_files = set()
-    paginator = s3.get_paginator('list_objects_v2')
-    
-    print("Listing available archive files...")
-    for page in paginator.paginate(Bucket=BUCKET, Prefix="asset_ctxs/", RequestPayer='requester'):
-        if 'Contents' in page:
-            for obj in page['Contents']:
-                available_files.add(obj['Key'])
-                
-    print(f"Found {len(available_files)} daily files.")
-    
-    results = []
-    
-    # Iterate dates
-    current = datetime.strptime(start_date, "%Y%m%d")
-    end = datetime.utcnow()
-    
-    # Manual overrides for missing S3 data
-    manual_data = {
-        "2026-02-22": 4_440_000_000,
-        "2026-02-23": 4_320_000_000,
-        "2026-02-24": 4_360_000_000,
-        "2026-02-25": 4_480_000_000,
-        "2026-02-26": 4_520_000_000,
-        "2026-02-27": 4_290_000_000,
-        "2026-02-28": 4_490_000_000,
-    }
+import archive_client
+from archive_manifest import asset_ctxs_files
+from archive_pipeline import DEFAULT_FETCH_WORKERS, run_pipeline
+from asset_ctxs import stream_first_snapshot_oi, stream_intraday
+from archive_cache import CachedClient, cached_client
+from metrics import METRICS, add_arguments as add_metrics_arguments
+from series_bin import write_series
 
-    while current <= end:
-        date_str = current.strftime("%Y%m%d")
-        fmt_date = current.strftime("%Y-%m-%d")
-        
-        # Check manual overrides first
-        if fmt_date in manual_data:
-            print(f"Using manual data for {fmt_date}")
-            results.append({
-                "date": fmt_date,
-                "total_oi": manual_data[fmt_date]
-            })
-            current += timedelta(days=1)
-            continue
+OUTPUT_PATH = 'public/oi_history.json'
+# Intraday mode writes one JSON chunk per month plus an index the dashboard reads first
+INTRADAY_DIR = 'public/oi_intraday'
+# Opening OI per day recorded by oi_poller.py ({date: total}). Only the poller
+# writes it and only this script writes OUTPUT_PATH, merging these in for days
+# the archive hasn't published yet
+LIVE_DAYS_PATH = '.cache/oi_live_days.json'
+# Days already written to disk during an interrupted run (one JSON object per line)
+CHECKPOINT_PATH = '.cache/oi_history.checkpoint.jsonl'
+# The newest days in the output get refetched on every incremental run,
+# in case the archive published them late or re-uploaded them
+STALE_DAYS = 2
+
+# Manual overrides for missing S3 data
+MANUAL_DATA = {
+    "2026-02-22": 4_440_000_000,
+    "2026-02-23": 4_320_000_000,
+    "2026-02-24": 4_360_000_000,
+    "2026-02-25": 4_480_000_000,
+    "2026-02-26": 4_520_000_000,
+    "2026-02-27": 4_290_000_000,
+    "2026-02-28": 4_490_000_000,
+}
 
-        key = f"asset_ctxs/{date_str}.csv.lz4"
-        
-        if key in available_files:
-            print(f"Processing {date_str}...", end="\r")
+s3 = None
+
+def list_available_files():
+    # Daily files in asset_ctxs/ to avoid 404s, from the local manifest
+    # (only keys newer than the last run are listed from S3)
+    return {f['key'] for f in asset_ctxs_files(client=s3).values()}
+
+def fetch_day_oi(key):
+    # Decompress and parse while downloading; only the first snapshot
+    # block of the day is ever pulled off the wire
+    return METRICS.stream(archive_client.open_object(key, client=s3), stream_first_snapshot_oi)
+
+def load_history(path=OUTPUT_PATH):
+    # Existing output keyed by date; missing or corrupt file means a full rebuild
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return {row['date']: row for row in json.load(f)}
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring unreadable {path}: {e}")
+        return {}
+
+def load_live_days(path=LIVE_DAYS_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError as e:
+        print(f"Ignoring unreadable {path}: {e}")
+        return {}
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
+        return {}
+    done = {}
+    with open(path) as f:
+        for line in f:
             try:
-                # Download
-                resp = s3.get_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
-                data = lz4.frame.decompress(resp['Body'].read()).decode('utf-8')
-                
-                reader = csv.DictReader(io.StringIO(data))
-                
-                # We need a snapshot. The CSV contains *all* updates for the day? 
-                # Or snapshots every minute?
-                # The first row was 00:00:00Z.
-                # Let's take the *first* snapshot for each coin to represent the "start of day" OI.
-                
-                # Group by coin, take first occurrence (timestamp 00:00)
-                daily_oi_usd = 0
-                seen_coins = set()
-                
-                for row in reader:
-                    # Assuming file is sorted by time
-                    # We just sum the first occurrence of each coin
-                    coin = row['coin']
-                    
-                    # We want to capture the state at roughly the same time for all coins
-                    # The file seems to dump all coins at T1, then all at T2...
-                    # We only process the first timestamp block.
-                    
-                    # Optimization: Stop after first full sweep (roughly)
-                    # Or just use a set.
-                    
-                    if coin not in seen_coins:
-                        try:
-                            oi = float(row['open_interest'])
-                            price = float(row['mark_px'])
-                            daily_oi_usd += oi * price
-                            seen_coins.add(coin)
-                        except ValueError:
-                            continue
-                            
-                    # Heuristic: If we have > 100 coins, we probably have the full snapshot
-                    # Hyperliquid has ~150-200 assets now.
-                    # Safety break to avoid reading 100MB of CSV rows unnecessarily
-                    if len(seen_coins) > 250: 
-                        break
-                
-                results.append({
-                    "date": current.strftime("%Y-%m-%d"),
-                    "total_oi": daily_oi_usd
-                })
-                
-            except Exception as e:
-                print(f"\nError {date_str}: {e}")
-        
+                row = json.loads(line)
+                done[row['date']] = row
+            except (ValueError, KeyError):
+                # Half-written last line from a crash
+                continue
+    return done
+
+def save_history(results, path=OUTPUT_PATH, compact=False):
+    # Write to a temp file next to the target and rename over it,
+    # so the dashboard never sees a half-written file
+    out_dir = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix='.oi_history.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(results, f, separators=(',', ':') if compact else None)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def export_series(results):
+    # Same days as per-year binary chunks for the dashboard (series_bin.py)
+    return write_series('oi_history', [(row['date'], row.get('total_oi')) for row in results])
+
+def merge_days(existing, fetched, live):
+    # Freshly fetched days win over what was on disk; the poller's opening
+    # snapshot stands in until the archive has the day
+    merged = dict(existing)
+    merged.update(fetched)
+    for date, total_oi in live.items():
+        row = merged.get(date)
+        if row is None or not row.get('total_oi') or row.get('source') == 'live':
+            merged[date] = {'date': date, 'total_oi': total_oi, 'source': 'live'}
+    return merged
+
+def dates_to_fetch(existing, start, end, stale_days=STALE_DAYS):
+    # Every day in [start, end] that is missing from the output, plus the
+    # newest `stale_days` days we already have and days only oi_poller.py
+    # has filled in (source 'live') until the archive has them
+    stale = set(sorted(existing)[-stale_days:]) if stale_days > 0 else set()
+    current = start
+    while current <= end:
+        fmt_date = current.strftime("%Y-%m-%d")
+        row = existing.get(fmt_date)
+        if row is None or fmt_date in stale or not row.get('total_oi') or row.get('source') == 'live':
+            yield current
         current += timedelta(days=1)
-        
+
+def build_full_history(start_date="20240101", incremental=True, fetch_workers=DEFAULT_FETCH_WORKERS, use_cache=False):
+    global s3
+    print(f"Building {'incremental' if incremental else 'full'} history from {start_date}...")
+
+    existing = load_history() if incremental else {}
+    if not incremental and os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    # Resume from a previous interrupted run
+    checkpoint = load_checkpoint()
+    if checkpoint:
+        print(f"Resuming: {len(checkpoint)} days found in checkpoint.")
+
+    start = datetime.strptime(start_date, "%Y%m%d")
+    end = datetime.utcnow()
+    todo = [d for d in dates_to_fetch(existing, start, end)
+            if d.strftime("%Y-%m-%d") not in checkpoint]
+
+    keys = {}
+    manual = []
+    if todo:
+        # Size the connection pool to the number of fetch threads
+        s3 = archive_client.get_client(workers=fetch_workers)
+        # With the cache on, a miss downloads the whole day (not just the
+        # first snapshot) so later reprocessing never hits S3 again
+        if use_cache and not isinstance(s3, CachedClient):
+            s3 = cached_client(s3)
+        available_files = list_available_files()
+        for current in todo:
+            fmt_date = current.strftime("%Y-%m-%d")
+            # Manual overrides win over the archive
+            if fmt_date in MANUAL_DATA:
+                manual.append(fmt_date)
+                continue
+            key = archive_client.asset_ctxs_key(current)
+            if key in available_files:
+                keys[key] = fmt_date
+
+    # Only days the archive actually has (or manual data covers) count as work
+    missing = len(todo) - len(keys) - len(manual)
+    print(f"{len(existing)} days on disk, {len(keys)} days to fetch"
+          + (f", {len(manual)} from manual data" if manual else "")
+          + (f" ({missing} candidate days not in the archive)." if missing else "."))
+
+    if keys or manual:
+        os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+
+        with open(CHECKPOINT_PATH, 'a') as ckpt:
+            def save_day(row):
+                checkpoint[row['date']] = row
+                ckpt.write(json.dumps(row) + "\n")
+                ckpt.flush()
+
+            for fmt_date in manual:
+                print(f"Using manual data for {fmt_date}")
+                save_day({"date": fmt_date, "total_oi": MANUAL_DATA[fmt_date]})
+
+            results = run_pipeline(keys, fetch_day_oi, fetch_workers=fetch_workers)
+            for key, total_oi, error in results:
+                date_str = keys[key].replace("-", "")
+                if error is not None:
+                    print(f"\nError {date_str}: {error}")
+                    METRICS.error(key, error)
+                    continue
+                print(f"Processing {date_str}...", end="\r")
+                save_day({"date": keys[key], "total_oi": total_oi})
+                METRICS.count('days_fetched')
+
     print("\nComplete.")
-    
-    # Save to file
-    with open('public/oi_history.json', 'w') as f:
-        json.dump(results, f)
-        
-    print(f"Saved {len(results)} days to public/oi_history.json")
+    if isinstance(s3, CachedClient):
+        s3.close()
+        print(s3.cache.stats_line())
+
+    merged = merge_days(existing, checkpoint, load_live_days())
+    results = [merged[d] for d in sorted(merged) if d >= start.strftime("%Y-%m-%d")]
+
+    save_history(results)
+    export_series(results)
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    print(f"Saved {len(results)} days to {OUTPUT_PATH}")
+
+def fetch_day_intraday(key, interval_s):
+    return METRICS.stream(archive_client.open_object(key, client=s3), lambda body: stream_intraday(body, interval_s))
+
+def load_intraday_chunk(month, interval_s):
+    # Existing month chunk as {bin start: (total, {coin: oi})}; dropped if it
+    # was built with a different interval
+    path = os.path.join(INTRADAY_DIR, f"{month}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        chunk = json.load(f)
+    if chunk.get('interval') != interval_s:
+        print(f"Rebuilding {path}: interval changed from {chunk.get('interval')}s to {interval_s}s")
+        return {}
+    points = {}
+    for i, t in enumerate(chunk['t']):
+        coins = {c: v[i] for c, v in chunk['by_coin'].items() if v[i] is not None}
+        points[t] = (chunk['total'][i], coins)
+    return points
+
+def save_intraday_chunk(month, interval_s, points):
+    # Columnar layout: one shared time axis, totals and per-coin arrays aligned
+    # to it (null where a coin was not listed yet); whole dollars keep it small
+    times = sorted(points)
+    coins = sorted({c for _, per_coin in points.values() for c in per_coin})
+    chunk = {
+        'interval': interval_s,
+        't': times,
+        'total': [round(points[t][0]) for t in times],
+        'by_coin': {c: [round(points[t][1][c]) if c in points[t][1] else None for t in times] for c in coins},
+    }
+    save_history(chunk, os.path.join(INTRADAY_DIR, f"{month}.json"), compact=True)
+    return {'month': month, 'file': f"{month}.json", 'start': times[0], 'end': times[-1], 'points': len(times)}
+
+def save_intraday_index(interval_s):
+    index = []
+    for name in sorted(os.listdir(INTRADAY_DIR)):
+        if not name.endswith('.json') or name == 'index.json':
+            continue
+        with open(os.path.join(INTRADAY_DIR, name)) as f:
+            chunk = json.load(f)
+        if chunk.get('interval') == interval_s and chunk['t']:
+            index.append({'month': name[:-5], 'file': name, 'start': chunk['t'][0],
+                          'end': chunk['t'][-1], 'points': len(chunk['t'])})
+    save_history({'interval': interval_s, 'chunks': index}, os.path.join(INTRADAY_DIR, 'index.json'), compact=True)
+
+def build_intraday(start_date, end_date, interval_min=60, fetch_workers=DEFAULT_FETCH_WORKERS, use_cache=False):
+    # Sampled OI every interval_min minutes, total and per coin, for every
+    # archive day in [start_date, end_date]. Each day is one streaming pass;
+    # results are merged month by month into INTRADAY_DIR.
+    global s3
+    interval_s = interval_min * 60
+    print(f"Building {interval_min}-minute intraday OI from {start_date} to {end_date}...")
+
+    s3 = archive_client.get_client(workers=fetch_workers)
+    if use_cache and not isinstance(s3, CachedClient):
+        s3 = cached_client(s3)
+    files = asset_ctxs_files(start_date, end_date, client=s3)
+    os.makedirs(INTRADAY_DIR, exist_ok=True)
+
+    month = None
+    points = {}
+    results = run_pipeline([f['key'] for f in files.values()],
+                           lambda key: fetch_day_intraday(key, interval_s), fetch_workers=fetch_workers)
+    for key, series, error in results:
+        date = archive_client.asset_ctxs_date(key)
+        if error is not None:
+            print(f"\nError {date}: {error}")
+            METRICS.error(key, error)
+            continue
+        print(f"Processing {date}...", end="\r")
+        METRICS.count('days_fetched')
+
+        # Days arrive in order, so each month chunk is loaded and saved once
+        if date[:7] != month:
+            if points:
+                save_intraday_chunk(month, interval_s, points)
+            month = date[:7]
+            points = load_intraday_chunk(month, interval_s)
+        for bin_start, entry in series:
+            points[bin_start] = (entry['total'], entry['coins'])
+
+    if points:
+        save_intraday_chunk(month, interval_s, points)
+    save_intraday_index(interval_s)
+    if isinstance(s3, CachedClient):
+        s3.close()
+    print(f"\nSaved intraday series to {INTRADAY_DIR}/")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build public/oi_history.json from the Hyperliquid archive")
+    parser.add_argument('--start', default="20230520", help="First date, YYYYMMDD") # Earliest file we saw
+    parser.add_argument('--full', action='store_true', help="Ignore existing output and rebuild every day")
+    parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS, help="Concurrent S3 downloads")
+    parser.add_argument('--cache', action='store_true', help="Keep downloaded days in the local archive cache")
+    parser.add_argument('--intraday', action='store_true', help=f"Write sampled intraday OI to {INTRADAY_DIR}/")
+    parser.add_argument('--end', default=None, help="Last date for --intraday, YYYYMMDD (default: today)")
+    parser.add_argument('--interval', type=int, default=60, help="Sampling interval for --intraday, minutes")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
     # Ensure output dir exists
     os.makedirs('public', exist_ok=True)
-    build_full_history(start_date="20230520") # Earliest file we saw
+    try:
+        if args.intraday:
+            build_intraday(args.start, args.end or datetime.utcnow().strftime("%Y%m%d"),
+                           interval_min=args.interval, fetch_workers=args.workers, use_cache=args.cache)
+        else:
+            build_full_history(start_date=args.start, incremental=not args.full, fetch_workers=args.workers,
+                               use_cache=args.cache)
+    finally:
+        # Written for failed runs too, that is when they are most useful
+        print(METRICS.summary_line())
+        print(f"Metrics saved to {METRICS.write(args.metrics, args.prometheus)}")
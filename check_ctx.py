@@ -1,32 +1,19 @@
 
-import boto3
-import os
 import lz4.frame
 import json
-from datetime import datetime, timedelta
-
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def check_asset_ctxs():
     # We found l2Book, but do we have assetCtxs?
     # Trying same date/hour but different file
-    date_str = "20250101"
-    key = f"market_data/{date_str}/0/assetCtxs.lz4"
+    key = archive_client.market_data_key("20250101", 0, "assetCtxs")
     
     print(f"Checking for {key}...")
     try:
-        response = s3.get_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
+        raw = archive_client.fetch_object(key)
         print("Found assetCtxs! Decompressing...")
         
-        data = lz4.frame.decompress(response['Body'].read())
+        data = lz4.frame.decompress(raw)
         json_data = json.loads(data)
         
         if isinstance(json_data, list) and len(json_data) > 0:
@@ -1,19 +1,5 @@
 
-import boto3
-import os
-import lz4.frame
-import json
-from datetime import datetime, timedelta
-
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def fetch_total_oi_for_hour(date_str, hour=0):
     # Since we only have l2Book, we might not have global state (assetCtxs) in the hourly folder.
@@ -28,7 +14,7 @@ def fetch_total_oi_for_hour(date_str, hour=0):
     # Let's check "market_data/20250101/" non-recursively to see if there are daily files.
     print(f"Checking daily root for {date_str}...")
     try:
-        response = s3.list_objects_v2(Bucket=BUCKET, Prefix=f"market_data/{date_str}/", Delimiter="/", RequestPayer='requester')
+        response = archive_client.list_page(archive_client.market_data_prefix(date_str), delimiter="/")
         if 'Contents' in response:
             for obj in response['Contents']:
                 print(f"File in daily root: {obj['Key']}")
@@ -1,15 +1,9 @@
-import boto3
-from botocore import UNSIGNED
-from botocore.config import Config
-import lz4.frame
-import json
-import os
 from datetime import datetime, timedelta
-
-BUCKET = "hyperliquid-archive"
-S3_CLIENT = boto3.client('s3', config=Config(signature_version=UNSIGNED))
+import archive_client
 
 def get_latest_data(asset):
+    s3 = archive_client.get_client(unsigned=True)
+
     # Try to find recent data. We'll check yesterday's date.
     yesterday = (datetime.utcnow() - timedelta(days=1)).strftime('%Y%m%d')
     
@@ -20,7 +14,8 @@ def get_latest_data(asset):
     # Actually, the user script referenced 'l2Book'. 
     # Let's list objects in the bucket to see what's available.
     try:
-        response = S3_CLIENT.list_objects_v2(Bucket=BUCKET, Prefix=f"market_data/{yesterday}/", MaxKeys=20)
+        prefix = archive_client.market_data_prefix(yesterday)
+        response = s3.list_objects_v2(Bucket=archive_client.BUCKET, Prefix=prefix, MaxKeys=20)
         if 'Contents' in response:
             print(f"Found data for {yesterday}:")
             for obj in response['Contents']:
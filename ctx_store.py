@@ -0,0 +1,133 @@
+
+import io
+import os
+import argparse
+import lz4.frame
+import tempfile
+from datetime import datetime, timedelta
+
+import archive_client
+from archive_manifest import asset_ctxs_files
+from archive_pipeline import DEFAULT_FETCH_WORKERS, DEFAULT_DECODE_WORKERS, run_pipeline
+from metrics import METRICS, add_arguments as add_metrics_arguments
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # only needed by this stage; the rest of the tooling runs without it
+    pa = None
+
+# Local columnar copy of the asset_ctxs/ archive.
+#
+# Each archive day becomes one Parquet file holding every (time, coin) row of
+# that day, laid out as STORE_DIR/month=YYYY-MM/YYYYMMDD.parquet. New metrics
+# (OI per coin, funding, volume...) are then scans over local files instead
+# of another pass over the requester-pays bucket.
+
+STORE_DIR = 'data/asset_ctxs'
+
+# Every numeric column is stored as float64 so days with empty or integral
+# values still share one schema
+FLOAT_COLUMNS = [
+    'funding', 'open_interest', 'prev_day_px', 'day_ntl_vlm', 'premium',
+    'oracle_px', 'mark_px', 'mid_px', 'impact_bid_px', 'impact_ask_px',
+]
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("ctx_store needs pyarrow: pip install pyarrow")
+
+def day_path(day, store_dir=STORE_DIR):
+    day = archive_client.asset_ctxs_key(day)[len("asset_ctxs/"):-len(".csv.lz4")]
+    return os.path.join(store_dir, f"month={day[:4]}-{day[4:6]}", f"{day}.parquet")
+
+def parse_day(raw):
+    # Compressed CSV bytes -> pyarrow Table with a fixed schema
+    _require_pyarrow()
+    column_types = {name: pa.float64() for name in FLOAT_COLUMNS}
+    column_types['time'] = pa.timestamp('ms', tz='UTC')
+    column_types['coin'] = pa.dictionary(pa.int32(), pa.string())
+    with lz4.frame.LZ4FrameFile(io.BytesIO(raw), 'rb') as f:
+        return pa_csv.read_csv(f, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+
+def write_day(item):
+    # Runs in a pipeline worker process: parse and write one day, return row count
+    path, raw = item
+    table = parse_day(raw)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return table.num_rows
+
+def extract(start, end, store_dir=STORE_DIR, overwrite=False,
+            fetch_workers=DEFAULT_FETCH_WORKERS, decode_workers=DEFAULT_DECODE_WORKERS):
+    _require_pyarrow()
+    client = archive_client.get_client(workers=fetch_workers)
+
+    todo = []
+    for date, entry in asset_ctxs_files(start, end, client=client).items():
+        path = day_path(date, store_dir)
+        if overwrite or not os.path.exists(path):
+            todo.append((entry['key'], path))
+    print(f"{len(todo)} days to extract into {store_dir}.")
+
+    def fetch(item):
+        key, path = item
+        return path, archive_client.fetch_object(key, client=client)
+
+    rows = 0
+    results = run_pipeline(todo, fetch, write_day, fetch_workers=fetch_workers, decode_workers=decode_workers,
+                           decode_stage='decode')
+    for (key, _), n, error in results:
+        if error is not None:
+            print(f"\nError {key}: {error}")
+            METRICS.error(key, error)
+            continue
+        rows += n
+        METRICS.count('rows', n)
+        print(f"Extracted {key} ({n} rows)...", end="\r")
+    print(f"\nDone. {rows} rows written.")
+
+def open_store(store_dir=STORE_DIR):
+    # Dataset over the whole store; month=... directories become a column
+    _require_pyarrow()
+    return ds.dataset(store_dir, format='parquet', partitioning='hive')
+
+def read_range(start, end, columns=None, store_dir=STORE_DIR):
+    # Rows with start <= day <= end (dates as YYYY-MM-DD or YYYYMMDD)
+    dataset = open_store(store_dir)
+    lo = datetime.strptime(start.replace("-", ""), "%Y%m%d")
+    hi = datetime.strptime(end.replace("-", ""), "%Y%m%d") + timedelta(days=1)
+    months = sorted({f"{d.year:04d}-{d.month:02d}" for d in (lo, hi - timedelta(days=1))})
+    ts = ds.field('time')
+    flt = ((ds.field('month') >= months[0]) & (ds.field('month') <= months[-1])
+           & (ts >= pa.scalar(lo, pa.timestamp('ms', tz='UTC')))
+           & (ts < pa.scalar(hi, pa.timestamp('ms', tz='UTC'))))
+    return dataset.to_table(columns=columns, filter=flt)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract asset_ctxs/ archive days into a local Parquet store")
+    parser.add_argument('--start', default="20230520", help="First date, YYYYMMDD")
+    parser.add_argument('--end', default=datetime.utcnow().strftime("%Y%m%d"), help="Last date, YYYYMMDD")
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--overwrite', action='store_true', help="Re-extract days already in the store")
+    parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS, help="Concurrent S3 downloads")
+    parser.add_argument('--decode-workers', type=int, default=DEFAULT_DECODE_WORKERS,
+                        help="Processes parsing and writing Parquet")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        extract(args.start, args.end, store_dir=args.store, overwrite=args.overwrite,
+                fetch_workers=args.workers, decode_workers=args.decode_workers)
+    finally:
+        print(METRICS.summary_line())
+        print(f"Metrics saved to {METRICS.write(args.metrics, args.prometheus)}")
@@ -1,18 +1,5 @@
 
-import boto3
-import os
-from botocore.config import Config
-from datetime import datetime, timedelta
-
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def list_files():
     # Try to find *any* file to understand the structure
@@ -20,11 +7,11 @@ def list_files():
     # The error "NoSuchKey" suggests 20260226 might not be uploaded yet (monthly uploads?)
     
     # Let's check 2025-01-01
-    prefix = "market_data/20250101/"
+    prefix = archive_client.market_data_prefix("20250101")
     print(f"Listing {prefix}...")
     
     try:
-        response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix, RequestPayer='requester', MaxKeys=20)
+        response = archive_client.list_page(prefix, max_keys=20)
         if 'Contents' in response:
             for obj in response['Contents']:
                 print(obj['Key'])
@@ -33,7 +20,7 @@ def list_files():
             
             # Try exploring root "market_data"
             print("Listing root market_data/...")
-            response = s3.list_objects_v2(Bucket=BUCKET, Prefix="market_data/", Delimiter="/", RequestPayer='requester', MaxKeys=20)
+            response = archive_client.list_page("market_data/", delimiter="/", max_keys=20)
             if 'CommonPrefixes' in response:
                 print("Found date folders:")
                 for p in response['CommonPrefixes']:
@@ -0,0 +1,202 @@
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from http_client import HttpClient
+
+# Local stand-in for functions/api/[source].js: serves /api/<source> with
+# the same ETag, Cache-Control and stale-while-revalidate behaviour, so the
+# frontend (and anything else) can run against it without Cloudflare.
+#
+# - fresh (age < ttl): served from memory
+# - stale (age < ttl + swr): served from memory, one background refresh
+# - miss: concurrent callers wait on a single upstream request
+# - upstream down (age < ttl + swr + sie): the old entry is served with a
+#   Warning header (stale-if-error); 502 only when there is nothing to serve
+# - a scheduler thread refreshes every source before its ttl runs out
+#
+# Upstream URLs can be pointed at mocks with <SOURCE>_UPSTREAM_URL
+# (PRICES_UPSTREAM_URL, FEES_UPSTREAM_URL, LIVE_OI_UPSTREAM_URL).
+
+SOURCES = {
+    'prices': {
+        'url': "https://api.coingecko.com/api/v3/coins/hyperliquid/market_chart?vs_currency=usd&days=365&interval=daily",
+        'ttl': 600, 'swr': 3600, 'sie': 86400,
+    },
+    'fees': {
+        'url': "https://api.llama.fi/summary/fees/hyperliquid?dataType=dailyFees",
+        'ttl': 900, 'swr': 3600, 'sie': 86400,
+    },
+    'live-oi': {
+        'url': "https://api.hyperliquid.xyz/info",
+        'method': 'POST', 'body': {"type": "metaAndAssetCtxs"},
+        'ttl': 30, 'swr': 120, 'sie': 3600,
+    },
+}
+
+for _name, _source in SOURCES.items():
+    _source['url'] = os.environ.get(f"{_name.upper().replace('-', '_')}_UPSTREAM_URL", _source['url'])
+
+class EdgeCache:
+    def __init__(self, sources=SOURCES, client=None):
+        self.sources = sources
+        self.client = client or HttpClient(max_per_host=2)
+        self.entries = {}  # name -> {'body', 'etag', 'fetched_at'}
+        self.locks = {name: threading.Lock() for name in sources}
+        self.upstream_requests = {name: 0 for name in sources}
+
+    def _fetch(self, name):
+        source = self.sources[name]
+        body = json.dumps(source['body']).encode() if 'body' in source else None
+        headers = {'Content-Type': 'application/json'} if body else None
+        _, _, data = self.client.request(source.get('method', 'GET'), source['url'], headers, body)
+        self.upstream_requests[name] += 1
+        entry = {'body': data, 'etag': f'"{hashlib.sha1(data).hexdigest()}"', 'fetched_at': time.time()}
+        self.entries[name] = entry
+        return entry
+
+    def refresh(self, name, min_age=0):
+        # Only one upstream request per source at a time; callers that queued
+        # behind it reuse its result instead of fetching again
+        with self.locks[name]:
+            entry = self.entries.get(name)
+            if entry and time.time() - entry['fetched_at'] < min_age:
+                return entry
+            return self._fetch(name)
+
+    def _refresh_in_background(self, name):
+        def run():
+            try:
+                self._fetch(name)
+            except Exception as e:
+                print(f"Refreshing {name}: {e}")
+            finally:
+                self.locks[name].release()
+        # Skip if a refresh is already running
+        if self.locks[name].acquire(blocking=False):
+            threading.Thread(target=run, daemon=True).start()
+
+    def get(self, name):
+        # (entry, 'HIT' | 'STALE' | 'MISS' | 'STALE-IF-ERROR')
+        source = self.sources[name]
+        entry = self.entries.get(name)
+        if entry:
+            age = time.time() - entry['fetched_at']
+            if age < source['ttl']:
+                return entry, 'HIT'
+            if age < source['ttl'] + source['swr']:
+                self._refresh_in_background(name)
+                return entry, 'STALE'
+        try:
+            return self.refresh(name, min_age=source['ttl']), 'MISS'
+        except Exception as e:
+            # Upstream is down: an old answer beats a 502
+            if entry and time.time() - entry['fetched_at'] < source['ttl'] + source['swr'] + source.get('sie', 0):
+                print(f"Serving stale {name} after upstream error: {e}")
+                return entry, 'STALE-IF-ERROR'
+            raise
+
+    def run_scheduler(self, stop, margin=0.8):
+        # Refresh each source once it is margin * ttl old, so visitors mostly see HITs
+        while not stop.is_set():
+            now = time.time()
+            wait = 60.0
+            for name, source in self.sources.items():
+                entry = self.entries.get(name)
+                due = (entry['fetched_at'] if entry else 0) + source['ttl'] * margin
+                if now >= due:
+                    try:
+                        self.refresh(name)
+                    except Exception as e:
+                        print(f"Scheduled refresh of {name} failed: {e}")
+                    due = time.time() + source['ttl'] * margin
+                wait = min(wait, max(1.0, due - now))
+            stop.wait(wait)
+
+    def stats(self):
+        stats = {}
+        for name in self.sources:
+            entry = self.entries.get(name)
+            stats[name] = {
+                'upstream_requests': self.upstream_requests[name],
+                'age_s': round(time.time() - entry['fetched_at'], 1) if entry else None,
+            }
+        return stats
+
+def make_handler(cache):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b'', headers=None):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/api/_stats':
+                self._send(200, json.dumps(cache.stats()).encode(), {'Content-Type': 'application/json'})
+                return
+            name = path[len('/api/'):] if path.startswith('/api/') else None
+            if name not in cache.sources:
+                self._send(404, b'Unknown source')
+                return
+            try:
+                entry, status = cache.get(name)
+            except Exception as e:
+                self._send(502, f"Upstream {name} unavailable: {e}".encode())
+                return
+
+            source = cache.sources[name]
+            headers = {
+                'Content-Type': 'application/json',
+                'Cache-Control': (f"public, max-age={source['ttl']}, stale-while-revalidate={source['swr']}, "
+                                  f"stale-if-error={source.get('sie', 0)}"),
+                'ETag': entry['etag'],
+                'Age': str(int(time.time() - entry['fetched_at'])),
+                'X-Cache': status,
+            }
+            if status == 'STALE-IF-ERROR':
+                headers['Warning'] = '111 - "Revalidation Failed"'
+            if self.headers.get('If-None-Match') == entry['etag']:
+                self._send(304, b'', headers)
+            else:
+                self._send(200, entry['body'], headers)
+
+    return Handler
+
+def serve(host='127.0.0.1', port=8788, schedule=True):
+    cache = EdgeCache()
+    server = ThreadingHTTPServer((host, port), make_handler(cache))
+    stop = threading.Event()
+    if schedule:
+        threading.Thread(target=cache.run_scheduler, args=(stop,), daemon=True).start()
+    return server, cache, stop
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the /api edge cache")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8788)
+    parser.add_argument('--no-schedule', action='store_true', help="Only fetch on demand")
+    args = parser.parse_args()
+
+    server, cache, stop = serve(args.host, args.port, schedule=not args.no_schedule)
+    print(f"Serving /api/{{{','.join(SOURCES)}}} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
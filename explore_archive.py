@@ -1,20 +1,18 @@
 
-import boto3
-from botocore import UNSIGNED
-from botocore.config import Config
 from datetime import datetime, timedelta
 import os
+import archive_client
 
-# Configure S3 client for public bucket access
-s3 = boto3.client('s3', config=Config(signature_version=UNSIGNED))
-BUCKET = "hyperliquid-archive"
+BUCKET = archive_client.BUCKET
 
 def check_bucket_structure():
+    # Configure S3 client for public bucket access
+    s3 = archive_client.get_client(unsigned=True)
     print("Checking bucket structure...")
     
     # Check for a recent date to see what's available
     yesterday = (datetime.utcnow() - timedelta(days=1)).strftime('%Y%m%d')
-    prefix = f"market_data/{yesterday}/"
+    prefix = archive_client.market_data_prefix(yesterday)
     
     try:
         response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix, MaxKeys=50)
@@ -22,7 +20,7 @@ def check_bucket_structure():
         if 'Contents' not in response:
             print(f"No data found for prefix: {prefix}")
             # Try an older date just in case
-            prefix = "market_data/20240101/"
+            prefix = archive_client.market_data_prefix("20240101")
             response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix, MaxKeys=50)
         
         if 'Contents' in response:
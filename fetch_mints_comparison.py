@@ -1,10 +1,14 @@
-import urllib.request
+import asyncio
+import bisect
 import json
 import datetime
 import time
 import os
 import sys
 
+import mint_ledger
+from http_client import HttpClient
+
 USDT_ETH_CONTRACT = "0xdac17f958d2ee523a2206206994597c13d831ec7"
 ETH_TETHER_MULTISIG = "0xc6cde7c39eb2f0f0095f41570af89efc2c1ea828"
 
@@ -13,7 +17,37 @@ TRON_TETHER_MULTISIG = "TBPxhVAsuzoFnKyXtc1o2UySEydPHgATto"
 TRON_TREASURY = "TKHuVq1oKVruCGLvqVexFs6dawKv6fQgFs"
 
 START_DATE = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
-MINT_THRESHOLD = 800_000_000 
+# Cutoff for the public tether_mints_*.json files. Fetchers keep every mint
+# regardless, so other cutoffs are just another query over the ledger
+MINT_THRESHOLD = 800_000_000
+# Thresholds precomputed in tether_mints_rollup.json (daily/weekly/monthly)
+ROLLUP_THRESHOLDS = [100_000_000, 500_000_000, 800_000_000, 1_000_000_000]
+
+# Overridable so the fetchers can run against a local mock server
+ETHERSCAN_API = os.environ.get("ETHERSCAN_API_URL", "https://api.etherscan.io/v2/api")
+TRONSCAN_API = os.environ.get("TRONSCAN_API_URL", "https://apilist.tronscanapi.com/api/filter/trc20/transfers")
+DEFILLAMA_API = os.environ.get("DEFILLAMA_API_URL", "https://stablecoins.llama.fi/stablecoincharts/all")
+# Path to a saved stablecoincharts response (e.g. tests/fixtures/stablecoincharts_usdt.json);
+# when set it is read instead of calling DefiLlama
+DEFILLAMA_FIXTURE = os.environ.get("DEFILLAMA_FIXTURE")
+
+# Requests per second per explorer (Etherscan free tier allows 5/s)
+ETHERSCAN_RATE = 4
+TRONSCAN_RATE = 2
+
+# Etherscan returns at most page * offset <= 10,000 rows for one query; a
+# backfill block range that comes back full is split in two and re-queried
+ETHERSCAN_MAX_RESULTS = 10_000
+BACKFILL_RANGES = 16
+
+# One client for every fetch so connections are reused across pages and chains;
+# the explorers are paced by TokenBucket, this only caps requests in flight per host
+HTTP = HttpClient(max_per_host=4)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Newest block/timestamp seen per chain, so later runs only page back to the
+# previous run's newest transfer; the mints themselves live in mint_ledger
+STATE_PATH = os.path.join(BASE_DIR, ".cache", "mints_state.json")
 
 def load_env():
     env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
@@ -26,36 +60,80 @@ def load_env():
             os.environ.setdefault(key.strip(), val.strip())
 
 def api_get(url, headers=None):
-    hdrs = {"User-Agent": "Mozilla/5.0"}
-    if headers: hdrs.update(headers)
-    req = urllib.request.Request(url, headers=hdrs)
-    for attempt in range(5):
-        try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                return json.loads(resp.read())
-        except Exception as e:
-            if attempt < 4:
-                wait = 2 ** attempt
-                print(f"  ⚠️ Request failed ({e}), retrying in {wait}s...")
-                time.sleep(wait)
-            else: raise
+    # Pooled keep-alive connections, gzip and Retry-After-aware retries live in http_client
+    return HTTP.get_json(url, headers)
+
+class TokenBucket:
+    # Allows `rate` requests per second on average with bursts of `burst`;
+    # callers await acquire() before each request instead of sleeping a fixed time
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def fetch_json(url, limiter, headers=None):
+    # Blocking api_get on a worker thread, so both chains page concurrently
+    await limiter.acquire()
+    return await asyncio.to_thread(api_get, url, headers)
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {"cursors": {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f: json.dump(state, f)
+    os.replace(tmp_path, path)
 
 def ts_to_date(ts):
     return datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc).strftime("%Y-%m-%d")
 
-def fetch_ethereum_mints(api_key):
+def eth_mint(tx):
+    # Etherscan tokentx row -> mint record, or None if it is not a mint
+    if tx["from"].lower() != ETH_TETHER_MULTISIG.lower(): return None
+    amount_usd = int(tx["value"]) / 1e6
+    if amount_usd <= 0: return None
+    ts = int(tx["timeStamp"])
+    return {
+        "timestamp": ts, 
+        "date": ts_to_date(ts), 
+        "amount": amount_usd, 
+        "chain": "ethereum", 
+        "tx": tx["hash"],
+        "log_index": int(tx["logIndex"])
+    }
+
+async def fetch_ethereum_mints(api_key, limiter, cursor=None):
+    # cursor: {"timestamp", "block"} of the newest transfer from the last run
     print("\n🔷 Fetching Ethereum USDT mints from Etherscan V2...")
     mints = []
     page = 1
     offset = 100
     start_ts = int(START_DATE.timestamp())
+    newest = dict(cursor) if cursor else None
+    start_block = f"&startblock={cursor['block']}" if cursor else ""
 
     while True:
-        url = (f"https://api.etherscan.io/v2/api?chainid=1&module=account&action=tokentx"
+        url = (f"{ETHERSCAN_API}?chainid=1&module=account&action=tokentx"
                f"&contractaddress={USDT_ETH_CONTRACT}&address={ETH_TETHER_MULTISIG}"
-               f"&page={page}&offset={offset}&sort=desc&apikey={api_key}")
-        time.sleep(0.25)
-        data = api_get(url)
+               f"&page={page}&offset={offset}&sort=desc{start_block}&apikey={api_key}")
+        data = await fetch_json(url, limiter)
 
         if data.get("status") != "1" or not data.get("result"):
             break
@@ -65,43 +143,108 @@ def fetch_ethereum_mints(api_key):
 
         for tx in txs:
             ts = int(tx["timeStamp"])
-            if ts < start_ts:
+            if ts < start_ts or (cursor and ts < cursor["timestamp"]):
                 hit_date_limit = True
                 break
+            if newest is None or ts > newest["timestamp"]:
+                newest = {"timestamp": ts, "block": int(tx["blockNumber"])}
             
-            if tx["from"].lower() == ETH_TETHER_MULTISIG.lower():
-                amount_usd = int(tx["value"]) / 1e6
-                if amount_usd >= MINT_THRESHOLD:
-                    mints.append({
-                        "timestamp": ts, 
-                        "date": ts_to_date(ts), 
-                        "amount": amount_usd, 
-                        "chain": "ethereum", 
-                        "tx": tx["hash"]
-                    })
+            mint = eth_mint(tx)
+            if mint: mints.append(mint)
         
         print(f"  📦 Page {page}: {len(txs)} transfers, {len(mints)} mints found...")
         if hit_date_limit or len(txs) < offset:
             break
         page += 1
 
-    print(f"  ✅ Total Ethereum mint events: {len(mints)}")
-    return mints
+    print(f"  ✅ New Ethereum mint events: {len(mints)}")
+    return mints, newest
+
+async def etherscan_block_at(api_key, limiter, ts, closest="after"):
+    url = (f"{ETHERSCAN_API}?chainid=1&module=block&action=getblocknobytime"
+           f"&timestamp={ts}&closest={closest}&apikey={api_key}")
+    data = await fetch_json(url, limiter)
+    if data.get("status") != "1":
+        raise RuntimeError(f"getblocknobytime failed: {data.get('message')} {data.get('result')}")
+    return int(data["result"])
+
+async def etherscan_range(api_key, limiter, start_block, end_block):
+    # Every transfer in [start_block, end_block], splitting the range until
+    # no single query hits the result cap
+    url = (f"{ETHERSCAN_API}?chainid=1&module=account&action=tokentx"
+           f"&contractaddress={USDT_ETH_CONTRACT}&address={ETH_TETHER_MULTISIG}"
+           f"&startblock={start_block}&endblock={end_block}"
+           f"&page=1&offset={ETHERSCAN_MAX_RESULTS}&sort=asc&apikey={api_key}")
+    data = await fetch_json(url, limiter)
+    txs = data.get("result")
+    if data.get("status") != "1":
+        # Empty ranges come back as status 0 with an empty list; errors carry a string
+        if txs == [] or "no transactions" in str(data.get("message", "")).lower(): return []
+        raise RuntimeError(f"tokentx {start_block}-{end_block} failed: {data.get('message')} {data.get('result')}")
+    if not isinstance(txs, list):
+        raise RuntimeError(f"tokentx {start_block}-{end_block}: unexpected result {txs!r}")
+
+    if len(txs) >= ETHERSCAN_MAX_RESULTS:
+        if start_block == end_block:
+            print(f"  ⚠️ Block {start_block} alone has {len(txs)}+ transfers, keeping the first page")
+            return txs
+        mid = (start_block + end_block) // 2
+        left, right = await asyncio.gather(
+            etherscan_range(api_key, limiter, start_block, mid),
+            etherscan_range(api_key, limiter, mid + 1, end_block))
+        return left + right
+
+    print(f"  📦 Blocks {start_block}-{end_block}: {len(txs)} transfers")
+    return txs
 
-def fetch_tron_mints(api_key):
+async def backfill_ethereum_mints(api_key, limiter, ranges=BACKFILL_RANGES):
+    # Full history without deep paging: split START_DATE..now into block
+    # ranges, scan them concurrently (the limiter bounds the request rate)
+    # and dedupe by (tx hash, log index)
+    print("\n🔷 Backfilling Ethereum USDT mints from Etherscan V2 by block range...")
+    first = await etherscan_block_at(api_key, limiter, int(START_DATE.timestamp()), "after")
+    last = await etherscan_block_at(api_key, limiter, int(time.time()), "before")
+
+    step = max(1, (last - first + 1) // ranges)
+    bounds = [(lo, min(lo + step - 1, last)) for lo in range(first, last + 1, step)]
+    chunks = await asyncio.gather(*(etherscan_range(api_key, limiter, lo, hi) for lo, hi in bounds))
+
+    by_hash = {}
+    for txs in chunks:
+        for tx in txs:
+            by_hash[(tx["hash"], tx.get("logIndex"))] = tx
+    mints = {}
+    newest = None
+    for tx in by_hash.values():
+        ts = int(tx["timeStamp"])
+        if newest is None or ts > newest["timestamp"]:
+            newest = {"timestamp": ts, "block": int(tx["blockNumber"])}
+        mint = eth_mint(tx)
+        # A tx can carry several mint transfers, each with its own log index
+        if mint: mints[(mint["tx"], mint["log_index"])] = mint
+
+    print(f"  ✅ Ethereum mint events: {len(mints)} from {len(by_hash)} transfers")
+    return sorted(mints.values(), key=lambda m: m["timestamp"]), newest
+
+async def fetch_tron_mints(api_key, limiter, cursor=None):
+    # cursor: {"timestamp"} (seconds) of the newest transfer from the last run
     print("\n🔴 Fetching Tron USDT mints from Tronscan...")
     mints = []
     start = 0
     limit = 200 
     start_ts_ms = int(START_DATE.timestamp()) * 1000
+    if cursor: start_ts_ms = max(start_ts_ms, cursor["timestamp"] * 1000)
+    newest = dict(cursor) if cursor else None
+    # Tronscan rows have no log index; transfers of one transaction are
+    # numbered in the order they are listed so none of them collapse
+    per_tx = {}
 
     while True:
-        url = (f"https://apilist.tronscanapi.com/api/filter/trc20/transfers"
+        url = (f"{TRONSCAN_API}"
                f"?limit={limit}&start={start}&sort=-timestamp&count=true"
                f"&contract_address={USDT_TRON_CONTRACT}&relatedAddress={TRON_TETHER_MULTISIG}")
         headers = {"TRON-PRO-API-KEY": api_key} if api_key else {}
-        time.sleep(0.5)
-        data = api_get(url, headers=headers)
+        data = await fetch_json(url, limiter, headers=headers)
         transfers = data.get("token_transfers", [])
         if not transfers: break
 
@@ -111,75 +254,87 @@ def fetch_tron_mints(api_key):
             if ts_ms < start_ts_ms:
                 hit_date_limit = True
                 break
+            if newest is None or ts_ms // 1000 > newest["timestamp"]:
+                newest = {"timestamp": ts_ms // 1000, "block": tx.get("block")}
             
             from_addr = tx.get("from_address", "")
             to_addr = tx.get("to_address", "")
             
             if from_addr == TRON_TETHER_MULTISIG and to_addr == TRON_TREASURY:
                 amount_usd = int(tx.get("quant", "0")) / 1e6 
-                if amount_usd >= MINT_THRESHOLD:
+                if amount_usd > 0:
+                    tx_id = tx.get("transaction_id", "")
+                    per_tx[tx_id] = per_tx.get(tx_id, -1) + 1
                     mints.append({
                         "timestamp": ts_ms // 1000, 
                         "date": ts_to_date(ts_ms // 1000), 
                         "amount": amount_usd, 
                         "chain": "tron", 
-                        "tx": tx.get("transaction_id", "")
+                        "tx": tx_id,
+                        "log_index": per_tx[tx_id]
                     })
         
         print(f"  📦 Page {start // limit + 1}: {len(transfers)} transfers, {len(mints)} mints found...")
         if hit_date_limit or len(transfers) < limit: break
         start += limit
 
-    print(f"  ✅ Total Tron mint events: {len(mints)}")
-    return mints
+    print(f"  ✅ New Tron mint events: {len(mints)}")
+    return mints, newest
 
-def fetch_defillama_mints():
-    print("\n🦙 Fetching DefiLlama net supply changes...")
-    url = "https://stablecoins.llama.fi/stablecoincharts/all?stablecoin=1"
-    data = api_get(url)
-    mints = []
-    prev_supply = None
+def defillama_diffs(data, cursor=None):
+    # Day-over-day USDT supply changes from a stablecoincharts response.
+    # cursor: {"timestamp", "circulating"} of the last processed day; only
+    # later days are diffed. Returns (changes, new cursor).
+    entries = sorted((int(e["date"]), e.get("totalCirculating", {}).get("peggedUSD", 0))
+                     for e in data if "date" in e)
     target_ts = START_DATE.timestamp()
-    for entry in data:
-        if "date" not in entry: continue
-        date_ts = int(entry["date"])
-        if date_ts < target_ts:
-            prev_supply = entry.get("totalCirculating", {}).get("peggedUSD", 0)
-            continue
-        current_supply = entry.get("totalCirculating", {}).get("peggedUSD", 0)
+    prev_supply = None
+    start = 0
+    if cursor:
+        prev_supply = cursor["circulating"]
+        start = bisect.bisect_right(entries, (cursor["timestamp"], float("inf")))
+    else:
+        # Seed from the last day before START_DATE so its first day has a diff
+        start = bisect.bisect_left(entries, (target_ts,))
+        if start: prev_supply = entries[start - 1][1]
+
+    mints = []
+    for date_ts, current_supply in entries[start:]:
         if prev_supply is not None:
-            diff = current_supply - prev_supply
-            if diff >= MINT_THRESHOLD:
-                mints.append({
-                    "date": ts_to_date(date_ts), 
-                    "timestamp": date_ts, 
-                    "amount": diff, 
-                    "circulating_after": current_supply, 
-                    "source": "defillama_net"
-                })
-        prev_supply = current_supply
-    print(f"  ✅ DefiLlama net 1B+ events: {len(mints)}")
-    return mints
-
-def aggregate_onchain_by_day(mints):
-    from collections import defaultdict
-    daily = defaultdict(lambda: {"total": 0, "txs": [], "chains": set()})
-    for m in mints:
-        day = m["date"]
-        daily[day]["total"] += m["amount"]
-        daily[day]["chains"].add(m["chain"])
-        daily[day]["txs"].append(m)
-    big_days = []
-    for day, info in sorted(daily.items()):
-        if info["total"] >= MINT_THRESHOLD:
-            big_days.append({
-                "date": day, 
-                "total_minted": info["total"], 
-                "chains": list(info["chains"]), 
-                "num_txs": len(info["txs"]), 
-                "transactions": [{"amount": t["amount"], "chain": t["chain"], "tx": t["tx"]} for t in info["txs"]]
+            # Every day-over-day change is kept (burns too); the threshold is applied on export
+            mints.append({
+                "date": ts_to_date(date_ts), 
+                "timestamp": date_ts, 
+                "amount": current_supply - prev_supply, 
+                "circulating_after": current_supply, 
+                "source": "defillama_net"
             })
-    return big_days
+        prev_supply = current_supply
+    if start < len(entries):
+        cursor = {"timestamp": entries[-1][0], "circulating": entries[-1][1]}
+    return mints, cursor
+
+async def fetch_defillama_mints(cursor=None):
+    print("\n🦙 Fetching DefiLlama net supply changes...")
+    if DEFILLAMA_FIXTURE:
+        with open(DEFILLAMA_FIXTURE) as f: data = json.load(f)
+    else:
+        data = await asyncio.to_thread(api_get, f"{DEFILLAMA_API}?stablecoin=1")
+    mints, cursor = defillama_diffs(data, cursor)
+    print(f"  ✅ DefiLlama new daily supply changes: {len(mints)}")
+    return mints, cursor
+
+async def fetch_all(eth_key, tron_key, cursors, backfill=False):
+    # Both explorers and DefiLlama at once, each explorer behind its own rate limit
+    async def skip():
+        return [], None
+
+    if backfill:
+        eth = backfill_ethereum_mints(eth_key, TokenBucket(ETHERSCAN_RATE)) if eth_key else skip()
+    else:
+        eth = fetch_ethereum_mints(eth_key, TokenBucket(ETHERSCAN_RATE), cursors.get("ethereum")) if eth_key else skip()
+    tron = fetch_tron_mints(tron_key, TokenBucket(TRONSCAN_RATE), cursors.get("tron")) if tron_key else skip()
+    return await asyncio.gather(eth, tron, fetch_defillama_mints(cursors.get("defillama")))
 
 def main():
     os.environ["ETHERSCAN_API_KEY"] = "JWHCP17895M7IP5EBI3KIH7P4QRI7P1X2E"
@@ -188,20 +343,41 @@ def main():
     eth_key = os.environ.get("ETHERSCAN_API_KEY", "").strip()
     tron_key = os.environ.get("TRONSCAN_API_KEY", "").strip()
 
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    all_onchain = []
+    onchain_path = os.path.join(BASE_DIR, "public", "tether_mints_onchain.json")
+    defillama_path = os.path.join(BASE_DIR, "public", "tether_mints_defillama.json")
+    rollup_path = os.path.join(BASE_DIR, "public", "tether_mints_rollup.json")
+    ledger = mint_ledger.connect()
+
+    state = load_state()
+    if state.get("mints"):
+        # Older state files carried every mint; move them into the ledger once
+        mint_ledger.upsert_mints(ledger, state.pop("mints"))
 
-    if eth_key: all_onchain.extend(fetch_ethereum_mints(eth_key))
-    if tron_key: all_onchain.extend(fetch_tron_mints(tron_key))
+    # --export regenerates the public JSON from the ledger without fetching
+    if "--export" not in sys.argv:
+        # --full ignores the saved cursors: explorers page back to START_DATE and
+        # DefiLlama diffs are recomputed from scratch (use it after upstream corrections);
+        # --backfill additionally rebuilds Ethereum by block range instead of paging.
+        # Upserts are keyed by (chain, tx, log_index), so re-fetched mints are not double counted
+        backfill = "--backfill" in sys.argv
+        cursors = {} if "--full" in sys.argv or backfill else state["cursors"]
+        (eth_mints, eth_newest), (tron_mints, tron_newest), (defillama_mints, defillama_newest) = asyncio.run(
+            fetch_all(eth_key, tron_key, cursors, backfill=backfill))
 
-    onchain_days = aggregate_onchain_by_day(all_onchain) if all_onchain else []
-    defillama_mints = fetch_defillama_mints()
+        added = mint_ledger.upsert_mints(ledger, eth_mints + tron_mints)
+        mint_ledger.upsert_defillama(ledger, defillama_mints)
+        print(f"\n📒 Ledger: {added} new mints")
 
-    onchain_path = os.path.join(base_dir, "public", "tether_mints_onchain.json")
-    defillama_path = os.path.join(base_dir, "public", "tether_mints_defillama.json")
+        # Only move the cursors once the ledger has the mints
+        if eth_newest: state["cursors"]["ethereum"] = eth_newest
+        if tron_newest: state["cursors"]["tron"] = tron_newest
+        if defillama_newest: state["cursors"]["defillama"] = defillama_newest
+        save_state(state)
 
-    with open(onchain_path, "w") as f: json.dump(onchain_days, f, indent=2)
-    with open(defillama_path, "w") as f: json.dump(defillama_mints, f, indent=2)
+    mint_ledger.write_json(mint_ledger.onchain_days(ledger, MINT_THRESHOLD), onchain_path)
+    mint_ledger.write_json(mint_ledger.defillama_events(ledger, MINT_THRESHOLD), defillama_path)
+    mint_ledger.write_json(mint_ledger.rollup(ledger, ROLLUP_THRESHOLDS), rollup_path, compact=True)
+    print(HTTP.stats_line())
     print("Done! Real data saved to /public")
 
 if __name__ == "__main__":
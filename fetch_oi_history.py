@@ -1,19 +1,7 @@
 
-import boto3
-import os
 import lz4.frame
 import json
-from datetime import datetime, timedelta
-
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def fetch_asset_ctxs_history():
     print("Found 'asset_ctxs/' root folder! exploring...")
@@ -23,7 +11,7 @@ def fetch_asset_ctxs_history():
     prefix = "asset_ctxs/"
     
     try:
-        response = s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix, Delimiter="/", RequestPayer='requester', MaxKeys=20)
+        response = archive_client.list_page(prefix, delimiter="/", max_keys=20)
         
         # It might be dated folders like asset_ctxs/20240101/
         if 'CommonPrefixes' in response:
@@ -35,7 +23,7 @@ def fetch_asset_ctxs_history():
             sample_date = response['CommonPrefixes'][0]['Prefix']
             print(f"Drilling into {sample_date}...")
             
-            resp_date = s3.list_objects_v2(Bucket=BUCKET, Prefix=sample_date, RequestPayer='requester', MaxKeys=10)
+            resp_date = archive_client.list_page(sample_date, max_keys=10)
             if 'Contents' in resp_date:
                 files = [obj['Key'] for obj in resp_date['Contents']]
                 print("Files found:", files)
@@ -44,8 +32,7 @@ def fetch_asset_ctxs_history():
                 if files:
                     target = files[0]
                     print(f"Downloading {target}...")
-                    obj = s3.get_object(Bucket=BUCKET, Key=target, RequestPayer='requester')
-                    data = lz4.frame.decompress(obj['Body'].read())
+                    data = lz4.frame.decompress(archive_client.fetch_object(target))
                     json_data = json.loads(data)
                     
                     print("Parsed successfully!")
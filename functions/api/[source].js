@@ -0,0 +1,129 @@
+/**
+ * Edge cache in front of the upstream APIs the dashboard reads.
+ *
+ * GET /api/prices | /api/fees | /api/live-oi returns the upstream JSON from
+ * the Cloudflare cache. Fresh entries (younger than ttl) are served as is;
+ * stale ones (up to ttl + swr) are served immediately while a background
+ * refresh runs; misses fetch upstream. When upstream fails, an entry up to
+ * ttl + swr + sie old is served with a Warning header (stale-if-error); 502
+ * only when nothing is cached. Concurrent refreshes of one source in an
+ * isolate share a single upstream request. Responses carry an ETag and
+ * answer If-None-Match with 304. edge_cache.py is the local stand-in.
+ */
+
+const SOURCES = {
+  prices: {
+    url: 'https://api.coingecko.com/api/v3/coins/hyperliquid/market_chart?vs_currency=usd&days=365&interval=daily',
+    ttl: 600,
+    swr: 3600,
+    sie: 86400
+  },
+  fees: {
+    url: 'https://api.llama.fi/summary/fees/hyperliquid?dataType=dailyFees',
+    ttl: 900,
+    swr: 3600,
+    sie: 86400
+  },
+  'live-oi': {
+    url: 'https://api.hyperliquid.xyz/info',
+    method: 'POST',
+    body: JSON.stringify({ type: 'metaAndAssetCtxs' }),
+    ttl: 30,
+    swr: 120,
+    sie: 3600
+  }
+};
+
+// source name -> pending refresh promise (request coalescing)
+const inflight = new Map();
+
+const cacheKey = name => new Request(`https://edge-cache.internal/api/${name}`);
+
+const sha1 = async text => {
+  const digest = await crypto.subtle.digest('SHA-1', new TextEncoder().encode(text));
+  return [...new Uint8Array(digest)].map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+const fetchUpstream = async source => {
+  const response = await fetch(source.url, {
+    method: source.method || 'GET',
+    headers: { 'Content-Type': 'application/json', 'Accept-Encoding': 'gzip' },
+    body: source.body
+  });
+  if (!response.ok) throw new Error(`upstream HTTP ${response.status}`);
+  const body = await response.text();
+  return { body, etag: `"${await sha1(body)}"`, fetchedAt: Date.now() };
+};
+
+const refresh = (name, source) => {
+  if (!inflight.has(name)) {
+    const pending = fetchUpstream(source)
+      .then(async entry => {
+        // Kept in the cache for the whole stale-if-error window, freshness is
+        // judged from X-Fetched-At
+        await caches.default.put(cacheKey(name), new Response(entry.body, {
+          headers: {
+            'Content-Type': 'application/json',
+            'Cache-Control': `max-age=${source.ttl + source.swr + source.sie}`,
+            'ETag': entry.etag,
+            'X-Fetched-At': String(entry.fetchedAt)
+          }
+        }));
+        return entry;
+      })
+      .finally(() => inflight.delete(name));
+    inflight.set(name, pending);
+  }
+  return inflight.get(name);
+};
+
+const respond = (request, source, entry, status) => {
+  const headers = {
+    'Content-Type': 'application/json',
+    'Cache-Control': `public, max-age=${source.ttl}, stale-while-revalidate=${source.swr}, stale-if-error=${source.sie}`,
+    'ETag': entry.etag,
+    'Age': String(Math.max(0, Math.floor((Date.now() - entry.fetchedAt) / 1000))),
+    'X-Cache': status
+  };
+  if (status === 'STALE-IF-ERROR') headers['Warning'] = '111 - "Revalidation Failed"';
+  if (request.headers.get('If-None-Match') === entry.etag) {
+    return new Response(null, { status: 304, headers });
+  }
+  return new Response(entry.body, { headers });
+};
+
+export const onRequestGet = async ({ request, params, waitUntil }) => {
+  const name = params.source;
+  const source = SOURCES[name];
+  if (!source) return new Response('Unknown source', { status: 404 });
+
+  const cached = await caches.default.match(cacheKey(name));
+  let entry = null;
+  if (cached) {
+    entry = {
+      body: await cached.text(),
+      etag: cached.headers.get('ETag'),
+      fetchedAt: Number(cached.headers.get('X-Fetched-At'))
+    };
+    const age = Date.now() - entry.fetchedAt;
+    if (age < source.ttl * 1000) {
+      return respond(request, source, entry, 'HIT');
+    }
+    if (age < (source.ttl + source.swr) * 1000) {
+      // Stale: answer now, refresh after the response is sent
+      waitUntil(refresh(name, source).catch(error => console.error(`Refreshing ${name}:`, error)));
+      return respond(request, source, entry, 'STALE');
+    }
+  }
+
+  try {
+    return respond(request, source, await refresh(name, source), 'MISS');
+  } catch (error) {
+    // Upstream is down: an old answer beats a 502
+    if (entry) {
+      console.error(`Serving stale ${name} after upstream error:`, error);
+      return respond(request, source, entry, 'STALE-IF-ERROR');
+    }
+    return new Response(`Upstream ${name} unavailable: ${error.message}`, { status: 502 });
+  }
+};
@@ -0,0 +1,220 @@
+
+import gzip
+import json
+import time
+import random
+import threading
+import http.client
+import email.utils
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# Small HTTP client shared by the data fetchers.
+#
+# - keep-alive: idle connections are pooled per host and reused
+# - gzip: responses are requested compressed and inflated here
+# - per-host limit: at most max_per_host requests in flight to one host
+# - retries: connection errors, 429 and 5xx are retried with full-jitter
+#   exponential backoff; Retry-After is honoured when the server sends it,
+#   up to retry_after_max
+# - stale keep-alive: a pooled connection the server already closed is
+#   replaced and the request resent once right away, without using a retry
+# - counters: requests, retries, reconnects, failures, bytes and latency,
+#   see stats()
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# What a reused connection raises when the server dropped it while idle
+STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+class HttpError(Exception):
+    def __init__(self, status, url, body=b''):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+def _retry_after(value):
+    # Retry-After is either delay-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+class HttpClient:
+    def __init__(self, max_per_host=4, timeout=30, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, retry_after_max=120.0, user_agent="Mozilla/5.0"):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.user_agent = user_agent
+
+        self._lock = threading.Lock()
+        self._idle = defaultdict(list)  # (scheme, host) -> [connection, ...]
+        self._slots = {}  # (scheme, host) -> BoundedSemaphore
+
+        self.requests = 0
+        self.retries = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.statuses = defaultdict(int)
+
+    # --- connections ---
+
+    def _slot(self, origin):
+        with self._lock:
+            if origin not in self._slots:
+                self._slots[origin] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[origin]
+
+    def _connect(self, origin):
+        scheme, host = origin
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(host, timeout=self.timeout)
+
+    def _checkout(self, origin):
+        # (connection, reused from the pool?)
+        with self._lock:
+            if self._idle[origin]:
+                return self._idle[origin].pop(), True
+        return self._connect(origin), False
+
+    def _checkin(self, origin, conn):
+        with self._lock:
+            self._idle[origin].append(conn)
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    # --- requests ---
+
+    def _send(self, method, url, headers, body):
+        parts = urlsplit(url)
+        origin = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        hdrs = {'User-Agent': self.user_agent, 'Accept-Encoding': 'gzip'}
+        hdrs.update(headers or {})
+
+        with self._slot(origin):
+            conn, reused = self._checkout(origin)
+            start = time.monotonic()
+            while True:
+                try:
+                    conn.request(method, path, body=body, headers=hdrs)
+                    resp = conn.getresponse()
+                    data = resp.read()
+                    break
+                except STALE_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    # The server closed it while it sat in the pool: not a
+                    # failure, go again on a fresh socket
+                    conn, reused = self._connect(origin), False
+                    with self._lock:
+                        self.reconnects += 1
+                except Exception:
+                    conn.close()
+                    raise
+            elapsed = time.monotonic() - start
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(origin, conn)
+
+        if resp.getheader('Content-Encoding', '').lower() == 'gzip':
+            data = gzip.decompress(data)
+
+        with self._lock:
+            self.requests += 1
+            self.statuses[resp.status] += 1
+            self.bytes_received += len(data)
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+        return resp, data
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, headers=None, body=None):
+        # (status, response headers, body bytes); raises HttpError once retries are used up
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                resp, data = self._send(method, url, headers, body)
+            except (OSError, http.client.HTTPException) as e:
+                if last:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                wait = self._backoff(attempt)
+                reason = str(e) or type(e).__name__
+            else:
+                if resp.status < 400:
+                    return resp.status, dict(resp.getheaders()), data
+                if resp.status not in RETRY_STATUSES or last:
+                    with self._lock:
+                        self.failures += 1
+                    raise HttpError(resp.status, url, data)
+                wait = _retry_after(resp.getheader('Retry-After'))
+                if wait is None:
+                    wait = self._backoff(attempt)
+                else:
+                    # A bogus or far-off Retry-After must not park the run
+                    wait = min(wait, self.retry_after_max)
+                reason = f"HTTP {resp.status}"
+
+            with self._lock:
+                self.retries += 1
+            print(f"  ⚠️ Request failed ({reason}), retrying in {wait:.1f}s...")
+            time.sleep(wait)
+
+    def get_json(self, url, headers=None):
+        _, _, data = self.request('GET', url, headers)
+        return json.loads(data)
+
+    def post_json(self, url, payload, headers=None):
+        hdrs = {'Content-Type': 'application/json'}
+        hdrs.update(headers or {})
+        _, _, data = self.request('POST', url, hdrs, json.dumps(payload).encode())
+        return json.loads(data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'reconnects': self.reconnects,
+                'failures': self.failures,
+                'bytes_received': self.bytes_received,
+                'latency_avg_s': self.latency_total / self.requests if self.requests else 0.0,
+                'latency_max_s': self.latency_max,
+                'statuses': dict(self.statuses),
+            }
+
+    def stats_line(self):
+        s = self.stats()
+        return (f"HTTP: {s['requests']} requests, {s['retries']} retries, {s['reconnects']} reconnects, "
+                f"{s['failures']} failures, "
+                f"{s['bytes_received'] / 1e6:.1f} MB, avg {s['latency_avg_s'] * 1e3:.0f} ms, "
+                f"max {s['latency_max_s'] * 1e3:.0f} ms")
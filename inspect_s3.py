@@ -1,23 +1,8 @@
 
-import boto3
-import os
 import lz4.frame
 import json
 from datetime import datetime, timedelta
-import asyncio
-from botocore.config import Config
-
-# Configuration
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-# Setup S3 client with Requester Pays enabled
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def fetch_historical_oi(start_date='20240101'):
     print(f"Fetching historical OI starting from {start_date}...")
@@ -32,17 +17,17 @@ def fetch_historical_oi(start_date='20240101'):
         date_str = current_date.strftime('%Y%m%d')
         # Path format: market_data/{date}/{hour}/assetCtxs.lz4
         # Note: bucket layout can vary, let's verify if assetCtxs exists
-        key = f"market_data/{date_str}/0/assetCtxs.lz4"
+        key = archive_client.market_data_key(date_str, 0, "assetCtxs")
         
         try:
             # Check if file exists (head_object)
-            # Use RequestPayer='requester'
-            s3.head_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
+            if not archive_client.exists(key):
+                current_date += timedelta(days=1)
+                continue
             
             # Download file
             print(f"Downloading {date_str}...", end='\r')
-            response = s3.get_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
-            compressed_data = response['Body'].read()
+            compressed_data = archive_client.fetch_object(key)
             
             # Decompress
             data = lz4.frame.decompress(compressed_data)
@@ -81,9 +66,8 @@ def fetch_historical_oi(start_date='20240101'):
                 pass # (Actual parsing logic to be refined below)
 
         except Exception as e:
-            # File might not exist for that specific hour or date
-            # print(f"Skipping {date_str}: {e}")
-            pass
+            # Missing keys were skipped above; anything else is a real failure
+            print(f"\nError {date_str}: {e}")
             
         current_date += timedelta(days=1)
         
@@ -94,12 +78,11 @@ def fetch_historical_oi(start_date='20240101'):
 def inspect_one_file():
     # Try yesterday
     yesterday = (datetime.utcnow() - timedelta(days=2)).strftime('%Y%m%d')
-    key = f"market_data/{yesterday}/0/assetCtxs.lz4"
+    key = archive_client.market_data_key(yesterday, 0, "assetCtxs")
     
     try:
         print(f"Inspecting {key}...")
-        response = s3.get_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
-        data = lz4.frame.decompress(response['Body'].read())
+        data = lz4.frame.decompress(archive_client.fetch_object(key))
         json_data = json.loads(data)
         
         print("Data type:", type(json_data))
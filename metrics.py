@@ -0,0 +1,214 @@
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import contextlib
+from datetime import datetime, timezone
+
+# Run metrics for the archive scripts: where the time goes and what the
+# requester-pays bucket costs us.
+#
+# - spans per stage (list, get, decompress, parse, aggregate; 'decode' for
+#   streaming passes that do all three at once): calls, seconds, max, errors
+# - counters: requests, objects listed, bytes downloaded, cache hits, rows...
+# - the last errors with the item they belong to, instead of only a print
+# - an estimate of the S3 bill (requests + data transfer out) from the counters
+#
+# Everything goes through the process-wide METRICS; archive_client meters
+# S3 requests itself, scripts add their processing stages and call
+# METRICS.write() at the end, which writes a JSON file and optionally
+# Prometheus text (node_exporter textfile collector format).
+
+METRICS_DIR = '.cache/metrics'
+MAX_ERRORS = 50
+
+# S3 Standard list prices; requester pays both. Set these for the bucket's
+# region, and HL_S3_EGRESS_USD_PER_GB=0 when running inside that region.
+GET_USD_PER_1000 = float(os.environ.get('HL_S3_GET_USD_PER_1000', 0.0004))
+LIST_USD_PER_1000 = float(os.environ.get('HL_S3_LIST_USD_PER_1000', 0.005))
+EGRESS_USD_PER_GB = float(os.environ.get('HL_S3_EGRESS_USD_PER_GB', 0.09))
+
+class Metrics:
+    def __init__(self, job=None):
+        self.job = job or os.path.splitext(os.path.basename(sys.argv[0] or ''))[0] or 'python'
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stages = {}  # name -> {'calls', 'seconds', 'max_s', 'errors'}
+        self.counters = {}
+        self.errors = []
+
+    def observe(self, stage, seconds, error=False):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max_s': 0.0, 'errors': 0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_s'] = max(entry['max_s'], seconds)
+            if error:
+                entry['errors'] += 1
+
+    def stream(self, body, consume, stage='decode'):
+        # consume(body) decompressing and parsing while the body downloads;
+        # the body's read time is already recorded under 'get', the rest
+        # goes to stage
+        start = time.perf_counter()
+        failed = False
+        try:
+            return consume(body)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start - getattr(body, 'read_s', 0.0), error=failed)
+
+    @contextlib.contextmanager
+    def span(self, stage, item=None):
+        # Times the block under stage; an exception is recorded and re-raised
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.observe(stage, time.perf_counter() - start, error=True)
+            self.error(item, e, stage=stage)
+            raise
+        self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, item, error, stage=None):
+        # A failed item (day, hour, key...) with its message; stage error
+        # counts come from observe()/span()
+        with self.lock:
+            self.counters['errors'] = self.counters.get('errors', 0) + 1
+            self.errors.append({'item': None if item is None else str(item), 'stage': stage,
+                                'error': f"{type(error).__name__}: {error}", 'time': round(time.time(), 3)})
+            del self.errors[:-MAX_ERRORS]
+
+    def cost(self):
+        # Estimated USD for this run; cache hits never reach S3 so they are free
+        c = self.counters
+        gets = c.get('get_requests', 0) + c.get('head_requests', 0)
+        requests = gets / 1000 * GET_USD_PER_1000 + c.get('list_requests', 0) / 1000 * LIST_USD_PER_1000
+        egress = c.get('bytes_downloaded', 0) / 1024 ** 3 * EGRESS_USD_PER_GB
+        return {'requests_usd': requests, 'egress_usd': egress, 'total_usd': requests + egress}
+
+    def snapshot(self):
+        with self.lock:
+            stages = {name: dict(entry) for name, entry in self.stages.items()}
+            counters = dict(self.counters)
+            errors = list(self.errors)
+        return {
+            'job': self.job,
+            'started': datetime.fromtimestamp(self.started, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'duration_s': round(time.time() - self.started, 3),
+            'stages': {name: {**entry, 'seconds': round(entry['seconds'], 6), 'max_s': round(entry['max_s'], 6)}
+                       for name, entry in sorted(stages.items())},
+            'counters': dict(sorted(counters.items())),
+            'cost': {k: round(v, 6) for k, v in self.cost().items()},
+            'rates': {'get_usd_per_1000': GET_USD_PER_1000, 'list_usd_per_1000': LIST_USD_PER_1000,
+                      'egress_usd_per_gb': EGRESS_USD_PER_GB},
+            'errors': errors,
+        }
+
+    def prometheus(self, snapshot=None):
+        s = snapshot or self.snapshot()
+        job = s['job'].replace('\\', '\\\\').replace('"', '\\"')
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP hl_archive_{name} {help_text}")
+            lines.append(f"# TYPE hl_archive_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join([f'job="{job}"'] + [f'{k}="{v}"' for k, v in labels.items()])
+                lines.append(f"hl_archive_{name}{{{label_text}}} {value}")
+
+        stages = s['stages'].items()
+        metric('stage_seconds_total', 'counter', "Time spent per stage",
+               [({'stage': n}, e['seconds']) for n, e in stages])
+        metric('stage_calls_total', 'counter', "Spans recorded per stage",
+               [({'stage': n}, e['calls']) for n, e in stages])
+        metric('stage_errors_total', 'counter', "Failed spans per stage",
+               [({'stage': n}, e['errors']) for n, e in stages])
+        metric('stage_max_seconds', 'gauge', "Slowest single span per stage",
+               [({'stage': n}, e['max_s']) for n, e in stages])
+        for name, value in s['counters'].items():
+            metric(f"{name}_total", 'counter', name.replace('_', ' ').capitalize(), [({}, value)])
+        metric('estimated_cost_usd', 'gauge', "Estimated requester-pays cost of the run",
+               [({'component': k[:-len('_usd')]}, v) for k, v in s['cost'].items()])
+        metric('run_duration_seconds', 'gauge', "Wall time of the run", [({}, s['duration_s'])])
+        metric('last_run_timestamp_seconds', 'gauge', "When the run finished", [({}, round(time.time()))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None, prometheus_path=None):
+        # JSON always (default METRICS_DIR/<job>.json), Prometheus text when asked
+        s = self.snapshot()
+        path = path or os.path.join(METRICS_DIR, f"{self.job}.json")
+        _atomic_write(path, json.dumps(s, indent=2))
+        if prometheus_path:
+            _atomic_write(prometheus_path, self.prometheus(s))
+        return path
+
+    def summary_line(self):
+        c = self.counters
+        cost = self.cost()
+        hits, misses = c.get('cache_hits', 0), c.get('cache_misses', 0)
+        cache = f", cache {hits}/{hits + misses} hits" if hits + misses else ""
+        return (f"S3: {c.get('get_requests', 0)} GET, {c.get('list_requests', 0)} LIST, "
+                f"{c.get('bytes_downloaded', 0) / 1e6:.1f} MB{cache}, est. ${cost['total_usd']:.4f}"
+                f" ({c.get('errors', 0)} errors)")
+
+def _atomic_write(path, text):
+    out_dir = os.path.dirname(path) or '.'
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class MeteredBody:
+    # File-like wrapper around a response body: counts the bytes actually
+    # read and the time spent waiting on read(), and reports both under
+    # `stage` once the body is closed or exhausted. Streaming consumers that
+    # stop early (first snapshot) are only charged for what they pulled.
+    def __init__(self, body, metrics, stage='get', counter='bytes_downloaded', waited_s=0.0):
+        self.body = body
+        self.metrics = metrics
+        self.stage = stage
+        self.counter = counter
+        self.read_s = 0.0
+        self.waited_s = waited_s
+        self.bytes = 0
+        self.done = False
+
+    def __getattr__(self, name):
+        return getattr(self.body, name)
+
+    def read(self, amt=None):
+        start = time.perf_counter()
+        data = self.body.read() if amt is None else self.body.read(amt)
+        self.read_s += time.perf_counter() - start
+        self.bytes += len(data)
+        if amt is None or not data:
+            self._finish()
+        return data
+
+    def _finish(self):
+        if not self.done:
+            self.done = True
+            self.metrics.observe(self.stage, self.waited_s + self.read_s)
+            self.metrics.count(self.counter, self.bytes)
+
+    def close(self):
+        self._finish()
+        self.body.close()
+
+METRICS = Metrics()
+
+def add_arguments(parser):
+    parser.add_argument('--metrics', default=None,
+                        help=f"Run metrics JSON (default: {METRICS_DIR}/<script>.json)")
+    parser.add_argument('--prometheus', default=None, help="Also write Prometheus text metrics to this path")
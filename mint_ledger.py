@@ -0,0 +1,266 @@
+
+import os
+import json
+import sqlite3
+import argparse
+from datetime import date as Date, timedelta
+
+# Local SQLite ledger of Tether mint events.
+#
+# Every on-chain mint is one row keyed by (chain, tx, log_index), so
+# re-fetching a page or a whole backfill is an idempotent upsert and a
+# transaction with several mint transfers keeps all of them. Rows from
+# before log indexes were stored have log_index -1 and are replaced by the
+# indexed rows of the same tx when it is fetched again (--full). Per-day totals are kept in
+# daily_totals for every threshold that has been asked for (daily_thresholds)
+# and only the dates touched by an upsert are recomputed, so a run that finds
+# 3 new mints does 3 days of work no matter how long the history is. A new
+# threshold is filled in once, the first time onchain_days() or rollup() sees
+# it. The public JSON files are generated from here on demand.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEDGER_PATH = os.path.join(BASE_DIR, "data", "mints.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mints (
+    chain     TEXT NOT NULL,
+    tx        TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    date      TEXT NOT NULL,
+    amount    REAL NOT NULL,
+    log_index INTEGER NOT NULL DEFAULT -1,
+    PRIMARY KEY (chain, tx, log_index)
+);
+CREATE INDEX IF NOT EXISTS mints_date ON mints (date);
+CREATE INDEX IF NOT EXISTS mints_amount ON mints (amount);
+
+-- Per-day totals of the mints >= threshold; the old single-threshold
+-- daily table is replaced by it
+DROP TABLE IF EXISTS daily;
+CREATE TABLE IF NOT EXISTS daily_thresholds (
+    threshold REAL PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    threshold REAL NOT NULL,
+    date      TEXT NOT NULL,
+    total     REAL NOT NULL,
+    num_txs   INTEGER NOT NULL,
+    chains    TEXT NOT NULL,
+    PRIMARY KEY (threshold, date)
+);
+
+CREATE TABLE IF NOT EXISTS defillama (
+    date              TEXT PRIMARY KEY,
+    timestamp         INTEGER NOT NULL,
+    amount            REAL NOT NULL,
+    circulating_after REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS defillama_amount ON defillama (amount);
+"""
+
+# Dates per statement when refreshing rollups (stays under SQLite's variable limit)
+BATCH = 500
+
+# Period sizes in rollup(); weeks start on Monday
+RESOLUTIONS = ("daily", "weekly", "monthly")
+
+def _migrate(conn):
+    # Ledgers keyed by (chain, tx) only: move their rows over with log_index -1
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(mints)")]
+    if not columns or "log_index" in columns:
+        return False
+    with conn:
+        conn.execute("ALTER TABLE mints RENAME TO mints_old")
+        conn.execute("DROP INDEX IF EXISTS mints_date")
+        conn.execute("DROP INDEX IF EXISTS mints_amount")
+    return True
+
+def connect(path=LEDGER_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    migrated = _migrate(conn)
+    conn.executescript(SCHEMA)
+    if migrated:
+        with conn:
+            conn.execute("INSERT INTO mints (chain, tx, timestamp, date, amount, log_index) "
+                         "SELECT chain, tx, timestamp, date, amount, -1 FROM mints_old")
+            conn.execute("DROP TABLE mints_old")
+    return conn
+
+def _refresh_daily(conn, dates, thresholds=None):
+    # Recompute daily_totals for just these dates, for every tracked
+    # threshold (or the given ones)
+    if thresholds is None:
+        thresholds = [r[0] for r in conn.execute("SELECT threshold FROM daily_thresholds")]
+    dates = sorted(dates)
+    for i in range(0, len(dates), BATCH):
+        batch = dates[i:i + BATCH]
+        marks = ",".join("?" * len(batch))
+        for threshold in thresholds:
+            conn.execute(f"DELETE FROM daily_totals WHERE threshold = ? AND date IN ({marks})",
+                         [threshold] + batch)
+            conn.execute(f"""
+                INSERT INTO daily_totals (threshold, date, total, num_txs, chains)
+                SELECT ?, date, SUM(amount), COUNT(*), GROUP_CONCAT(DISTINCT chain)
+                FROM mints WHERE amount >= ? AND date IN ({marks}) GROUP BY date
+            """, [threshold, threshold] + batch)
+
+def track_thresholds(conn, thresholds):
+    # Start keeping daily totals for these thresholds; only new ones cost a
+    # pass over the ledger (the mints above them, through the amount index)
+    known = {r[0] for r in conn.execute("SELECT threshold FROM daily_thresholds")}
+    new = sorted({float(t) for t in thresholds} - known)
+    if not new:
+        return
+    with conn:
+        conn.executemany("INSERT INTO daily_thresholds (threshold) VALUES (?)", [(t,) for t in new])
+        for threshold in new:
+            conn.execute("""
+                INSERT OR REPLACE INTO daily_totals (threshold, date, total, num_txs, chains)
+                SELECT ?, date, SUM(amount), COUNT(*), GROUP_CONCAT(DISTINCT chain)
+                FROM mints WHERE amount >= ? GROUP BY date
+            """, (threshold, threshold))
+
+def upsert_mints(conn, mints):
+    # Insert or update mint records ({chain, tx, log_index, timestamp, date,
+    # amount}, log_index defaults to -1); returns how many rows were added
+    mints = [{**m, "log_index": m.get("log_index", -1)} for m in mints]
+    if not mints:
+        return 0
+    # An update can move a mint to another day; both days get refreshed
+    dates = {m["date"] for m in mints}
+    for m in mints:
+        dates.update(r["date"] for r in conn.execute("SELECT date FROM mints WHERE chain = ? AND tx = ?",
+                                                     (m["chain"], m["tx"])))
+    before = conn.execute("SELECT COUNT(*) FROM mints").fetchone()[0]
+    with conn:
+        # Indexed rows supersede the legacy row of the same tx
+        conn.executemany("DELETE FROM mints WHERE chain = :chain AND tx = :tx AND log_index = -1",
+                         [m for m in mints if m["log_index"] >= 0])
+        conn.executemany("""
+            INSERT INTO mints (chain, tx, log_index, timestamp, date, amount)
+            VALUES (:chain, :tx, :log_index, :timestamp, :date, :amount)
+            ON CONFLICT (chain, tx, log_index) DO UPDATE SET
+                timestamp = excluded.timestamp, date = excluded.date, amount = excluded.amount
+        """, mints)
+        _refresh_daily(conn, dates)
+    return conn.execute("SELECT COUNT(*) FROM mints").fetchone()[0] - before
+
+def upsert_defillama(conn, events):
+    # DefiLlama day-over-day supply changes, one row per date
+    with conn:
+        conn.executemany("""
+            INSERT INTO defillama (date, timestamp, amount, circulating_after)
+            VALUES (:date, :timestamp, :amount, :circulating_after)
+            ON CONFLICT (date) DO UPDATE SET
+                timestamp = excluded.timestamp, amount = excluded.amount,
+                circulating_after = excluded.circulating_after
+        """, list(events))
+
+def onchain_days(conn, threshold):
+    # tether_mints_onchain.json shape: mints of at least threshold, grouped
+    # by day, keeping days whose total is >= threshold. The days come from
+    # daily_totals; only their mints are read back for the transaction lists
+    track_thresholds(conn, [threshold])
+    totals = conn.execute("SELECT date, total, num_txs, chains FROM daily_totals "
+                          "WHERE threshold = ? AND total >= ? ORDER BY date",
+                          (float(threshold), threshold)).fetchall()
+    txs = {}
+    dates = [r["date"] for r in totals]
+    for i in range(0, len(dates), BATCH):
+        batch = dates[i:i + BATCH]
+        rows = conn.execute(f"SELECT date, amount, chain, tx FROM mints WHERE amount >= ? "
+                            f"AND date IN ({','.join('?' * len(batch))}) ORDER BY timestamp, chain, tx, log_index",
+                            [threshold] + batch)
+        for r in rows:
+            txs.setdefault(r["date"], []).append({"amount": r["amount"], "chain": r["chain"], "tx": r["tx"]})
+    return [{
+        "date": r["date"],
+        "total_minted": r["total"],
+        "chains": sorted(r["chains"].split(",")),
+        "num_txs": r["num_txs"],
+        "transactions": txs[r["date"]],
+    } for r in totals]
+
+def _periods(day):
+    # 'YYYY-MM-DD' -> (day, Monday of its ISO week, 'YYYY-MM')
+    d = Date.fromisoformat(day)
+    return day, (d - timedelta(days=d.weekday())).isoformat(), day[:7]
+
+def rollup(conn, thresholds):
+    # Daily, weekly and monthly mint totals and counts for several
+    # thresholds, summed from daily_totals (one row per day and threshold,
+    # not one per mint). thresholds[i] only sees mints >= thresholds[i].
+    # Columnar output: total[i][j] is threshold i in period j.
+    thresholds = sorted(thresholds)
+    n = len(thresholds)
+    track_thresholds(conn, thresholds)
+    position = {float(t): i for i, t in enumerate(thresholds)}
+    buckets = {res: {} for res in RESOLUTIONS}  # res -> period -> [totals, counts]
+    rows = conn.execute(f"SELECT threshold, date, total, num_txs FROM daily_totals "
+                        f"WHERE threshold IN ({','.join('?' * n)}) ORDER BY date", list(position))
+    period_cache = {}
+    for r in rows:
+        i = position[r["threshold"]]
+        day = r["date"]
+        if day not in period_cache:
+            period_cache[day] = _periods(day)
+        for res, period in zip(RESOLUTIONS, period_cache[day]):
+            bucket = buckets[res].get(period)
+            if bucket is None:
+                bucket = buckets[res][period] = [[0.0] * n, [0] * n]
+            bucket[0][i] += r["total"]
+            bucket[1][i] += r["num_txs"]
+
+    out = {"thresholds": thresholds}
+    for res in RESOLUTIONS:
+        periods = sorted(buckets[res])
+        out[res] = {
+            "periods": periods,
+            "total": [[round(buckets[res][p][0][i]) for p in periods] for i in range(n)],
+            "count": [[buckets[res][p][1][i] for p in periods] for i in range(n)],
+        }
+    return out
+
+def defillama_events(conn, threshold):
+    # Net supply increases >= threshold, in the tether_mints_defillama.json shape
+    rows = conn.execute("SELECT * FROM defillama WHERE amount >= ? ORDER BY date", (threshold,))
+    return [{
+        "date": r["date"],
+        "timestamp": r["timestamp"],
+        "amount": r["amount"],
+        "circulating_after": r["circulating_after"],
+        "source": "defillama_net",
+    } for r in rows]
+
+def all_mints(conn):
+    return [dict(r) for r in conn.execute("SELECT * FROM mints ORDER BY timestamp, chain, tx, log_index")]
+
+def write_json(data, path, compact=False):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        if compact: json.dump(data, f, separators=(",", ":"))
+        else: json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the local mint ledger")
+    parser.add_argument('--ledger', default=LEDGER_PATH)
+    parser.add_argument('--threshold', type=float, default=0, help="Only days with at least this much minted")
+    parser.add_argument('--rollup', metavar='THRESHOLDS',
+                        help="Comma-separated thresholds; print a daily/weekly/monthly summary")
+    args = parser.parse_args()
+
+    conn = connect(args.ledger)
+    count, first, last = conn.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM mints").fetchone()
+    print(f"{count} mints, {first} .. {last}")
+    if args.rollup:
+        result = rollup(conn, [float(t) for t in args.rollup.split(",")])
+        for res in RESOLUTIONS:
+            print(f"{res}: {len(result[res]['periods'])} periods")
+            for t, totals, counts in zip(result["thresholds"], result[res]["total"], result[res]["count"]):
+                print(f"  >= {t / 1e6:,.0f}M: {sum(counts)} mints, {sum(totals) / 1e9:,.2f}B")
+        raise SystemExit
+    for day in onchain_days(conn, args.threshold):
+        print(f"{day['date']}  {day['total_minted'] / 1e6:>12,.1f}M  {day['num_txs']:>3} txs  {','.join(day['chains'])}")
@@ -0,0 +1,236 @@
+
+import io
+import csv
+import math
+import numpy as np
+from datetime import datetime
+
+# Vectorized open interest aggregation.
+#
+# Snapshot columns are parsed straight into NumPy arrays and notional OI is
+# open_interest * mark_px as one vector op. Malformed or empty values become
+# NaN and are masked out instead of raising per row. Works for archive CSV
+# rows (asset_ctxs/*.csv.lz4) and for the live metaAndAssetCtxs response.
+
+# Bytes of CSV parsed per block when streaming
+CHUNK_BYTES = 4 * 1024 * 1024
+
+def _coerce(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def to_float_array(values):
+    # (float64 array, valid mask); invalid entries are NaN and False in the mask.
+    # Accepts lists of str/float or the bytes arrays iter_column_chunks yields.
+    values = np.asarray(values)
+    if values.dtype.kind in 'SU':
+        # Empty cells are common (no price yet); map them to NaN up front
+        values = np.where(values == values.dtype.type(''), values.dtype.type('nan'), values)
+    try:
+        arr = values.astype(np.float64)
+    except (TypeError, ValueError):
+        # At least one malformed value: fall back to element-wise coercion
+        arr = np.fromiter((_coerce(v) for v in values), dtype=np.float64, count=len(values))
+    return arr, np.isfinite(arr)
+
+def _iter_blocks(stream, chunk_bytes):
+    # Read a binary stream in ~chunk_bytes pieces cut on line boundaries
+    rest = b''
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            if rest.strip():
+                yield rest if rest.endswith(b'\n') else rest + b'\n'
+            return
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+
+# Low n bytes of a little-endian uint64, n = 0..8
+_BYTE_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64)
+
+def _words(buf):
+    # Every 8-byte window of buf as a little-endian uint64 (stride 1), so one
+    # gather reads 8 bytes of a field. buf needs 7 bytes of padding at the end.
+    return np.ndarray(shape=(len(buf) - 7,), dtype='<u8', buffer=buf, strides=(1,))
+
+def _field_column(words, starts, ends):
+    # Gather variable-width fields into one fixed-width bytes array, 8 bytes
+    # per gather, so no Python object is created per field. Bytes past the
+    # end of each field are zeroed, which numpy treats as padding.
+    widths = ends - starts
+    nwords = max(-(-int(widths.max()) // 8), 1) if len(widths) else 1
+    out = np.empty((len(starts), nwords), dtype='<u8')
+    last = len(words) - 1
+    for j in range(nwords):
+        idx = starts if j == 0 else np.minimum(starts + 8 * j, last)
+        out[:, j] = words[idx] & _BYTE_MASKS[np.clip(widths - 8 * j, 0, 8)]
+    return out.view(f'S{8 * nwords}').ravel()
+
+def _split_block(block, ncols, wanted):
+    # Fast path for unquoted CSV, done entirely on the raw bytes: locate every
+    # separator at once and slice out the wanted columns. None if the block
+    # needs real CSV parsing (quotes, ragged rows).
+    if b'"' in block:
+        return None
+    padded = np.frombuffer(block + bytes(8), dtype=np.uint8)
+    buf = padded[:-8]
+    seps = np.flatnonzero((buf == ord(',')) | (buf == ord('\n')))
+    if len(seps) % ncols:
+        return None
+    row_ends = seps[ncols - 1::ncols]
+    if len(row_ends) and not (buf[row_ends] == ord('\n')).all():
+        return None
+    cr = b'\r' in block
+    words = _words(padded)
+    columns = {}
+    for name, i in wanted:
+        # Only the wanted columns' bounds: field i starts after separator i-1
+        # of its row (column 0 after the previous row's newline)
+        prev = seps[i - 1::ncols] if i else row_ends[:-1]
+        starts = prev + 1 if i else np.concatenate(([0], prev + 1))
+        ends = seps[i::ncols]
+        if cr and i == ncols - 1:
+            # CRLF files: keep the \r out of the last column
+            ends = ends - (buf[ends - 1] == ord('\r'))
+        columns[name] = _field_column(words, starts, ends)
+    return columns
+
+def iter_column_chunks(stream, names, chunk_bytes=CHUNK_BYTES):
+    # Stream a binary CSV file as {name: bytes array} blocks, so whole days
+    # never need to sit in memory at once
+    header = next(csv.reader([stream.readline().decode('utf-8')]))
+    ncols = len(header)
+    wanted = [(name, header.index(name)) for name in names]
+    for block in _iter_blocks(stream, chunk_bytes):
+        columns = _split_block(block, ncols, wanted)
+        if columns is None:
+            rows = [row for row in csv.reader(io.StringIO(block.decode('utf-8'))) if row]
+            columns = {name: np.array([row[i].encode('utf-8') for row in rows], dtype=bytes)
+                       for name, i in wanted}
+        yield columns
+
+def read_columns(stream, names):
+    # Whole file as {name: bytes array}
+    chunks = {name: [] for name in names}
+    for chunk in iter_column_chunks(stream, names):
+        for name in names:
+            chunks[name].append(chunk[name])
+    return {name: np.concatenate(parts) if parts else np.array([], dtype=bytes)
+            for name, parts in chunks.items()}
+
+def notional(open_interest, mark_px):
+    # Notional OI per row (0 where either input is malformed) and the valid mask
+    oi, oi_ok = to_float_array(open_interest)
+    px, px_ok = to_float_array(mark_px)
+    valid = oi_ok & px_ok
+    return np.where(valid, oi * px, 0.0), valid
+
+def group_sum(keys, values):
+    # (unique keys, per-key sums) in sorted key order
+    uniq, inverse = np.unique(np.asarray(keys), return_inverse=True)
+    return uniq, np.bincount(inverse, weights=values, minlength=len(uniq))
+
+def run_sum(keys, values):
+    # Like group_sum for keys arriving in contiguous runs (snapshot times):
+    # one pass over run boundaries instead of a sort. Keys that reappear
+    # later in the array are merged.
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return {}
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    sums = np.add.reduceat(values, starts)
+    totals = {}
+    for key, total in zip(keys[starts].tolist(), sums.tolist()):
+        totals[key] = totals.get(key, 0.0) + total
+    return totals
+
+def first_block_len(times):
+    # Number of leading rows sharing the first timestamp
+    times = np.asarray(times)
+    if len(times) == 0:
+        return 0
+    later = np.flatnonzero(times != times[0])
+    return int(later[0]) if len(later) else len(times)
+
+def snapshot_total(coins, open_interest, mark_px):
+    # Total notional for one snapshot; first valid row per coin wins
+    values, valid = notional(open_interest, mark_px)
+    coins = np.asarray(coins)[valid]
+    if len(coins) == 0:
+        return 0.0
+    _, first = np.unique(coins, return_index=True)
+    return float(values[valid][first].sum())
+
+def aggregate(columns, by='coin'):
+    # Notional OI summed by 'coin' or by 'time' (one total per snapshot block).
+    # columns needs 'open_interest', 'mark_px' and the grouping column.
+    values, valid = notional(columns['open_interest'], columns['mark_px'])
+    if by == 'time':
+        totals = run_sum(columns[by], values)
+    else:
+        keys, sums = group_sum(columns[by], values)
+        totals = dict(zip(keys.tolist(), sums.tolist()))
+    # Second value: rows skipped as malformed
+    return totals, int((~valid).sum())
+
+def live_snapshot(meta_and_ctxs):
+    # metaAndAssetCtxs response ([meta, assetCtxs]) -> {coin: notional OI},
+    # the same figure calculate_oi.cjs prints, summed
+    meta, ctxs = meta_and_ctxs
+    coins = [asset['name'] for asset in meta['universe']][:len(ctxs)]
+    values, _ = notional([c.get('openInterest') for c in ctxs], [c.get('markPx') for c in ctxs])
+    return dict(zip(coins, values.tolist()))
+
+def _epoch_seconds(stamp):
+    # b'2024-01-01T00:05:00Z' (or str) -> unix seconds
+    if isinstance(stamp, bytes):
+        stamp = stamp.decode('ascii')
+    return int(datetime.fromisoformat(stamp.replace('Z', '+00:00')).timestamp())
+
+class IntradayBinner:
+    # Samples one snapshot per interval from a stream of column chunks: the
+    # first snapshot whose time falls in each [k*interval, (k+1)*interval)
+    # bin, with its total and per-coin notional OI. State is one open
+    # snapshot plus the finished bins, so memory does not grow with file size.
+    # A snapshot block split across two chunks is stitched back together.
+
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self.bins = {}  # bin start (unix s) -> {'time': s, 'total': x, 'coins': {coin: x}}
+        self.current_time = None
+        self.current = None  # bin entry being filled, None if this snapshot is skipped
+
+    def add(self, columns):
+        times = columns['time']
+        if len(times) == 0:
+            return
+        values, _ = notional(columns['open_interest'], columns['mark_px'])
+        coins = columns['coin']
+        starts = np.concatenate(([0], np.flatnonzero(times[1:] != times[:-1]) + 1, [len(times)]))
+        for s, e in zip(starts[:-1].tolist(), starts[1:].tolist()):
+            stamp = times[s]
+            if stamp != self.current_time:
+                self.current_time = stamp
+                t = _epoch_seconds(stamp)
+                bin_start = t - t % self.interval_s
+                if bin_start in self.bins:
+                    self.current = None
+                else:
+                    self.current = self.bins[bin_start] = {'time': t, 'total': 0.0, 'coins': {}}
+            if self.current is None:
+                continue
+            keys, sums = group_sum(coins[s:e], values[s:e])
+            self.current['total'] += float(sums.sum())
+            per_coin = self.current['coins']
+            for coin, total in zip(keys.tolist(), sums.tolist()):
+                coin = coin.decode('utf-8') if isinstance(coin, bytes) else coin
+                per_coin[coin] = per_coin.get(coin, 0.0) + total
+
+    def series(self):
+        # Bins in time order: [(bin start, entry), ...]
+        return sorted(self.bins.items())
@@ -0,0 +1,105 @@
+
+import os
+import math
+import time
+import argparse
+from collections import deque
+from datetime import datetime, timezone
+
+import oi_engine
+from http_client import HttpClient
+from build_history import OUTPUT_PATH, LIVE_DAYS_PATH, load_history, load_live_days, save_history
+
+# Polls metaAndAssetCtxs on a fixed interval and records each UTC day's
+# opening OI, so the history has a real value for days the archive hasn't
+# published yet instead of an interpolated one. Visitors don't read from
+# here: the site is only deployed once a day, and /api/live-oi (edge cache)
+# already turns their live requests into one upstream call per ttl.
+#
+# - every poll: total and per-coin notional OI (openInterest * markPx, as in
+#   calculate_oi.cjs) appended to a bounded in-memory ring buffer
+# - on the first poll of a new UTC day that snapshot is recorded in
+#   LIVE_DAYS_PATH for that date, the same point in time the archive's
+#   first-snapshot value describes. build_history.py is the only writer of
+#   oi_history.json: it merges these in and archive rows replace them once
+#   the day is published.
+
+INFO_API = os.environ.get("HL_INFO_API_URL", "https://api.hyperliquid.xyz/info")
+POLL_INTERVAL_S = 60
+# One day of snapshots at the default interval
+RING_SIZE = 1440
+
+def utc_date(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+class OIPoller:
+    def __init__(self, interval_s=POLL_INTERVAL_S, ring_size=RING_SIZE, client=None,
+                 history_path=OUTPUT_PATH, live_path=LIVE_DAYS_PATH):
+        self.interval_s = interval_s
+        self.client = client or HttpClient(max_per_host=1, timeout=15, max_retries=3)
+        self.history_path = history_path
+        self.live_path = live_path
+        # {'time', 'total', 'by_coin'}; starts empty, so the first poll after
+        # a restart never counts as a day's opening snapshot
+        self.ring = deque(maxlen=ring_size)
+
+    def poll(self):
+        data = self.client.post_json(INFO_API, {"type": "metaAndAssetCtxs"})
+        by_coin = oi_engine.live_snapshot(data)
+        return {'time': int(time.time()), 'total': sum(by_coin.values()), 'by_coin': by_coin}
+
+    def record(self, snapshot):
+        previous = self.ring[-1] if self.ring else None
+        self.ring.append(snapshot)
+        if previous and utc_date(previous['time']) != utc_date(snapshot['time']):
+            self.flush_daily(snapshot)
+
+    def flush_daily(self, snapshot):
+        date = utc_date(snapshot['time'])
+        history = load_history(self.history_path)
+        live = load_live_days(self.live_path)
+        # Days the archive (or manual data) has filled in are no longer needed
+        live = {d: v for d, v in live.items() if d not in history or history[d].get('source') == 'live'}
+        if date in live or (date in history and history[date].get('source') != 'live'):
+            return
+        live[date] = snapshot['total']
+        os.makedirs(os.path.dirname(self.live_path) or '.', exist_ok=True)
+        save_history(dict(sorted(live.items())), self.live_path)
+        print(f"Recorded {date} open: {snapshot['total'] / 1e9:.3f}B")
+
+    def run(self, iterations=None):
+        # Fixed schedule: a slow poll does not push every later poll back, and
+        # slots missed entirely (a hung request, a suspended machine) are
+        # skipped rather than made up in a burst
+        next_at = time.monotonic()
+        done = 0
+        while iterations is None or done < iterations:
+            try:
+                snapshot = self.poll()
+                self.record(snapshot)
+                print(f"{utc_date(snapshot['time'])} {time.strftime('%H:%M:%S', time.gmtime(snapshot['time']))} "
+                      f"OI {snapshot['total'] / 1e9:.3f}B ({len(snapshot['by_coin'])} coins)")
+            except Exception as e:
+                print(f"Poll failed: {e}")
+            done += 1
+            if iterations is not None and done >= iterations:
+                break
+            next_at += self.interval_s
+            now = time.monotonic()
+            if now > next_at:
+                next_at += math.ceil((now - next_at) / self.interval_s) * self.interval_s
+            time.sleep(max(0.0, next_at - now))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll live open interest and record each day's opening OI")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL_S, help="Seconds between polls")
+    parser.add_argument('--ring', type=int, default=RING_SIZE, help="Snapshots kept")
+    parser.add_argument('--once', action='store_true', help="Poll once and exit")
+    args = parser.parse_args()
+
+    poller = OIPoller(interval_s=args.interval, ring_size=args.ring)
+    try:
+        poller.run(iterations=1 if args.once else None)
+    except KeyboardInterrupt:
+        pass
+    print(poller.client.stats_line())
@@ -1,20 +1,8 @@
 
-import boto3
-import os
 import lz4.frame
 import csv
 import io
-from datetime import datetime, timedelta
-
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-BUCKET = "hyperliquid-archive"
-
-session = boto3.Session(
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-s3 = session.client('s3')
+import archive_client
 
 def process_daily_csv_lz4():
     # We found files like 'asset_ctxs/20230520.csv.lz4'
@@ -24,14 +12,12 @@ def process_daily_csv_lz4():
     # Since we can't easily guess the *last* date without listing all,
     # let's try a specific recent date we know might exist.
     
-    date_str = "20240101" 
-    key = f"asset_ctxs/{date_str}.csv.lz4"
+    key = archive_client.asset_ctxs_key("20240101")
     
     print(f"Downloading {key}...")
     
     try:
-        response = s3.get_object(Bucket=BUCKET, Key=key, RequestPayer='requester')
-        data = lz4.frame.decompress(response['Body'].read())
+        data = lz4.frame.decompress(archive_client.fetch_object(key))
         
         # Parse CSV
         text_data = data.decode('utf-8')
@@ -0,0 +1,261 @@
+
+import os
+import sys
+import json
+import base64
+import shutil
+import struct
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from datetime import date, datetime, timezone
+
+# Compact binary export of daily series (oi_history.json and friends) for
+# the browser, split into one chunk per year plus a small JSON index, so the
+# dashboard only downloads the years the selected range needs.
+#
+# Chunk file SERIES_DIR/<name>/<year>.bin, all little-endian:
+#
+#   offset  size  field
+#   0       4     magic b'HLTS'
+#   4       1     version (1)
+#   5       1     flags (0)
+#   6       2     reserved
+#   8       4     start_day   int32, days since 1970-01-01 of the first point
+#   12      4     count       uint32, number of points
+#   16      8     quantum     float64, value = q * quantum
+#   24      8     base        float64, q of the first point (an integer)
+#   32      4*n   deltas      int32, q[i] - q[i-1] (deltas[0] = 0)
+#   32+4n   2*n   offsets     uint16, day[i] - start_day
+#
+# The header is 32 bytes, so both arrays can be viewed in place as
+# Int32Array / Uint16Array. Values are rounded to the nearest quantum (1 USD
+# for OI); if a delta does not fit in int32 the writer coarsens the quantum
+# by 10x until it does. Decoded here and in src/series.js.
+
+SERIES_DIR = 'public/series'
+MAGIC = b'HLTS'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHiIdd')
+INDEX_VERSION = 1
+
+SERIES_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "series.js")
+
+# Reads {chunks: [base64 chunk...]} on stdin, decodes with src/series.js and
+# prints [[day, value], ...]
+NODE_DECODE = """
+const { decodeSeriesChunk } = await import(process.env.SERIES_JS);
+let input = '';
+for await (const chunk of process.stdin) input += chunk;
+const out = [];
+for (const encoded of JSON.parse(input).chunks) {
+  const bytes = Buffer.from(encoded, 'base64');
+  const buffer = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+  const { days, values } = decodeSeriesChunk(buffer);
+  for (let i = 0; i < days.length; i++) out.push([days[i], values[i]]);
+}
+console.log(JSON.stringify(out));
+"""
+
+EPOCH = date(1970, 1, 1)
+
+def day_of_date(value):
+    return (datetime.strptime(value, "%Y-%m-%d").date() - EPOCH).days
+
+def date_of_day(day):
+    return date.fromordinal(EPOCH.toordinal() + day).strftime("%Y-%m-%d")
+
+def _quantize(values, quantum):
+    # (q values, quantum) with every delta inside int32, coarsening if needed
+    while True:
+        q = [round(v / quantum) for v in values]
+        deltas = [b - a for a, b in zip(q, q[1:])]
+        if all(-2 ** 31 <= d < 2 ** 31 for d in deltas) and all(abs(x) < 2 ** 53 for x in q[:1]):
+            return q, quantum
+        quantum *= 10
+
+def encode_chunk(days, values, quantum):
+    # Points must be sorted by day and share one year (offsets are uint16)
+    if not days:
+        raise ValueError("empty chunk")
+    q, quantum = _quantize(values, quantum)
+    start = days[0]
+    offsets = [d - start for d in days]
+    if any(b <= a for a, b in zip(offsets, offsets[1:])) or offsets[-1] > 0xFFFF:
+        raise ValueError("days must be increasing and within 65535 days of the first")
+    deltas = [0] + [b - a for a, b in zip(q, q[1:])]
+    n = len(days)
+    return (HEADER.pack(MAGIC, VERSION, 0, 0, start, n, quantum, float(q[0]))
+            + struct.pack(f'<{n}i', *deltas) + struct.pack(f'<{n}H', *offsets))
+
+def decode_chunk(data):
+    # bytes -> (days, values)
+    magic, version, _, _, start, n, quantum, base = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} series chunk")
+    deltas = struct.unpack_from(f'<{n}i', data, HEADER.size)
+    offsets = struct.unpack_from(f'<{n}H', data, HEADER.size + 4 * n)
+    days, values = [], []
+    q = base
+    for delta, offset in zip(deltas, offsets):
+        q += delta
+        days.append(start + offset)
+        values.append(q * quantum)
+    return days, values
+
+def _same_bytes(path, data):
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read() == data
+
+def _atomic_write(path, data):
+    out_dir = os.path.dirname(path) or '.'
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    # mkstemp creates 0600; these are served as static files
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+def write_series(name, points, quantum=1.0, out_dir=SERIES_DIR):
+    # points: [(YYYY-MM-DD, value)]; points without a value are skipped.
+    # Chunks that did not change keep their bytes (and their hash), so only
+    # the current year is new to browser caches after a daily run.
+    by_year = {}
+    for day_str, value in sorted(points):
+        if value is None:
+            continue
+        by_year.setdefault(int(day_str[:4]), []).append((day_of_date(day_str), float(value)))
+
+    series_dir = os.path.join(out_dir, name)
+    chunks = []
+    for year, rows in sorted(by_year.items()):
+        data = encode_chunk([d for d, _ in rows], [v for _, v in rows], quantum)
+        file = f"{year}.bin"
+        path = os.path.join(series_dir, file)
+        if not _same_bytes(path, data):
+            _atomic_write(path, data)
+        chunks.append({
+            'year': year, 'file': file,
+            'start': date_of_day(rows[0][0]), 'end': date_of_day(rows[-1][0]),
+            'points': len(rows), 'bytes': len(data),
+            'hash': hashlib.sha1(data).hexdigest()[:12],
+        })
+
+    # Years that dropped out of the series
+    keep = {c['file'] for c in chunks}
+    if os.path.isdir(series_dir):
+        for file in os.listdir(series_dir):
+            if file.endswith('.bin') and file not in keep:
+                os.remove(os.path.join(series_dir, file))
+
+    index = {
+        'version': INDEX_VERSION,
+        'name': name,
+        'quantum': quantum,
+        'generated': int(datetime.now(timezone.utc).timestamp()),
+        'chunks': chunks,
+    }
+    # Index last: readers never see it point at a chunk that isn't written yet
+    _atomic_write(os.path.join(series_dir, 'index.json'), json.dumps(index, separators=(',', ':')).encode())
+    return index
+
+def load_index(name, out_dir=SERIES_DIR):
+    with open(os.path.join(out_dir, name, 'index.json')) as f:
+        return json.load(f)
+
+def read_series(name, start=None, out_dir=SERIES_DIR):
+    # [(YYYY-MM-DD, value)] from start (inclusive) on, reading only the chunks needed
+    index = load_index(name, out_dir)
+    points = []
+    for chunk in index['chunks']:
+        if start and chunk['end'] < start:
+            continue
+        with open(os.path.join(out_dir, name, chunk['file']), 'rb') as f:
+            days, values = decode_chunk(f.read())
+        points.extend((date_of_day(d), v) for d, v in zip(days, values))
+    return [p for p in points if not start or p[0] >= start]
+
+def json_points(path, value_key, date_key='date'):
+    with open(path) as f:
+        rows = json.load(f)
+    return [(row[date_key], row.get(value_key)) for row in rows]
+
+def decode_with_node(name, out_dir=SERIES_DIR):
+    # Same chunks through the browser decoder; None when node isn't installed
+    if not shutil.which("node"):
+        return None
+    index = load_index(name, out_dir)
+    chunks = []
+    for chunk in index['chunks']:
+        with open(os.path.join(out_dir, name, chunk['file']), 'rb') as f:
+            chunks.append(base64.b64encode(f.read()).decode())
+    proc = subprocess.run(["node", "--input-type=module", "-e", NODE_DECODE],
+                          input=json.dumps({'chunks': chunks}), capture_output=True, text=True,
+                          env={**os.environ, "SERIES_JS": SERIES_JS}, check=True)
+    return [(date_of_day(d), v) for d, v in json.loads(proc.stdout)]
+
+def verify(name, source_points, out_dir=SERIES_DIR):
+    # Round trip: every source point comes back on the same date within half
+    # a quantum, from the Python reader and (if node is there) src/series.js.
+    # Returns a list of problems, empty when everything matches.
+    index = load_index(name, out_dir)
+    expected = sorted((d, float(v)) for d, v in source_points if v is not None)
+    # Chunks may have coarsened their quantum, so each point is held to its
+    # own year's: a 1 USD year next to a 10 USD one still has to match to 0.5
+    quanta = {}
+    for chunk in index['chunks']:
+        with open(os.path.join(out_dir, name, chunk['file']), 'rb') as f:
+            quanta[chunk['year']] = HEADER.unpack(f.read(HEADER.size))[6]
+
+    problems = []
+    for reader, got in [('python', read_series(name, out_dir=out_dir)), ('js', decode_with_node(name, out_dir))]:
+        if got is None:
+            print(f"  {reader}: skipped (node not found)")
+            continue
+        if [d for d, _ in got] != [d for d, _ in expected]:
+            problems.append(f"{reader}: dates differ ({len(got)} points vs {len(expected)})")
+            continue
+        worst, tolerance = 0.0, index['quantum'] / 2
+        bad = []
+        for (day, g), (_, e) in zip(got, expected):
+            limit = quanta[int(day[:4])] / 2
+            if abs(g - e) > limit * (1 + 1e-9):
+                bad.append(f"{day} off by {abs(g - e)} > {limit}")
+            if abs(g - e) / limit > worst / tolerance:
+                worst, tolerance = abs(g - e), limit
+        print(f"  {reader}: {len(got)} points, max error {worst:.6g} (tolerance {tolerance:g})")
+        if bad:
+            problems.append(f"{reader}: {len(bad)} points outside half a quantum, first {bad[0]}")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked binary daily series for public/")
+    parser.add_argument('command', choices=['export', 'verify', 'read'])
+    parser.add_argument('--source', default='public/oi_history.json', help="JSON array of daily rows")
+    parser.add_argument('--value', default='total_oi', help="Value key in the source rows")
+    parser.add_argument('--name', default='oi_history')
+    parser.add_argument('--quantum', type=float, default=1.0, help="Value resolution (rounded to this)")
+    parser.add_argument('--out', default=SERIES_DIR)
+    parser.add_argument('--start', default=None, help="read: first date, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        points = json_points(args.source, args.value)
+        index = write_series(args.name, points, quantum=args.quantum, out_dir=args.out)
+        size = sum(c['bytes'] for c in index['chunks'])
+        print(f"{args.name}: {sum(c['points'] for c in index['chunks'])} points in {len(index['chunks'])} chunks, "
+              f"{size / 1e3:.1f} kB (source {os.path.getsize(args.source) / 1e3:.1f} kB)")
+    elif args.command == 'read':
+        for day, value in read_series(args.name, start=args.start, out_dir=args.out):
+            print(day, value)
+    else:
+        problems = verify(args.name, json_points(args.source, args.value), out_dir=args.out)
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        if problems:
+            sys.exit(1)
+        print("Round trip OK.")
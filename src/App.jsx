@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useMemo } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import {
   ComposedChart,
   Line,
@@ -58,6 +58,12 @@ const App = () => {
   const [replayIntro, setReplayIntro] = useState(false);
 
   const timeframes = [7, 30, 90, 180, 360];
+  // Range (days, null = all) the loaded OI history covers and the one being
+  // fetched; only a wider selection fetches again
+  const loadedRange = useRef(undefined);
+  const pendingRange = useRef(undefined);
+  // Bumped per fetch so a slower, older response can't replace a newer one
+  const requestSeq = useRef(0);
 
   const handleReplayIntro = () => {
     setReplayIntro(true);
@@ -67,10 +73,18 @@ const App = () => {
   };
 
   useEffect(() => {
+    const covers = range => range === null || (range !== undefined && dateRange !== null && dateRange <= range);
+    if (covers(loadedRange.current) || covers(pendingRange.current)) return;
+    pendingRange.current = dateRange;
+    const seq = ++requestSeq.current;
+
     const fetchData = async () => {
       try {
-        const data = await getDashboardData(timeframes);
-        setRawData(data);
+        const { rows, days } = await getDashboardData(timeframes, dateRange);
+        if (seq !== requestSeq.current) return;
+        loadedRange.current = days;
+        pendingRange.current = undefined;
+        setRawData(rows);
         
         if (!localStorage.getItem('hasSeenIntro')) {
           setTimeout(() => {
@@ -83,13 +97,17 @@ const App = () => {
         }
       } catch (err) {
         console.error(err);
+        if (seq !== requestSeq.current) return;
+        pendingRange.current = undefined;
+        // A failed widening keeps the range already on screen
+        if (loadedRange.current !== undefined) return;
         setError("Failed to fetch protocol data.");
         setLoading(false);
         setShowIntro(false);
       }
     };
     fetchData();
-  }, []);
+  }, [dateRange]);
 
   const filteredData = useMemo(() => {
     if (!dateRange) return rawData;
@@ -1,13 +1,31 @@
 import axios from 'axios';
+import { annualizedAverages } from './rolling';
+import { joinTimeline, dateOfDay } from './timeline';
+import { decodeSeriesChunk, chunksFrom } from './series';
+
+/**
+ * GETs a source through the /api edge cache (functions/api/[source].js, or
+ * edge_cache.py locally), falling back to the upstream request if the proxy
+ * is not there (plain `vite` dev server, failed function).
+ */
+const viaEdgeCache = async (source, upstream) => {
+  try {
+    const response = await axios.get(`/api/${source}`);
+    if (response.data && typeof response.data === 'object') return response;
+  } catch (error) {
+    console.warn(`Edge cache unavailable for ${source}, going upstream:`, error.message);
+  }
+  return upstream();
+};
 
 /**
  * Fetches historical HYPE token prices from CoinGecko.
  */
 export const fetchHypePrice = async () => {
   try {
-    const response = await axios.get(
+    const response = await viaEdgeCache('prices', () => axios.get(
       'https://api.coingecko.com/api/v3/coins/hyperliquid/market_chart?vs_currency=usd&days=365&interval=daily'
-    );
+    ));
     return response.data.prices.map(([timestamp, price]) => ({
       timestamp: Math.floor(timestamp / 1000),
       price
@@ -23,9 +41,9 @@ export const fetchHypePrice = async () => {
  */
 export const fetchProtocolRevenue = async () => {
   try {
-    const response = await axios.get(
+    const response = await viaEdgeCache('fees', () => axios.get(
       'https://api.llama.fi/summary/fees/hyperliquid?dataType=dailyFees'
-    );
+    ));
     if (response.data && response.data.totalDataChart) {
         return response.data.totalDataChart.map(([timestamp, dailyFees]) => ({
           timestamp: Number(timestamp),
@@ -39,10 +57,53 @@ export const fetchProtocolRevenue = async () => {
   }
 };
 
+// Must match INDEX_VERSION in series_bin.py
+const SERIES_VERSION = 1;
+// Extra history before a range so OI gaps at its start can still be interpolated
+const RANGE_MARGIN_DAYS = 7;
+
+// Decoded chunks by file and hash, so widening the range only downloads the
+// years not loaded yet
+const seriesChunks = new Map();
+
 /**
- * Fetches historical Open Interest from our self-hosted JSON file.
+ * Daily series from the binary chunks series_bin.py writes, only the years
+ * that reach fromDate or later. Returns [{ date, value }].
  */
-export const fetchOpenInterestHistory = async () => {
+const fetchBinarySeries = async (name, fromDate) => {
+  const { data: index } = await axios.get(`/series/${name}/index.json`);
+  if (!index || index.version !== SERIES_VERSION) throw new Error(`Unsupported ${name} index`);
+  const chunks = await Promise.all(chunksFrom(index, fromDate).map(chunk => {
+    const key = `${name}/${chunk.file}?v=${chunk.hash}`;
+    if (!seriesChunks.has(key)) {
+      const pending = axios.get(`/series/${key}`, { responseType: 'arraybuffer' })
+        .then(({ data }) => decodeSeriesChunk(data));
+      // A failed download is retried next time instead of cached
+      pending.catch(() => seriesChunks.delete(key));
+      seriesChunks.set(key, pending);
+    }
+    return seriesChunks.get(key);
+  }));
+  const rows = [];
+  chunks.forEach(({ days, values }) => {
+    for (let i = 0; i < days.length; i++) rows.push({ date: dateOfDay(days[i]), value: values[i] });
+  });
+  return rows;
+};
+
+/**
+ * Fetches historical Open Interest: the binary per-year chunks covering the
+ * last `days` days (all of them when null), or the full JSON file if the
+ * chunks are not there.
+ */
+export const fetchOpenInterestHistory = async (days = null) => {
+  try {
+    const fromDate = days ? dateOfDay(Math.floor(Date.now() / 86400000) - days - RANGE_MARGIN_DAYS) : null;
+    const rows = await fetchBinarySeries('oi_history', fromDate);
+    return rows.map(row => ({ date: row.date, total_oi: row.value }));
+  } catch (error) {
+    console.warn('Binary OI history unavailable, loading JSON:', error.message);
+  }
   try {
     const response = await axios.get('/oi_history.json');
     if (Array.isArray(response.data)) {
@@ -63,11 +124,11 @@ export const fetchOpenInterestHistory = async () => {
  */
 export const fetchLiveOpenInterest = async () => {
   try {
-    const response = await axios.post('https://api.hyperliquid.xyz/info', {
+    const response = await viaEdgeCache('live-oi', () => axios.post('https://api.hyperliquid.xyz/info', {
       type: "metaAndAssetCtxs"
     }, {
       headers: { 'Content-Type': 'application/json' }
-    });
+    }));
 
     const assetCtxs = response.data[1];
     let totalOI = 0;
@@ -85,14 +146,58 @@ export const fetchLiveOpenInterest = async () => {
   }
 };
 
+// Must match DASHBOARD_VERSION in build_dashboard.py
+const DASHBOARD_VERSION = 1;
+// Older builds are ignored so a stalled build job can't freeze the charts
+const DASHBOARD_MAX_AGE_S = 36 * 60 * 60;
+
+/**
+ * Loads the pre-joined dataset written by build_dashboard.py.
+ * Returns null if it is missing, stale, or lacks one of the timeframes.
+ */
+export const fetchPrecomputedDashboard = async (timeframes) => {
+  try {
+    const response = await axios.get('/dashboard.json');
+    const data = response.data;
+    if (!data || data.version !== DASHBOARD_VERSION) return null;
+    if (Date.now() / 1000 - data.generated > DASHBOARD_MAX_AGE_S) return null;
+    if (!timeframes.every(tf => data.timeframes.includes(tf))) return null;
+
+    // Columnar -> one object per day, the shape the charts expect
+    const names = Object.keys(data.columns);
+    const rows = new Array(data.rows);
+    for (let i = 0; i < data.rows; i++) {
+      const row = {};
+      for (const name of names) row[name] = data.columns[name][i];
+      rows[i] = row;
+    }
+    return rows;
+  } catch (error) {
+    console.error('Error fetching precomputed dashboard:', error);
+    return null;
+  }
+};
+
+/**
+ * Uses the precomputed dataset when available, otherwise builds it in the
+ * browser with OI history for the last `days` days (null = all). Returns
+ * { rows, days } where days is the range the rows cover: null for the
+ * precomputed file, which always holds the full history.
+ */
+export const getDashboardData = async (timeframes = [7, 30], days = null) => {
+  const precomputed = await fetchPrecomputedDashboard(timeframes);
+  if (precomputed) return { rows: precomputed, days: null };
+  return { rows: await buildDashboardData(timeframes, days), days };
+};
+
 /**
  * Merges price, revenue, and Open Interest (Historical + Live Gap Fill).
  */
-export const getDashboardData = async (timeframes = [7, 30]) => {
+export const buildDashboardData = async (timeframes = [7, 30], days = null) => {
   const [prices, revenue, oiHistory, liveOI] = await Promise.all([
     fetchHypePrice(),
     fetchProtocolRevenue(),
-    fetchOpenInterestHistory(),
+    fetchOpenInterestHistory(days),
     fetchLiveOpenInterest()
   ]);
 
@@ -100,126 +205,16 @@ export const getDashboardData = async (timeframes = [7, 30]) => {
       throw new Error("No revenue data found");
   }
 
-  // Create maps for quick lookup
-  const priceMap = new Map();
-  prices.forEach(p => {
-    const date = new Date(p.timestamp * 1000).toISOString().split('T')[0];
-    priceMap.set(date, p.price);
-  });
-
-  const oiMap = new Map();
-  oiHistory.forEach(d => {
-    oiMap.set(d.date, d.total_oi);
-  });
-
-  // Handle Live OI Gap Fill
-  // If we have live OI, attach it to TODAY's date
-  if (liveOI) {
-    const today = new Date().toISOString().split('T')[0];
-    
-    if (!oiMap.has(today)) {
-      oiMap.set(today, liveOI);
-    }
-  }
-
-  // Use revenue timestamps as the base timeline
-  const mergedData = revenue.map(r => {
-    const date = new Date(r.timestamp * 1000).toISOString().split('T')[0];
-    return {
-      timestamp: r.timestamp,
-      date,
-      dailyFees: r.dailyFees,
-      price: priceMap.get(date) || null,
-      openInterest: oiMap.get(date) || null
-    };
-  }).filter(d => d.dailyFees > 0);
-
-  // === FIX: Explicitly Backfill/Interpolate Missing OI Days ===
-  // If we have a gap between the last historical OI and today's live OI, fill it.
-  
-  // 1. Find the last day we have valid OI
-  let lastOIDateIndex = -1;
-  for (let i = mergedData.length - 1; i >= 0; i--) {
-    if (mergedData[i].openInterest) {
-      lastOIDateIndex = i;
-      break;
-    }
-  }
-
-  // 2. If we have a live OI point but gaps before it (or if live OI wasn't merged yet)
-  const todayDate = new Date().toISOString().split('T')[0];
-  
-  // Ensure "Today" is in the dataset if it's not already
-  if (liveOI && mergedData[mergedData.length - 1]?.date !== todayDate) {
-    mergedData.push({
-      timestamp: Math.floor(Date.now() / 1000),
-      date: todayDate,
-      dailyFees: 0,
-      price: priceMap.get(todayDate) || null,
-      openInterest: liveOI
-    });
-  } else if (liveOI && mergedData[mergedData.length - 1]?.date === todayDate) {
-      // Force update today's OI in case it was null
-      mergedData[mergedData.length - 1].openInterest = liveOI;
-  }
-
-  // 3. Interpolate the gap (Linear Interpolation)
-  // Re-find last valid OI index after potentially adding today
-  let lastValidIndex = -1;
-  for (let i = 0; i < mergedData.length; i++) {
-      if (mergedData[i].openInterest) {
-          lastValidIndex = i;
-      } else if (lastValidIndex !== -1 && i < mergedData.length) {
-          // We are in a gap!
-          // Find next valid index
-          let nextValidIndex = -1;
-          for (let j = i + 1; j < mergedData.length; j++) {
-              if (mergedData[j].openInterest) {
-                  nextValidIndex = j;
-                  break;
-              }
-          }
-
-          if (nextValidIndex !== -1) {
-              // Interpolate between lastValidIndex and nextValidIndex
-              const startOI = mergedData[lastValidIndex].openInterest;
-              const endOI = mergedData[nextValidIndex].openInterest;
-              const steps = nextValidIndex - lastValidIndex;
-              const stepValue = (endOI - startOI) / steps;
-
-              for (let k = 1; k < steps; k++) {
-                  mergedData[lastValidIndex + k].openInterest = startOI + (stepValue * k);
-              }
-              // Fast forward loop
-              i = nextValidIndex - 1; 
-              lastValidIndex = nextValidIndex;
-          }
-      }
-  }
-
-  mergedData.sort((a, b) => a.timestamp - b.timestamp);
-
+  // Align everything on integer day indexes and fill OI gaps (linear in days)
+  const mergedData = joinTimeline(revenue, prices, oiHistory, liveOI);
 
-  // Calculate moving averages for Revenue
+  // Calculate moving averages for Revenue (all timeframes from one prefix sum)
+  const averages = annualizedAverages(mergedData.map(d => d.dailyFees), timeframes);
   return mergedData.map((day, idx) => {
     const result = { ...day };
-    
     timeframes.forEach(tf => {
-      // Logic for MA calculation remains same
-      // ...
-      if (idx >= tf - 1) {
-        const slice = mergedData.slice(idx - tf + 1, idx + 1);
-        const sumFees = slice.reduce((acc, curr) => acc + curr.dailyFees, 0);
-        const avgDaily = sumFees / tf;
-        result[`annualized${tf}d`] = avgDaily * 365;
-      } else {
-        const slice = mergedData.slice(0, idx + 1);
-        const sumFees = slice.reduce((acc, curr) => acc + curr.dailyFees, 0);
-        const avgDaily = sumFees / (idx + 1);
-        result[`annualized${tf}d`] = avgDaily * 365;
-      }
+      result[`annualized${tf}d`] = averages[tf][idx];
     });
-    
     return result;
   });
 };
@@ -0,0 +1,26 @@
+/**
+ * Annualized moving averages of a daily series for several windows at once.
+ *
+ * One running prefix sum replaces a slice + reduce per day and window, so the
+ * cost is O(n * timeframes) with no intermediate arrays. The first tf - 1 days
+ * average over the days available so far. Mirrored by annualized_averages in
+ * build_dashboard.py; tests/test_rolling.py checks it against the original loop.
+ */
+export const annualizedAverages = (values, timeframes) => {
+  const n = values.length;
+  const prefix = new Float64Array(n + 1);
+  for (let i = 0; i < n; i++) {
+    prefix[i + 1] = prefix[i] + values[i];
+  }
+
+  const series = {};
+  timeframes.forEach(tf => {
+    const out = new Float64Array(n);
+    for (let i = 0; i < n; i++) {
+      const lo = i >= tf ? i + 1 - tf : 0;
+      out[i] = (prefix[i + 1] - prefix[lo]) / (i + 1 - lo) * 365;
+    }
+    series[tf] = out;
+  });
+  return series;
+};
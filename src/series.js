@@ -0,0 +1,56 @@
+/**
+ * Decoder for the chunked binary daily series written by series_bin.py (the
+ * byte layout is documented there). Each chunk is one year: a 32-byte
+ * header, int32 value deltas in quanta and uint16 day offsets, both read in
+ * place as typed arrays. series_bin.py verify checks this decoder against
+ * the Python one.
+ */
+
+const MAGIC = 0x53544c48; // 'HLTS' as a little-endian uint32
+const VERSION = 1;
+const HEADER_BYTES = 32;
+const LITTLE_ENDIAN = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+/**
+ * ArrayBuffer -> { days: Int32Array (days since epoch), values: Float64Array }
+ */
+export const decodeSeriesChunk = buffer => {
+  const view = new DataView(buffer);
+  if (view.getUint32(0, true) !== MAGIC || view.getUint8(4) !== VERSION) {
+    throw new Error('Not a version 1 series chunk');
+  }
+  const start = view.getInt32(8, true);
+  const n = view.getUint32(12, true);
+  const quantum = view.getFloat64(16, true);
+  let q = view.getFloat64(24, true);
+
+  let deltas;
+  let offsets;
+  if (LITTLE_ENDIAN) {
+    deltas = new Int32Array(buffer, HEADER_BYTES, n);
+    offsets = new Uint16Array(buffer, HEADER_BYTES + 4 * n, n);
+  } else {
+    deltas = new Int32Array(n);
+    offsets = new Uint16Array(n);
+    for (let i = 0; i < n; i++) {
+      deltas[i] = view.getInt32(HEADER_BYTES + 4 * i, true);
+      offsets[i] = view.getUint16(HEADER_BYTES + 4 * n + 2 * i, true);
+    }
+  }
+
+  const days = new Int32Array(n);
+  const values = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    q += deltas[i];
+    days[i] = start + offsets[i];
+    values[i] = q * quantum;
+  }
+  return { days, values };
+};
+
+/**
+ * Index entries needed for points on or after fromDate ('YYYY-MM-DD'); every
+ * chunk when fromDate is null.
+ */
+export const chunksFrom = (index, fromDate) =>
+  index.chunks.filter(chunk => !fromDate || chunk.end >= fromDate);
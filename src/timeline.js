@@ -0,0 +1,109 @@
+/**
+ * Date-indexed join of revenue, price and OI.
+ *
+ * Every source is keyed by an integer UTC day (days since epoch) instead of a
+ * YYYY-MM-DD string, prices and OI go into dense arrays over the revenue
+ * range, and OI gaps are filled with one backward and one forward sweep, so
+ * the whole merge is linear in the number of days. Mirrored by merge() in
+ * build_dashboard.py; tests/test_build_dashboard.py checks both give the same
+ * rows.
+ */
+
+const DAY_MS = 86400 * 1000;
+
+export const dayOfTimestamp = ts => Math.floor(ts / 86400);
+
+// 'YYYY-MM-DD' -> day index without going through a Date object per row
+export const dayOfDate = date =>
+  Date.UTC(+date.slice(0, 4), +date.slice(5, 7) - 1, +date.slice(8, 10)) / DAY_MS;
+
+export const dateOfDay = day => new Date(day * DAY_MS).toISOString().slice(0, 10);
+
+/**
+ * Linear interpolation of rows[i][key] across interior gaps, using days[i] as
+ * the x coordinate. Falsy values count as missing; leading and trailing gaps
+ * are left as they are.
+ */
+export const interpolateGaps = (rows, days, key) => {
+  const n = rows.length;
+  const valid = new Uint8Array(n);
+  const next = new Int32Array(n);
+  for (let i = n - 1, j = -1; i >= 0; i--) {
+    valid[i] = rows[i][key] ? 1 : 0;
+    next[i] = j;
+    if (valid[i]) j = i;
+  }
+
+  let prev = -1;
+  for (let i = 0; i < n; i++) {
+    if (valid[i]) {
+      prev = i;
+      continue;
+    }
+    const j = next[i];
+    if (prev === -1 || j === -1) continue;
+    const start = rows[prev][key];
+    const step = (rows[j][key] - start) / (days[j] - days[prev]);
+    rows[i][key] = start + step * (days[i] - days[prev]);
+  }
+};
+
+/**
+ * Revenue timeline (days with fees > 0) joined with price and OI, today's
+ * live OI attached to the last day (appended if needed), OI gaps filled.
+ */
+export const joinTimeline = (revenue, prices, oiHistory, liveOI, now = Date.now()) => {
+  const today = Math.floor(now / DAY_MS);
+
+  const base = revenue.filter(r => r.dailyFees > 0).sort((a, b) => a.timestamp - b.timestamp);
+  let lo = today;
+  let hi = today;
+  base.forEach(r => {
+    const day = dayOfTimestamp(r.timestamp);
+    if (day < lo) lo = day;
+    if (day > hi) hi = day;
+  });
+
+  // Dense per-day lookups over [lo, hi]; anything outside never joins
+  const size = hi - lo + 1;
+  const priceByDay = new Array(size).fill(null);
+  prices.forEach(p => {
+    const day = dayOfTimestamp(p.timestamp);
+    if (day >= lo && day <= hi) priceByDay[day - lo] = p.price;
+  });
+  const oiByDay = new Array(size).fill(null);
+  oiHistory.forEach(d => {
+    const day = dayOfDate(d.date);
+    if (day >= lo && day <= hi) oiByDay[day - lo] = d.total_oi;
+  });
+  if (liveOI && !oiByDay[today - lo]) oiByDay[today - lo] = liveOI;
+
+  const days = [];
+  const rows = base.map(r => {
+    const day = dayOfTimestamp(r.timestamp);
+    days.push(day);
+    return {
+      timestamp: r.timestamp,
+      date: dateOfDay(day),
+      dailyFees: r.dailyFees,
+      price: priceByDay[day - lo] || null,
+      openInterest: oiByDay[day - lo] || null
+    };
+  });
+
+  if (liveOI && days[days.length - 1] !== today) {
+    days.push(today);
+    rows.push({
+      timestamp: Math.floor(now / 1000),
+      date: dateOfDay(today),
+      dailyFees: 0,
+      price: priceByDay[today - lo] || null,
+      openInterest: liveOI
+    });
+  } else if (liveOI) {
+    rows[rows.length - 1].openInterest = liveOI;
+  }
+
+  interpolateGaps(rows, days, 'openInterest');
+  return rows;
+};
@@ -0,0 +1,271 @@
+
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+import lz4.frame
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Synthetic stand-ins for everything the data scripts read, so the pipeline
+# can be benchmarked (bench_pipeline.py) without the requester-pays bucket
+# or the explorers:
+#
+# - asset_ctxs/YYYYMMDD.csv.lz4 days in the archive's layout and CSV schema,
+#   plus LocalArchiveClient, which serves a directory of them through the
+#   boto3 calls archive_client makes
+# - Etherscan tokentx / Tronscan trc20 transfer rows and a DefiLlama
+#   stablecoincharts payload, plus serve_mock_apis() to put them behind
+#   local HTTP endpoints shaped like the real ones
+
+HEADER = ['time', 'coin', 'funding', 'open_interest', 'prev_day_px', 'day_ntl_vlm',
+          'premium', 'oracle_px', 'mark_px', 'mid_px', 'impact_bid_px', 'impact_ask_px']
+
+ETH_TETHER_MULTISIG = "0xc6cde7c39eb2f0f0095f41570af89efc2c1ea828"
+TRON_TETHER_MULTISIG = "TBPxhVAsuzoFnKyXtc1o2UySEydPHgATto"
+TRON_TREASURY = "TKHuVq1oKVruCGLvqVexFs6dawKv6fQgFs"
+
+# --- asset_ctxs ---
+
+def _day(day):
+    return datetime.strptime(str(day).replace("-", ""), "%Y%m%d").replace(tzinfo=timezone.utc)
+
+def asset_ctxs_csv(day, coins=200, snapshots=1440, bad_ratio=0.001, seed=1):
+    # One day of asset contexts: every coin at every snapshot, sorted by time.
+    # Prices random-walk per coin; bad_ratio of OI cells are left empty, as
+    # the archive does for coins without data yet
+    rng = random.Random(f"{day}-{seed}")
+    start = _day(day)
+    prices = [10 + c * 0.37 + rng.random() for c in range(coins)]
+    ois = [1000 + rng.random() * 1e5 for _ in range(coins)]
+    out = [",".join(HEADER)]
+    for s in range(snapshots):
+        t = (start + timedelta(seconds=s * 86400 // snapshots)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for c in range(coins):
+            prices[c] *= 1 + rng.gauss(0, 0.001)
+            ois[c] *= 1 + rng.gauss(0, 0.002)
+            px = f"{prices[c]:.4f}"
+            oi = "" if rng.random() < bad_ratio else f"{ois[c]:.2f}"
+            out.append(f"{t},COIN{c},0.0000125,{oi},{px},123456.7,0.0001,{px},{px},{px},{px},{px}")
+    return "\n".join(out) + "\n"
+
+def asset_ctxs_day(day, **kwargs):
+    # Compressed bytes, as stored in the bucket
+    return lz4.frame.compress(asset_ctxs_csv(day, **kwargs).encode())
+
+def write_archive(root, start, days, **kwargs):
+    # root/asset_ctxs/YYYYMMDD.csv.lz4 for `days` days from start; existing
+    # files are kept so repeated benchmark runs reuse them
+    first = _day(start)
+    keys = []
+    for i in range(days):
+        key = f"asset_ctxs/{(first + timedelta(days=i)).strftime('%Y%m%d')}.csv.lz4"
+        path = os.path.join(root, key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(asset_ctxs_day(key[len("asset_ctxs/"):-len(".csv.lz4")], **kwargs))
+            os.replace(path + ".tmp", path)
+        keys.append(key)
+    return keys
+
+class _Paginator:
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, **kwargs):
+        token = None
+        while True:
+            page = self.client.list_objects_v2(ContinuationToken=token, **kwargs)
+            yield page
+            token = page.get('NextContinuationToken')
+            if not token:
+                return
+
+class LocalArchiveClient:
+    # The subset of the boto3 S3 client archive_client uses, backed by a
+    # local directory; latency_s is added to every request to mimic S3
+    def __init__(self, root, latency_s=0.0):
+        self.root = root
+        self.latency_s = latency_s
+        self.requests = 0
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def _request(self):
+        self.requests += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _missing(self, key, operation):
+        from botocore.exceptions import ClientError
+        return ClientError({'Error': {'Code': '404', 'Message': f"{key} not found"}}, operation)
+
+    def get_object(self, Bucket=None, Key=None, **kwargs):
+        self._request()
+        path = self._path(Key)
+        if not os.path.exists(path):
+            raise self._missing(Key, 'GetObject')
+        return {'Body': open(path, 'rb'), 'ContentLength': os.path.getsize(path)}
+
+    def head_object(self, Bucket=None, Key=None, **kwargs):
+        self._request()
+        path = self._path(Key)
+        if not os.path.exists(path):
+            raise self._missing(Key, 'HeadObject')
+        return {'ContentLength': os.path.getsize(path), 'ETag': f'"{os.path.getmtime(path)}"'}
+
+    def list_objects_v2(self, Bucket=None, Prefix="", StartAfter=None, MaxKeys=1000,
+                        ContinuationToken=None, Delimiter=None, **kwargs):
+        self._request()
+        keys = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                if key.startswith(Prefix) and not key.endswith(".tmp"):
+                    keys.append(key)
+        keys.sort()
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [k for k in keys if k > after]
+        page, rest = keys[:MaxKeys], keys[MaxKeys:]
+        result = {'Contents': [{
+            'Key': k,
+            'Size': os.path.getsize(self._path(k)),
+            'ETag': f'"{int(os.path.getmtime(self._path(k)))}"',
+            'LastModified': datetime.fromtimestamp(os.path.getmtime(self._path(k)), tz=timezone.utc),
+        } for k in page], 'KeyCount': len(page)}
+        if rest:
+            result['NextContinuationToken'] = page[-1]
+        return result
+
+    def get_paginator(self, name):
+        return _Paginator(self)
+
+# --- Explorer and DefiLlama payloads ---
+
+def etherscan_transfers(count, start_ts, end_ts, mint_ratio=0.3, seed=1):
+    # tokentx rows for the Tether multisig, newest first; mint_ratio of them
+    # are sent from the multisig (mints), the rest are other transfers
+    rng = random.Random(seed)
+    span = end_ts - start_ts
+    rows = []
+    for i in range(count):
+        ts = end_ts - i * span // max(count, 1)
+        mint = rng.random() < mint_ratio
+        amount = rng.choice([1e8, 5e8, 1e9, 2e9]) if mint else rng.random() * 1e7
+        rows.append({
+            "timeStamp": str(ts),
+            "blockNumber": str(12_000_000 + (ts - start_ts) // 12),
+            "hash": f"0x{rng.getrandbits(256):064x}",
+            "logIndex": "0",
+            "from": ETH_TETHER_MULTISIG if mint else f"0x{rng.getrandbits(160):040x}",
+            "to": f"0x{rng.getrandbits(160):040x}",
+            "value": str(int(amount * 1e6)),
+        })
+    return rows
+
+def tronscan_transfers(count, start_ts, end_ts, mint_ratio=0.3, seed=2):
+    # trc20 transfer rows, newest first; mints go multisig -> treasury
+    rng = random.Random(seed)
+    span = end_ts - start_ts
+    rows = []
+    for i in range(count):
+        ts = end_ts - i * span // max(count, 1)
+        mint = rng.random() < mint_ratio
+        amount = rng.choice([1e8, 5e8, 1e9, 2e9]) if mint else rng.random() * 1e7
+        rows.append({
+            "block_ts": ts * 1000,
+            "block": 20_000_000 + (ts - start_ts) // 3,
+            "transaction_id": f"{rng.getrandbits(256):064x}",
+            "from_address": TRON_TETHER_MULTISIG if mint else f"T{rng.getrandbits(160):040x}",
+            "to_address": TRON_TREASURY if mint else f"T{rng.getrandbits(160):040x}",
+            "quant": str(int(amount * 1e6)),
+        })
+    return rows
+
+def defillama_chart(days, start_ts=1609459200, seed=3):
+    # stablecoincharts/all: daily circulating USDT, growing with noise and
+    # occasional large issuance days
+    rng = random.Random(seed)
+    supply = 20e9
+    out = []
+    for i in range(days):
+        supply += rng.gauss(5e7, 2e8) + (rng.choice([1e9, 2e9]) if rng.random() < 0.03 else 0)
+        out.append({"date": str(start_ts + i * 86400), "totalCirculating": {"peggedUSD": supply}})
+    return out
+
+def fees_series(days, seed=4):
+    # Daily protocol fees with trend, noise and spikes (for the moving averages)
+    rng = random.Random(seed)
+    fees, level = [], 50_000.0
+    for _ in range(days):
+        level = max(1_000.0, level * (1 + rng.gauss(0.002, 0.03)))
+        fees.append(level * (8 if rng.random() < 0.01 else 1) * rng.uniform(0.7, 1.3))
+    return fees
+
+def serve_mock_apis(eth_rows, tron_rows, llama, host='127.0.0.1', port=0):
+    # Background HTTP server answering like Etherscan (/etherscan), Tronscan
+    # (/tronscan) and DefiLlama (/defillama). Returns (server, base url).
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            q = dict(urllib.parse.parse_qsl(url.query))
+            if url.path.startswith("/etherscan") and q.get("module") == "block":
+                ts = int(q["timestamp"])
+                body = {"status": "1", "result": str(12_000_000 + max(0, ts - 1609459200) // 12)}
+            elif url.path.startswith("/etherscan"):
+                rows = eth_rows
+                if "startblock" in q:
+                    rows = [r for r in rows if int(r["blockNumber"]) >= int(q["startblock"])]
+                if "endblock" in q:
+                    rows = [r for r in rows if int(r["blockNumber"]) <= int(q["endblock"])]
+                rows = sorted(rows, key=lambda r: int(r["blockNumber"]), reverse=q.get("sort") != "asc")
+                page, offset = int(q.get("page", 1)), int(q.get("offset", 100))
+                if page * offset > 10_000:
+                    body = {"status": "0", "message": "Result window is too large", "result": None}
+                else:
+                    result = rows[(page - 1) * offset:page * offset]
+                    body = {"status": "1" if result else "0", "message": "OK", "result": result}
+            elif url.path.startswith("/tronscan"):
+                start, limit = int(q.get("start", 0)), int(q.get("limit", 20))
+                body = {"total": len(tron_rows), "token_transfers": tron_rows[start:start + limit]}
+            elif url.path.startswith("/defillama"):
+                body = llama
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic asset_ctxs archive to a local directory")
+    parser.add_argument('--root', default='.cache/synthetic_archive')
+    parser.add_argument('--start', default="20240101", help="First date, YYYYMMDD")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--coins', type=int, default=200)
+    parser.add_argument('--snapshots', type=int, default=1440, help="Snapshots per day (1440 = every minute)")
+    args = parser.parse_args()
+
+    keys = write_archive(args.root, args.start, args.days, coins=args.coins, snapshots=args.snapshots)
+    size = sum(os.path.getsize(os.path.join(args.root, k)) for k in keys)
+    print(f"{len(keys)} days in {args.root} ({size / 1e6:.1f} MB compressed)")
@@ -0,0 +1,80 @@
+
+import io
+import os
+import json
+import threading
+
+import archive_cache
+from archive_cache import ArchiveCache, CachedClient
+
+def test_blob_deleted_after_lookup_is_a_miss(tmp_path):
+    cache = ArchiveCache(str(tmp_path), max_bytes=1 << 20)
+    cache.store('b', 'k', 'ab12', io.BytesIO(b'data')).close()
+
+    # Another process sharing the directory evicted it
+    os.remove(cache._blob_path('ab12'))
+    assert cache.lookup('b', 'k') is None
+    assert 'b/k' not in cache.index
+
+def test_open_blob_survives_eviction(tmp_path):
+    cache = ArchiveCache(str(tmp_path), max_bytes=6)
+    f = cache.store('b', 'k1', 'aa01', io.BytesIO(b'first'))
+    # Pushes k1 out of the cache while its file is still open
+    cache.store('b', 'k2', 'bb02', io.BytesIO(b'second')).close()
+    assert 'b/k1' not in cache.index
+    assert f.read() == b'first'
+    f.close()
+
+def test_flush_writes_latest_index(tmp_path):
+    cache = ArchiveCache(str(tmp_path), max_bytes=1 << 20)
+
+    def worker(n):
+        for i in range(20):
+            cache.store('b', f'k{n}-{i}', f'{n:02d}{i:04d}', io.BytesIO(b'x')).close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.flush()
+
+    with open(cache.index_path) as f:
+        assert json.load(f) == cache.index
+    assert len(cache.index) == 80
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.calls.append(kwargs)
+        data = b'par' if 'Range' in kwargs else b'partial-and-more'
+        return {'Body': io.BytesIO(data), 'ETag': '"cd34"'}
+
+def test_ranged_get_bypasses_cache(tmp_path):
+    inner = RecordingClient()
+    client = CachedClient(inner, ArchiveCache(str(tmp_path), max_bytes=1 << 20))
+    assert client.get_object(Bucket='b', Key='k', Range='bytes=0-2')['Body'].read() == b'par'
+    assert client.cache.index == {}
+
+    # The whole object is still downloaded (and cached) on the next plain GET
+    assert client.get_object(Bucket='b', Key='k')['Body'].read() == b'partial-and-more'
+    assert client.get_object(Bucket='b', Key='k')['Body'].read() == b'partial-and-more'
+    assert len(inner.calls) == 2
+
+def test_index_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_cache, 'FLUSH_EVERY', 3)
+    cache = ArchiveCache(str(tmp_path), max_bytes=1 << 20)
+    for i in range(2):
+        cache.store('b', f'k{i}', f'ee{i:02d}', io.BytesIO(b'x')).close()
+    assert not os.path.exists(cache.index_path)
+
+    cache.store('b', 'k2', 'ee02', io.BytesIO(b'x')).close()
+    with open(cache.index_path) as f:
+        assert len(json.load(f)) == 3
+
+    cache.store('b', 'k3', 'ee03', io.BytesIO(b'x')).close()
+    CachedClient(None, cache).close()
+    with open(cache.index_path) as f:
+        assert len(json.load(f)) == 4
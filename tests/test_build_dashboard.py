@@ -0,0 +1,90 @@
+
+import os
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from http_client import HttpError
+import build_dashboard
+
+def test_upstream_failure_keeps_previous_file(tmp_path, monkeypatch):
+    output = str(tmp_path / "dashboard.json")
+    with open(output, "w") as f:
+        json.dump({"version": 1, "generated": 1}, f)
+
+    def down():
+        raise HttpError(429, build_dashboard.PRICE_API)
+
+    monkeypatch.setattr(build_dashboard, 'fetch_prices', down)
+    assert build_dashboard.build(live=False, output=output) is False
+    with open(output) as f:
+        assert json.load(f) == {"version": 1, "generated": 1}
+    assert not os.path.exists(output + ".tmp")
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# The in-browser fallback of buildDashboardData (src/api.js) minus the
+# fetches: joinTimeline + annualizedAverages on {prices, revenue, oi, live, now}
+NODE_JOIN = """
+import { readFileSync } from 'fs';
+import { pathToFileURL } from 'url';
+const src = process.env.SRC_DIR;
+const { joinTimeline } = await import(pathToFileURL(`${src}/timeline.js`).href);
+const { annualizedAverages } = await import(pathToFileURL(`${src}/rolling.js`).href);
+const { prices, revenue, oi, live, now, timeframes } = JSON.parse(readFileSync(0, 'utf8'));
+const merged = joinTimeline(revenue, prices, oi, live, now * 1000);
+const averages = annualizedAverages(merged.map(d => d.dailyFees), timeframes);
+console.log(JSON.stringify(merged.map((day, idx) => {
+  const result = { ...day };
+  timeframes.forEach(tf => { result[`annualized${tf}d`] = averages[tf][idx]; });
+  return result;
+})));
+"""
+
+DAY = 86400
+START = 1_704_067_200  # 2024-01-01
+
+def _fixture():
+    # 40 revenue days (two without fees), prices missing on a few days, OI
+    # starting late with interior holes of 1 and 6 days
+    revenue = [{"timestamp": START + d * DAY, "dailyFees": 0.0 if d in (5, 17) else 1e6 + d * 12_345.6}
+               for d in range(40)]
+    prices = [{"timestamp": START + d * DAY + 3600, "price": 20 + d * 0.37}
+              for d in range(-3, 42) if d not in (2, 9, 10, 33)]
+    oi = [{"date": f"2024-{1 + (d >= 31):02d}-{d + 1 - 31 * (d >= 31):02d}", "total_oi": 4e9 + d * 1.7e7}
+          for d in range(3, 37) if d not in (12, 20, 21, 22, 23, 24, 25)]
+    return prices, revenue, oi
+
+def _python_rows(prices, revenue, oi, live, now, timeframes):
+    return build_dashboard.merge(prices, revenue, oi, live, timeframes, now=now)
+
+def _js_rows(prices, revenue, oi, live, now, timeframes):
+    payload = {"prices": prices, "revenue": revenue, "oi": oi, "live": live, "now": now, "timeframes": timeframes}
+    proc = subprocess.run(["node", "--input-type=module", "-e", NODE_JOIN], input=json.dumps(payload),
+                          capture_output=True, text=True, env={**os.environ, "SRC_DIR": SRC}, check=True)
+    return json.loads(proc.stdout)
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+@pytest.mark.parametrize("live, today", [(None, 45), (5.5e9, 45), (5.5e9, 39)])
+def test_python_and_js_join_agree(live, today):
+    prices, revenue, oi = _fixture()
+    now = START + today * DAY + 7200
+    timeframes = [1, 7, 30]
+    expected = _python_rows(prices, revenue, oi, live, now, timeframes)
+    got = _js_rows(prices, revenue, oi, live, now, timeframes)
+
+    assert [row["date"] for row in got] == [row["date"] for row in expected]
+    for js, py in zip(got, expected):
+        assert set(js) == set(py)
+        for key, value in py.items():
+            assert js[key] == (pytest.approx(value, rel=1e-12) if isinstance(value, float) else value), key
+
+    # The fixture really exercises the edge cases
+    by_date = {row["date"]: row for row in expected}
+    assert by_date["2024-01-01"]["openInterest"] is None
+    assert by_date["2024-01-13"]["openInterest"] == pytest.approx(4e9 + 12 * 1.7e7)
+    assert by_date["2024-01-24"]["openInterest"] == pytest.approx(4e9 + 23 * 1.7e7)
+    assert any(row["price"] is None for row in expected)
+    assert len(expected) == 38 + (live is not None and today != 39)
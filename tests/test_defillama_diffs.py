@@ -0,0 +1,117 @@
+
+import os
+import asyncio
+import sys
+import json
+
+import pytest
+
+import mint_ledger
+import fetch_mints_comparison as fmc
+
+# Trimmed stablecoincharts/all?stablecoin=1 response (USDT), late Dec 2020 to
+# Feb 10 2021; the >= 800M days match public/tether_mints_defillama.json
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'stablecoincharts_usdt.json')
+
+@pytest.fixture
+def data():
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def _supply(entry):
+    return entry['totalCirculating']['peggedUSD']
+
+def test_full_sequence(data):
+    mints, cursor = fmc.defillama_diffs(data)
+    first = next(i for i, e in enumerate(data) if int(e['date']) >= fmc.START_DATE.timestamp())
+
+    # One change per day from START_DATE on, the first one against the day before
+    assert [m['timestamp'] for m in mints] == [int(e['date']) for e in data[first:]]
+    assert [m['amount'] for m in mints] == [_supply(b) - _supply(a) for a, b in zip(data[first - 1:], data[first:])]
+    assert mints[0]['date'] == '2021-01-01'
+    assert cursor == {'timestamp': int(data[-1]['date']), 'circulating': _supply(data[-1])}
+    big = [m['date'] for m in mints if m['amount'] >= fmc.MINT_THRESHOLD]
+    assert big == ['2021-01-03', '2021-02-04', '2021-02-06', '2021-02-08', '2021-02-10']
+
+@pytest.mark.parametrize('split', [1, 10, 30])
+def test_resume_from_cursor(data, split):
+    full, full_cursor = fmc.defillama_diffs(data)
+    # An earlier run saw the response up to some day, this one sees it all
+    head, cursor = fmc.defillama_diffs(data[:len(data) - split])
+    tail, cursor = fmc.defillama_diffs(data, cursor)
+    assert head + tail == full
+    assert cursor == full_cursor
+
+def test_resume_with_nothing_new(data):
+    _, cursor = fmc.defillama_diffs(data)
+    mints, again = fmc.defillama_diffs(data, cursor)
+    assert mints == [] and again == cursor
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    # main() against the fixture, a temp ledger/state/public dir and no explorers
+    os.makedirs(tmp_path / 'public')
+    state_path = str(tmp_path / 'state.json')
+    ledger_path = str(tmp_path / 'mints.sqlite')
+    connect = mint_ledger.connect
+    load_state, save_state = fmc.load_state, fmc.save_state
+
+    async def no_mints(*args, **kwargs):
+        return [], None
+
+    monkeypatch.setattr(fmc, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(fmc, 'DEFILLAMA_FIXTURE', FIXTURE)
+    monkeypatch.setattr(fmc, 'fetch_ethereum_mints', no_mints)
+    monkeypatch.setattr(fmc, 'fetch_tron_mints', no_mints)
+    monkeypatch.setattr(fmc, 'load_state', lambda: load_state(state_path))
+    monkeypatch.setattr(fmc, 'save_state', lambda state: save_state(state, state_path))
+    monkeypatch.setattr(mint_ledger, 'connect', lambda: connect(ledger_path))
+
+    def run(*flags):
+        monkeypatch.setattr(sys, 'argv', ['fetch_mints_comparison.py', *flags])
+        fmc.main()
+        with open(state_path) as f:
+            state = json.load(f)
+        conn = connect(ledger_path)
+        rows = [dict(r) for r in conn.execute("SELECT date, amount, circulating_after FROM defillama ORDER BY date")]
+        conn.close()
+        return state, rows
+    run.state_path = state_path
+    return run
+
+def test_full_recomputes_from_scratch(data, isolated):
+    expected = [{'date': m['date'], 'amount': m['amount'], 'circulating_after': m['circulating_after']}
+                for m in fmc.defillama_diffs(data)[0]]
+    state, rows = isolated()
+    assert rows == expected
+
+    # A cursor that disagrees with upstream (DefiLlama revised its history):
+    # a normal run trusts it and adds nothing, --full ignores it
+    state['cursors']['defillama'] = {'timestamp': state['cursors']['defillama']['timestamp'] - 86400 * 5,
+                                     'circulating': 1.0}
+    with open(isolated.state_path, 'w') as f:
+        json.dump(state, f)
+    _, rows = isolated()
+    assert rows != expected
+
+    state, rows = isolated('--full')
+    assert rows == expected
+    assert state['cursors']['defillama'] == {'timestamp': int(data[-1]['date']), 'circulating': _supply(data[-1])}
+
+def test_backfill_keeps_every_mint_log_of_a_tx(monkeypatch):
+    # Two mint transfers in one transaction, the second also returned by an
+    # overlapping block range
+    def row(log_index, value):
+        return {"hash": "0xabc", "logIndex": str(log_index), "timeStamp": "1704067200", "blockNumber": "100",
+                "from": fmc.ETH_TETHER_MULTISIG, "to": "0xdef", "value": str(value)}
+
+    async def block_at(api_key, limiter, ts, closest="after"):
+        return 100 if closest == "after" else 101
+
+    async def scan(api_key, limiter, lo, hi):
+        return [row(5, 10**15), row(7, 2 * 10**15)] if lo == 100 else [row(7, 2 * 10**15)]
+
+    monkeypatch.setattr(fmc, 'etherscan_block_at', block_at)
+    monkeypatch.setattr(fmc, 'etherscan_range', scan)
+    mints, newest = asyncio.run(fmc.backfill_ethereum_mints("key", None, ranges=2))
+    assert [(m["tx"], m["log_index"], m["amount"]) for m in mints] == [("0xabc", 5, 1e9), ("0xabc", 7, 2e9)]
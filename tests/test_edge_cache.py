@@ -0,0 +1,60 @@
+
+import time
+
+import pytest
+
+from edge_cache import EdgeCache
+
+class FlakyClient:
+    # Answers until `down` is set, then raises like an unreachable upstream
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+
+    def request(self, method, url, headers=None, body=None):
+        self.calls += 1
+        if self.down:
+            raise OSError("connection refused")
+        return 200, {}, b'{"n": %d}' % self.calls
+
+SOURCES = {'fees': {'url': 'http://upstream.invalid/fees', 'ttl': 10, 'swr': 20, 'sie': 100}}
+
+def _age(cache, name, seconds):
+    cache.entries[name]['fetched_at'] = time.time() - seconds
+
+def test_expired_entry_served_when_upstream_fails():
+    client = FlakyClient()
+    cache = EdgeCache(SOURCES, client=client)
+    entry, status = cache.get('fees')
+    assert status == 'MISS'
+
+    client.down = True
+    _age(cache, 'fees', 50)  # past ttl + swr, inside sie
+    stale, status = cache.get('fees')
+    assert status == 'STALE-IF-ERROR'
+    assert stale['body'] == entry['body']
+
+def test_502_only_without_a_usable_entry():
+    client = FlakyClient()
+    client.down = True
+    cache = EdgeCache(SOURCES, client=client)
+    with pytest.raises(OSError):
+        cache.get('fees')
+
+    client.down = False
+    cache.get('fees')
+    client.down = True
+    _age(cache, 'fees', 200)  # past ttl + swr + sie
+    with pytest.raises(OSError):
+        cache.get('fees')
+
+def test_recovers_once_upstream_is_back():
+    client = FlakyClient()
+    cache = EdgeCache(SOURCES, client=client)
+    cache.get('fees')
+    client.down = True
+    _age(cache, 'fees', 50)
+    assert cache.get('fees')[1] == 'STALE-IF-ERROR'
+    client.down = False
+    entry, status = cache.get('fees')
+    assert status == 'MISS' and entry['body'] == b'{"n": 3}'
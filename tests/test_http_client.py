@@ -0,0 +1,57 @@
+
+import socket
+import threading
+
+import http_client
+from http_client import HttpClient
+
+def _serve(responses, close_after_response):
+    # Raw HTTP/1.1 server on localhost: answers one request per connection
+    # with the next response, then drops the connection without telling
+    # the client (what an idle keep-alive timeout looks like)
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+
+    def loop():
+        for response in responses:
+            conn, _ = sock.accept()
+            data = b''
+            while b'\r\n\r\n' not in data:
+                data += conn.recv(65536)
+            conn.sendall(response)
+            if close_after_response:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+        sock.close()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+def _response(status, body=b'{}', extra=b''):
+    return (f"HTTP/1.1 {status} X\r\nContent-Length: {len(body)}\r\n".encode()
+            + b"Connection: keep-alive\r\n" + extra + b"\r\n" + body)
+
+def test_stale_keepalive_reconnects_without_retry(monkeypatch):
+    base = _serve([_response(200, b'{"a": 1}'), _response(200, b'{"a": 2}')], close_after_response=True)
+    slept = []
+    monkeypatch.setattr(http_client.time, 'sleep', slept.append)
+    client = HttpClient(max_retries=0)
+    assert client.get_json(base + '/one') == {'a': 1}
+    # The pooled connection is dead by now; this goes out on a new one
+    assert client.get_json(base + '/two') == {'a': 2}
+    stats = client.stats()
+    assert stats['retries'] == 0 and stats['reconnects'] == 1 and stats['failures'] == 0
+    assert slept == []
+
+def test_retry_after_is_clamped(monkeypatch):
+    base = _serve([_response(503, extra=b"Retry-After: 86400\r\n"), _response(200)], close_after_response=True)
+    slept = []
+    monkeypatch.setattr(http_client.time, 'sleep', slept.append)
+    client = HttpClient(retry_after_max=2.5)
+    assert client.get_json(base) == {}
+    assert slept == [2.5]
+
+def test_bad_retry_after_falls_back_to_backoff():
+    assert http_client._retry_after('soon') is None
+    assert http_client._retry_after('120') == 120.0
@@ -0,0 +1,103 @@
+
+import sqlite3
+from datetime import datetime, timezone
+
+import mint_ledger
+
+def _mint(tx, date, amount, chain="ethereum", hour=0):
+    ts = int(datetime.fromisoformat(date).replace(tzinfo=timezone.utc).timestamp()) + hour * 3600
+    return {"chain": chain, "tx": tx, "timestamp": ts, "date": date, "amount": amount}
+
+def _daily(conn, threshold):
+    return {r["date"]: (r["total"], r["num_txs"]) for r in
+            conn.execute("SELECT * FROM daily_totals WHERE threshold = ?", (float(threshold),))}
+
+def test_rollup_across_two_runs(tmp_path):
+    conn = mint_ledger.connect(str(tmp_path / "mints.sqlite"))
+    first = [_mint("a", "2024-01-01", 1e9), _mint("b", "2024-01-01", 2e8, chain="tron"),
+             _mint("c", "2024-01-03", 5e8)]
+    assert mint_ledger.upsert_mints(conn, first) == 3
+    assert mint_ledger.rollup(conn, [1e8, 8e8])["daily"] == {
+        "periods": ["2024-01-01", "2024-01-03"],
+        "total": [[1_200_000_000, 500_000_000], [1_000_000_000, 0]],
+        "count": [[2, 1], [1, 0]],
+    }
+
+    # Second run: one re-fetched mint and two new ones, one on a new day
+    second = [_mint("a", "2024-01-01", 1e9), _mint("d", "2024-01-03", 9e8, hour=5),
+              _mint("e", "2024-01-08", 3e8)]
+    assert mint_ledger.upsert_mints(conn, second) == 2
+    assert _daily(conn, 1e8) == {"2024-01-01": (1.2e9, 2), "2024-01-03": (1.4e9, 2), "2024-01-08": (3e8, 1)}
+    assert _daily(conn, 8e8) == {"2024-01-01": (1e9, 1), "2024-01-03": (9e8, 1)}
+
+    result = mint_ledger.rollup(conn, [1e8, 8e8])
+    assert result["weekly"]["periods"] == ["2024-01-01", "2024-01-08"]
+    assert result["weekly"]["total"] == [[2_600_000_000, 300_000_000], [1_900_000_000, 0]]
+    assert result["monthly"]["count"] == [[5], [2]]
+
+def test_only_touched_days_are_recomputed(tmp_path):
+    conn = mint_ledger.connect(str(tmp_path / "mints.sqlite"))
+    mint_ledger.upsert_mints(conn, [_mint("a", "2024-01-01", 1e9), _mint("b", "2024-01-02", 1e9)])
+    mint_ledger.track_thresholds(conn, [8e8])
+    # Mark an untouched day; an incremental upsert must leave it alone
+    conn.execute("UPDATE daily_totals SET num_txs = 99 WHERE date = '2024-01-01'")
+    mint_ledger.upsert_mints(conn, [_mint("c", "2024-01-02", 9e8, hour=1)])
+    assert _daily(conn, 8e8) == {"2024-01-01": (1e9, 99), "2024-01-02": (1.9e9, 2)}
+
+def test_moved_mint_refreshes_both_days(tmp_path):
+    conn = mint_ledger.connect(str(tmp_path / "mints.sqlite"))
+    mint_ledger.track_thresholds(conn, [1e8])
+    mint_ledger.upsert_mints(conn, [_mint("a", "2024-01-01", 1e9)])
+    mint_ledger.upsert_mints(conn, [_mint("a", "2024-01-02", 1e9)])
+    assert _daily(conn, 1e8) == {"2024-01-02": (1e9, 1)}
+
+def test_onchain_days_reads_qualifying_days(tmp_path):
+    conn = mint_ledger.connect(str(tmp_path / "mints.sqlite"))
+    mint_ledger.upsert_mints(conn, [_mint("a", "2024-01-01", 9e8), _mint("b", "2024-01-01", 5e8, chain="tron", hour=1),
+                                    _mint("c", "2024-01-02", 7e8)])
+    assert mint_ledger.onchain_days(conn, 5e8) == [{
+        "date": "2024-01-01",
+        "total_minted": 1.4e9,
+        "chains": ["ethereum", "tron"],
+        "num_txs": 2,
+        "transactions": [{"amount": 9e8, "chain": "ethereum", "tx": "a"},
+                         {"amount": 5e8, "chain": "tron", "tx": "b"}],
+    }, {
+        "date": "2024-01-02",
+        "total_minted": 7e8,
+        "chains": ["ethereum"],
+        "num_txs": 1,
+        "transactions": [{"amount": 7e8, "chain": "ethereum", "tx": "c"}],
+    }]
+    assert [d["date"] for d in mint_ledger.onchain_days(conn, 8e8)] == ["2024-01-01"]
+
+def test_two_mint_logs_in_one_tx(tmp_path):
+    conn = mint_ledger.connect(str(tmp_path / "mints.sqlite"))
+    logs = [{**_mint("0xabc", "2024-01-01", 1e9), "log_index": 5},
+            {**_mint("0xabc", "2024-01-01", 1e9), "log_index": 7}]
+    assert mint_ledger.upsert_mints(conn, logs) == 2
+    assert mint_ledger.upsert_mints(conn, logs) == 0
+    assert [(m["tx"], m["log_index"]) for m in mint_ledger.all_mints(conn)] == [("0xabc", 5), ("0xabc", 7)]
+    assert mint_ledger.onchain_days(conn, 8e8)[0]["total_minted"] == 2e9
+
+def test_legacy_rows_migrate_and_get_replaced(tmp_path):
+    path = str(tmp_path / "mints.sqlite")
+    old = sqlite3.connect(path)
+    old.executescript("""
+        CREATE TABLE mints (chain TEXT NOT NULL, tx TEXT NOT NULL, timestamp INTEGER NOT NULL,
+                            date TEXT NOT NULL, amount REAL NOT NULL, PRIMARY KEY (chain, tx));
+        CREATE INDEX mints_date ON mints (date);
+    """)
+    m = _mint("0xabc", "2024-01-01", 1e9)
+    old.execute("INSERT INTO mints VALUES (?, ?, ?, ?, ?)", (m["chain"], m["tx"], m["timestamp"], m["date"], m["amount"]))
+    old.commit()
+    old.close()
+
+    conn = mint_ledger.connect(path)
+    assert [r["log_index"] for r in mint_ledger.all_mints(conn)] == [-1]
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'mints_date'").fetchone()
+
+    # Re-fetched with log indexes: the legacy row gives way to both logs
+    mint_ledger.upsert_mints(conn, [{**m, "log_index": 5}, {**m, "log_index": 7}])
+    assert [r["log_index"] for r in mint_ledger.all_mints(conn)] == [5, 7]
+    assert mint_ledger.onchain_days(conn, 8e8)[0]["num_txs"] == 2
@@ -0,0 +1,44 @@
+
+import io
+import csv
+
+import oi_engine
+
+ROWS = [
+    ['time', 'coin', 'open_interest', 'mark_px'],
+    ['2024-01-01T00:00:00Z', 'BTC', '12.5', '42000.123456789'],
+    ['2024-01-01T00:00:00Z', 'A-VERY-LONG-COIN-NAME', '', '1.0'],
+    ['2024-01-01T00:05:00Z', 'ETH', '300', ''],
+    ['2024-01-01T00:05:00Z', 'X', '0.000001', '7'],
+]
+
+def _columns(text, chunk_bytes=oi_engine.CHUNK_BYTES):
+    names = ['time', 'coin', 'open_interest', 'mark_px']
+    chunks = list(oi_engine.iter_column_chunks(io.BytesIO(text.encode()), names, chunk_bytes=chunk_bytes))
+    return {name: [v.decode() for chunk in chunks for v in chunk[name]] for name in names}
+
+def _expected():
+    return {name: [row[i] for row in ROWS[1:]] for i, name in enumerate(ROWS[0])}
+
+def _csv(terminator):
+    out = io.StringIO()
+    csv.writer(out, lineterminator=terminator).writerows(ROWS)
+    return out.getvalue()
+
+def test_split_matches_csv_module():
+    assert _columns(_csv('\n')) == _expected()
+
+def test_crlf_and_missing_final_newline():
+    assert _columns(_csv('\r\n')) == _expected()
+    assert _columns(_csv('\n').rstrip('\n')) == _expected()
+
+def test_small_blocks():
+    # Blocks cut on line boundaries; the last field sits at the end of the buffer
+    assert _columns(_csv('\n'), chunk_bytes=16) == _expected()
+
+def test_aggregate_by_time_masks_bad_rows():
+    columns = oi_engine.read_columns(io.BytesIO(_csv('\n').encode()), ['time', 'open_interest', 'mark_px'])
+    totals, skipped = oi_engine.aggregate(columns, by='time')
+    assert skipped == 2
+    assert totals[b'2024-01-01T00:00:00Z'] == 12.5 * 42000.123456789
+    assert totals[b'2024-01-01T00:05:00Z'] == 0.000001 * 7
@@ -0,0 +1,82 @@
+
+import os
+import json
+
+import pytest
+
+import oi_poller
+import build_history
+from oi_poller import OIPoller
+
+DAY = 86400
+T0 = 1760572800  # 2025-10-16 00:00:00 UTC
+
+class Client:
+    def stats_line(self):
+        return ""
+
+@pytest.fixture
+def poller(tmp_path):
+    history = tmp_path / 'oi_history.json'
+    history.write_text(json.dumps([{'date': '2025-10-15', 'total_oi': 5e9}]))
+    return OIPoller(client=Client(), history_path=str(history),
+                    live_path=str(tmp_path / 'cache' / 'live.json'))
+
+def _snap(t, total):
+    return {'time': t, 'total': total, 'by_coin': {'BTC': total}}
+
+def test_new_day_goes_to_live_file_not_history(poller):
+    before = open(poller.history_path).read()
+    poller.record(_snap(T0 - 60, 1e9))
+    poller.record(_snap(T0 + 5, 2e9))
+    poller.record(_snap(T0 + 65, 3e9))  # same day: first snapshot stays
+    assert open(poller.history_path).read() == before
+    assert build_history.load_live_days(poller.live_path) == {'2025-10-16': 2e9}
+
+def test_archive_day_is_not_recorded_and_is_pruned(poller):
+    poller.record(_snap(T0 - 2 * DAY + 5, 1e9))
+    poller.record(_snap(T0 - DAY + 5, 4e9))  # 2025-10-15 is in the history already
+    assert build_history.load_live_days(poller.live_path) == {}
+
+    os.makedirs(os.path.dirname(poller.live_path), exist_ok=True)
+    with open(poller.live_path, 'w') as f:
+        json.dump({'2025-10-15': 4e9}, f)
+    poller.record(_snap(T0 + 5, 2e9))
+    assert build_history.load_live_days(poller.live_path) == {'2025-10-16': 2e9}
+
+def test_merge_days():
+    existing = {'2025-10-14': {'date': '2025-10-14', 'total_oi': 1.0},
+                '2025-10-15': {'date': '2025-10-15', 'total_oi': 2.0, 'source': 'live'}}
+    fetched = {'2025-10-15': {'date': '2025-10-15', 'total_oi': 3.0}}
+    live = {'2025-10-14': 9.0, '2025-10-15': 9.0, '2025-10-16': 4.0}
+    merged = build_history.merge_days(existing, fetched, live)
+    assert merged == {'2025-10-14': {'date': '2025-10-14', 'total_oi': 1.0},
+                      '2025-10-15': {'date': '2025-10-15', 'total_oi': 3.0},
+                      '2025-10-16': {'date': '2025-10-16', 'total_oi': 4.0, 'source': 'live'}}
+
+def test_run_skips_missed_slots(poller, monkeypatch):
+    clock = [1000.0]
+    polls, sleeps = [], []
+
+    def poll():
+        polls.append(clock[0])
+        # The second poll hangs for 3.5 intervals
+        clock[0] += 35.0 if len(polls) == 2 else 1.0
+        return _snap(T0, 1e9)
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(oi_poller.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(oi_poller.time, 'sleep', sleep)
+    monkeypatch.setattr(poller, 'poll', poll)
+    poller.interval_s = 10
+    poller.run(iterations=4)
+    # Back on the 10 s grid after the slow poll, no catch-up burst
+    assert polls == [1000.0, 1010.0, 1050.0, 1060.0]
+
+def test_nothing_written_to_public(poller, tmp_path):
+    poller.record(_snap(T0 - 60, 1e9))
+    poller.record(_snap(T0 + 5, 2e9))
+    assert sorted(os.listdir(tmp_path)) == ['cache', 'oi_history.json']
@@ -0,0 +1,34 @@
+
+import shutil
+
+import pytest
+
+from bench_moving_average import max_rel_err, run_node, slice_loop, synthetic_fees
+
+pytestmark = pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+
+TIMEFRAMES = [1, 2, 7, 30, 90, 180, 360]
+
+def _check(values, timeframes=TIMEFRAMES):
+    got = run_node(values, timeframes, repeat=1)["series"]
+    expected = slice_loop(values, timeframes)
+    assert all(len(got[tf]) == len(values) for tf in timeframes)
+    assert not values or max_rel_err(got, expected, timeframes) < 1e-9
+
+def test_matches_reference_loop():
+    _check(synthetic_fees(3 * 365))
+
+def test_gaps_and_zeros():
+    # Zero-fee runs (missing days, the live row) between large values
+    values = synthetic_fees(400, seed=2)
+    for start, length in [(0, 3), (50, 40), (200, 1), (395, 5)]:
+        values[start:start + length] = [0.0] * length
+    _check(values)
+
+def test_all_zeros():
+    _check([0.0] * 50)
+
+def test_shorter_than_the_windows():
+    _check([5e6, 0.0, 1.25e7])
+    _check([42.0])
+    _check([])
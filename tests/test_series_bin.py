@@ -0,0 +1,66 @@
+
+import os
+import shutil
+
+import pytest
+
+import series_bin
+from series_bin import day_of_date, decode_chunk, encode_chunk, verify, write_series
+
+def test_round_trip_with_gaps():
+    days = [day_of_date(d) for d in ("2025-01-01", "2025-01-02", "2025-01-05", "2025-12-31")]
+    values = [1_234_567_890.4, 987_654_321.6, 0.0, 2_000_000_000.2]
+    got_days, got_values = decode_chunk(encode_chunk(days, values, 1.0))
+    assert got_days == days
+    assert got_values == [1_234_567_890.0, 987_654_322.0, 0.0, 2_000_000_000.0]
+
+def test_header_is_32_bytes_and_arrays_follow():
+    data = encode_chunk([100, 101, 103], [5.0, 7.0, 4.0], 1.0)
+    assert len(data) == 32 + 3 * 4 + 3 * 2
+
+def test_delta_overflow_coarsens_quantum():
+    # 3e9 does not fit an int32 delta at 1 USD, so the chunk goes to 10 USD
+    values = [0.0, 3_000_000_004.99]
+    data = encode_chunk([0, 1], values, 1.0)
+    assert series_bin.HEADER.unpack_from(data)[6] == 10.0
+    _, got = decode_chunk(data)
+    assert got == [0.0, 3_000_000_000.0]
+    assert abs(got[1] - values[1]) == pytest.approx(4.99)
+
+def test_rejects_unsorted_days():
+    with pytest.raises(ValueError):
+        encode_chunk([5, 5], [1.0, 2.0], 1.0)
+
+def test_verify_passes_just_under_half_a_coarsened_quantum(tmp_path):
+    # Max error 4.99 against a 10 USD chunk: inside its tolerance of 5
+    points = [("2024-06-01", 0.0), ("2024-06-02", 3_000_000_004.99)]
+    write_series('oi', points, out_dir=tmp_path)
+    assert verify('oi', points, out_dir=tmp_path) == []
+
+def test_verify_uses_each_chunks_own_quantum(tmp_path):
+    # 2024 coarsened to 10 USD, 2025 stayed at 1 USD: an error of 0.9 in 2025
+    # has to fail even though it is well under 2024's tolerance
+    points = [("2024-06-01", 0.0), ("2024-06-02", 3_000_000_000.0),
+              ("2025-01-01", 100.0), ("2025-01-02", 200.0)]
+    write_series('oi', points, out_dir=tmp_path)
+    assert verify('oi', points, out_dir=tmp_path) == []
+
+    shifted = points[:3] + [("2025-01-02", 200.9)]
+    problems = verify('oi', shifted, out_dir=tmp_path)
+    assert problems and "2025-01-02" in problems[0]
+
+def test_unchanged_chunks_are_not_rewritten(tmp_path):
+    points = [("2024-12-30", 1.0), ("2024-12-31", 2.0), ("2025-01-01", 3.0)]
+    write_series('oi', points, out_dir=tmp_path)
+    old = tmp_path / 'oi' / '2024.bin'
+    os.utime(old, (0, 0))
+    write_series('oi', points + [("2025-01-02", 4.0)], out_dir=tmp_path)
+    assert os.stat(old).st_mtime == 0
+    assert series_bin.read_series('oi', out_dir=tmp_path)[-1] == ("2025-01-02", 4.0)
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+def test_js_decoder_matches_python(tmp_path):
+    points = [("2024-12-30", 17.0), ("2024-12-31", 3_000_000_000.0),
+              ("2025-01-01", 12_345.0), ("2025-03-01", 0.0)]
+    write_series('oi', points, out_dir=tmp_path)
+    assert series_bin.decode_with_node('oi', out_dir=tmp_path) == series_bin.read_series('oi', out_dir=tmp_path)
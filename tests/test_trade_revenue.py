@@ -0,0 +1,84 @@
+
+import io
+import os
+import json
+
+import lz4.frame
+
+import archive_client
+import trade_revenue
+from synthetic_data import LocalArchiveClient
+
+class FlakyListing(LocalArchiveClient):
+    # Listing one hour's prefix fails, as a throttled or dropped request would
+    def __init__(self, root, bad_prefix):
+        super().__init__(root)
+        self.bad_prefix = bad_prefix
+
+    def list_objects_v2(self, Bucket=None, Prefix="", **kwargs):
+        if Prefix == self.bad_prefix:
+            raise ConnectionError("listing failed")
+        return super().list_objects_v2(Bucket=Bucket, Prefix=Prefix, **kwargs)
+
+def _write_trades(root, day, hour, coin, px, sz, n=3):
+    key = f"{archive_client.market_data_prefix(day, hour)}trades/{coin}.lz4"
+    lines = [json.dumps({"time": "x", "raw": {"channel": "trades", "data": [{"coin": coin, "px": str(px), "sz": str(sz)}]}})
+             for _ in range(n)]
+    path = os.path.join(root, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(lz4.frame.compress(("\n".join(lines) + "\n").encode()))
+
+def _scan(tmp_path, monkeypatch, client):
+    monkeypatch.setattr(archive_client, 'get_client', lambda **kwargs: client)
+    return trade_revenue.scan('20240101', '20240101', store_path=str(tmp_path / 'trades.sqlite'),
+                              fetch_workers=2)
+
+def test_empty_hours_count_as_zero_and_failed_listing_stays_open(tmp_path, monkeypatch):
+    root = str(tmp_path / 'archive')
+    # Trades in hours 0-21 only; 22 and 23 had none
+    for hour in range(22):
+        _write_trades(root, '20240101', hour, 'BTC', 10, 2)
+    bad = archive_client.market_data_prefix('20240101', 7) + "trades/"
+
+    conn = _scan(tmp_path, monkeypatch, FlakyListing(root, bad))
+    done = dict(((d, h), n) for d, h, n in conn.execute("SELECT date, hour, files FROM hours_done"))
+    assert ('2024-01-01', 7) not in done
+    assert done[('2024-01-01', 22)] == 0 and done[('2024-01-01', 23)] == 0
+    assert len(done) == 23
+    # The day isn't complete until hour 7 is listed
+    assert trade_revenue.daily(conn) == []
+
+    conn = _scan(tmp_path, monkeypatch, LocalArchiveClient(root))
+    [day] = trade_revenue.daily(conn)
+    assert day['date'] == '2024-01-01'
+    assert day['volume'] == 22 * 3 * 20.0 and day['trades'] == 22 * 3
+
+class TrackingBody(io.BytesIO):
+    # Records how much each read asks for
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+    def read1(self, size=-1):
+        self.reads.append(size)
+        return super().read1(size)
+
+    def readinto(self, b):
+        self.reads.append(len(b))
+        return super().readinto(b)
+
+def test_sum_trades_streams_the_body():
+    lines = [json.dumps({"raw": {"data": [{"coin": "ETH", "px": f"{2000 + i % 997}.{i % 89}", "sz": f"0.{i:06d}"}]}})
+             for i in range(50_000)]
+    data = lz4.frame.compress(("\n".join(lines) + "\n").encode())
+    body = TrackingBody(data)
+    totals = trade_revenue.sum_trades(body)
+    assert totals['ETH'][1] == 50_000
+    assert body.closed
+    # Pulled in small pieces, never the whole object at once
+    assert all(0 < size < len(data) // 4 for size in body.reads)
@@ -0,0 +1,225 @@
+
+import os
+import json
+import sqlite3
+import argparse
+import lz4.frame
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import archive_client
+from archive_pipeline import DEFAULT_FETCH_WORKERS, run_pipeline
+from metrics import METRICS, add_arguments as add_metrics_arguments
+
+# Independent revenue estimate from the market_data/ trades archive.
+#
+# Every hourly trades object (market_data/YYYYMMDD/H/trades/<coin>.lz4, one
+# JSON message per line) is decompressed and summed into notional volume and
+# trade count per coin straight off the S3 response on the pipeline's thread
+# pool, so only a few lz4 blocks of an object are in memory at a time. Hour totals go to a local SQLite store and the
+# hour is checkpointed in the same transaction, so an interrupted run picks
+# up at the next unfinished hour. An hour with no trades objects is
+# checkpointed with zero volume (files = 0) and listed again on runs within
+# EMPTY_RECHECK_HOURS, in case it was published late. Fees are an estimate:
+# notional * (taker + maker rate) at the base fee tier.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(BASE_DIR, "data", "trade_volume.sqlite")
+OUTPUT_PATH = os.path.join(BASE_DIR, "public", "revenue_trades.json")
+
+# Empty hours this recent are listed again on the next run
+EMPTY_RECHECK_HOURS = 48
+
+# Base tier; volume tiers, referral discounts and maker rebates are ignored
+TAKER_FEE_RATE = 0.00045
+MAKER_FEE_RATE = 0.00015
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    date     TEXT NOT NULL,
+    hour     INTEGER NOT NULL,
+    coin     TEXT NOT NULL,
+    notional REAL NOT NULL,
+    trades   INTEGER NOT NULL,
+    PRIMARY KEY (date, hour, coin)
+);
+CREATE TABLE IF NOT EXISTS hours_done (
+    date  TEXT NOT NULL,
+    hour  INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    PRIMARY KEY (date, hour)
+);
+"""
+
+def connect(path=STORE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _trades(message):
+    # Archive lines wrap websocket messages ({"time", "raw": {"channel", "data"}});
+    # bare trade objects are accepted too
+    data = message.get('raw', {}).get('data', message) if isinstance(message, dict) else message
+    return data if isinstance(data, list) else [data]
+
+def sum_trades(body):
+    # Compressed trades file object (botocore StreamingBody, open file...) ->
+    # {coin: [notional, trade count]}, parsed line by line as it arrives
+    totals = {}
+    with body, lz4.frame.LZ4FrameFile(body, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for trade in _trades(json.loads(line)):
+                try:
+                    notional = float(trade['px']) * float(trade['sz'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                entry = totals.setdefault(trade.get('coin', '?'), [0.0, 0])
+                entry[0] += notional
+                entry[1] += 1
+    return totals
+
+def hour_keys(day, hour, client=None):
+    prefix = archive_client.market_data_prefix(day, hour) + "trades/"
+    return [obj['Key'] for obj in archive_client.iter_objects(prefix, client=client)]
+
+def hours_in_range(start, end):
+    current = datetime.strptime(start, "%Y%m%d")
+    last = datetime.strptime(end, "%Y%m%d")
+    while current <= last:
+        for hour in range(24):
+            yield current.strftime("%Y-%m-%d"), hour
+        current += timedelta(days=1)
+
+def save_hour(conn, date, hour, totals, files):
+    # Hour rows and its checkpoint in one transaction
+    with conn:
+        conn.execute("DELETE FROM hourly WHERE date = ? AND hour = ?", (date, hour))
+        conn.executemany("INSERT INTO hourly (date, hour, coin, notional, trades) VALUES (?, ?, ?, ?, ?)",
+                         [(date, hour, coin, n, t) for coin, (n, t) in totals.items()])
+        conn.execute("INSERT OR REPLACE INTO hours_done (date, hour, files) VALUES (?, ?, ?)", (date, hour, files))
+
+def scan(start, end, store_path=STORE_PATH, redo=False, fetch_workers=DEFAULT_FETCH_WORKERS):
+    conn = connect(store_path)
+    client = archive_client.get_client(workers=fetch_workers)
+
+    now = datetime.now(timezone.utc)
+    recheck = now - timedelta(hours=EMPTY_RECHECK_HOURS)
+    recheck = (recheck.strftime("%Y-%m-%d"), recheck.hour)
+    done = set() if redo else {(d, h) for d, h, n in conn.execute("SELECT date, hour, files FROM hours_done")
+                               if n or (d, h) < recheck}
+    # Skip the current hour, it is still being written
+    current = (now.strftime("%Y-%m-%d"), now.hour)
+    hours = [h for h in hours_in_range(start, end) if h not in done and h < current]
+    print(f"{len(hours)} hours to scan ({len(done)} already checkpointed).")
+
+    def list_hour(slot):
+        # A failed listing only costs its own hour, which stays unchecked
+        try:
+            return hour_keys(slot[0].replace("-", ""), slot[1], client=client)
+        except Exception as e:
+            return e
+
+    # Listing is one request per hour; run those concurrently too
+    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+        listings = list(pool.map(list_hour, hours))
+
+    items = []
+    files = {}
+    remaining = {}
+    pending = {}
+    empty = unlisted = 0
+    for (date, hour), keys in zip(hours, listings):
+        if isinstance(keys, Exception):
+            print(f"\nError listing {date} {hour:02d}:00: {keys}")
+            METRICS.error(f"{date} {hour:02d}", keys)
+            unlisted += 1
+            continue
+        if not keys:
+            # No trades archived for this hour: zero volume, not a gap
+            save_hour(conn, date, hour, {}, 0)
+            empty += 1
+            continue
+        files[(date, hour)] = remaining[(date, hour)] = len(keys)
+        pending[(date, hour)] = {}
+        items.extend((date, hour, key) for key in keys)
+    print(f"{len(items)} trades files in {len(remaining)} hours, {empty} empty hours, {unlisted} not listed.")
+
+    def fetch(item):
+        return METRICS.stream(archive_client.open_object(item[2], client=client), sum_trades)
+
+    failed = set()
+    for (date, hour, key), totals, error in run_pipeline(items, fetch, fetch_workers=fetch_workers):
+        slot = (date, hour)
+        if error is not None:
+            print(f"\nError {key}: {error}")
+            METRICS.error(key, error)
+            failed.add(slot)
+        else:
+            merged = pending[slot]
+            for coin, (notional, trades) in totals.items():
+                entry = merged.setdefault(coin, [0.0, 0])
+                entry[0] += notional
+                entry[1] += trades
+                METRICS.count('trades', trades)
+        remaining[slot] -= 1
+        if remaining[slot] == 0:
+            # Files come back in input order, so the hour is complete here
+            if slot not in failed:
+                save_hour(conn, date, hour, pending[slot], files[slot])
+                METRICS.count('hours_saved')
+                print(f"Scanned {date} {hour:02d}:00 ({len(pending[slot])} coins)...", end="\r")
+            del pending[slot]
+    print(f"\nDone. {len(files) - len(failed)} hours saved, {len(failed)} failed.")
+    return conn
+
+def daily(conn, taker_rate=TAKER_FEE_RATE, maker_rate=MAKER_FEE_RATE, by_coin=False):
+    # Complete days only (all 24 hours checkpointed)
+    rows = conn.execute("""
+        SELECT h.date, h.coin, SUM(h.notional), SUM(h.trades)
+        FROM hourly h
+        JOIN (SELECT date FROM hours_done GROUP BY date HAVING COUNT(*) = 24) d ON d.date = h.date
+        GROUP BY h.date, h.coin ORDER BY h.date
+    """)
+    days = {}
+    for date, coin, notional, trades in rows:
+        day = days.setdefault(date, {"date": date, "volume": 0.0, "trades": 0, "est_fees": 0.0})
+        day["volume"] += notional
+        day["trades"] += trades
+        day["est_fees"] += notional * (taker_rate + maker_rate)
+        if by_coin:
+            day.setdefault("coins", {})[coin] = {"volume": notional, "trades": trades}
+    return list(days.values())
+
+if __name__ == "__main__":
+    yesterday = (datetime.utcnow() - timedelta(days=1)).strftime("%Y%m%d")
+    parser = argparse.ArgumentParser(description="Daily volume and estimated fees from market_data/ trades")
+    parser.add_argument('--start', default=yesterday, help="First date, YYYYMMDD")
+    parser.add_argument('--end', default=yesterday, help="Last date, YYYYMMDD")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--redo', action='store_true', help="Rescan hours that are already checkpointed")
+    parser.add_argument('--workers', type=int, default=DEFAULT_FETCH_WORKERS,
+                        help="Concurrent S3 downloads, each summed as it streams")
+    parser.add_argument('--by-coin', action='store_true', help="Include per-coin volume in the output")
+    parser.add_argument('--export-only', action='store_true', help="Skip the scan, just write the output")
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    if args.export_only:
+        conn = connect(args.store)
+    else:
+        try:
+            conn = scan(args.start, args.end, store_path=args.store, redo=args.redo, fetch_workers=args.workers)
+        finally:
+            print(METRICS.summary_line())
+            print(f"Metrics saved to {METRICS.write(args.metrics, args.prometheus)}")
+    days = daily(conn, by_coin=args.by_coin)
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(days, f, separators=(",", ":"))
+    os.replace(tmp_path, args.output)
+    total_fees = sum(d["est_fees"] for d in days)
+    print(f"Saved {len(days)} days to {args.output} (est. fees {total_fees / 1e6:,.1f}M)")
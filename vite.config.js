@@ -4,4 +4,11 @@ import react from '@vitejs/plugin-react'
 // https://vite.dev/config/
 export default defineConfig({
   plugins: [react()],
+  server: {
+    // /api is served by Pages Functions in production; in dev point it at
+    // `wrangler pages dev` or `python edge_cache.py` (both listen on 8788)
+    proxy: {
+      '/api': 'http://127.0.0.1:8788',
+    },
+  },
 })